@@ -0,0 +1,46 @@
+"""
+Creates uncompressed Arrow IPC (Feather v2) builds of the star catalogs.
+
+When these files exist, `stars.load` opens them via memory map instead of reading the parquet files,
+so the columns are never decompressed or copied: all processes that load a catalog share the same
+pages of the file through the page cache.
+"""
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.feather as feather
+
+from starplot.data import stars
+
+CATALOGS = [
+    stars.StarCatalog.HIPPARCOS,
+    stars.StarCatalog.TYCHO_1,
+]
+
+
+def build(catalog: stars.StarCatalog):
+    destination = stars._files[catalog].arrow
+
+    df = stars.load(catalog, cache=False)
+    df = df.sort_values("magnitude", na_position="last", kind="stable")
+
+    table = pa.Table.from_pandas(df, preserve_index=True)
+
+    # store missing values as NaN (not null), so columns can be converted to pandas without copying
+    for i, field in enumerate(table.schema):
+        column = table.column(i)
+        if pa.types.is_floating(field.type) and column.null_count:
+            table = table.set_column(i, field, pc.fill_null(column, float("nan")))
+    table = table.replace_schema_metadata(
+        {**table.schema.metadata, b"starplot.sorted_by": b"magnitude"}
+    )
+
+    # write as a single record batch, so each column is one contiguous buffer
+    feather.write_feather(
+        table, destination, compression="uncompressed", chunksize=len(table)
+    )
+    print(f"{destination}: {len(table)} rows")
+
+
+if __name__ == "__main__":
+    for catalog in CATALOGS:
+        build(catalog)
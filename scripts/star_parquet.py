@@ -0,0 +1,38 @@
+"""
+Rewrites the star catalog parquet files sorted by magnitude.
+
+Each row group stores min/max statistics for every column, so when the stars are sorted by magnitude,
+a reader that filters by magnitude (e.g. `stars.load(limiting_magnitude=6)`) only has to read the
+first few row groups of the file instead of the whole catalog.
+"""
+import pyarrow.parquet as pq
+
+from starplot.data import DataFiles
+
+ROW_GROUP_SIZE = 25_000
+
+CATALOGS = [
+    # (filename, compression, has a pandas index)
+    (DataFiles.HIPPARCOS.value, "gzip", True),
+    (DataFiles.TYCHO_1.value, "gzip", False),
+]
+
+
+def sort_by_magnitude(filename, compression: str, index: bool):
+    df = pq.read_table(filename).to_pandas()
+    df = df.sort_values("magnitude", na_position="last", kind="stable")
+    df.to_parquet(
+        filename,
+        index=index,
+        compression=compression,
+        row_group_size=ROW_GROUP_SIZE,
+        write_statistics=True,
+    )
+
+    metadata = pq.ParquetFile(filename).metadata
+    print(f"{filename}: {metadata.num_rows} rows, {metadata.num_row_groups} row groups")
+
+
+if __name__ == "__main__":
+    for filename, compression, index in CATALOGS:
+        sort_by_magnitude(filename, compression, index)
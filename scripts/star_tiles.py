@@ -0,0 +1,65 @@
+"""
+Creates sky-tiled builds of the star catalogs, for fast reads of small regions (see `stars.query_region`).
+
+The sky is split into declination bands, and each band is split into RA tiles of roughly equal area.
+Each tile is written as its own row group (with stars sorted by magnitude), so readers can use the
+row group statistics to only read the tiles that intersect the region they need.
+"""
+import math
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from starplot.data import DataFiles
+
+CATALOGS = [
+    # (source file, tiled file, tile size in degrees, has a pandas index)
+    (DataFiles.HIPPARCOS.value, DataFiles.HIPPARCOS_TILES.value, 10, True),
+    (DataFiles.TYCHO_1.value, DataFiles.TYCHO_1_TILES.value, 5, False),
+]
+
+
+def tile_ids(ra_hours, dec_degrees, tile_size: float):
+    """Returns tile id of each star, where tiles are ordered by declination band and then by RA"""
+    num_bands = math.ceil(180 / tile_size)
+    band = np.clip(((dec_degrees + 90) // tile_size).astype(int), 0, num_bands - 1)
+
+    # number of RA tiles in each band, so tiles have roughly the same area
+    band_center = np.radians(-90 + (np.arange(num_bands) + 0.5) * tile_size)
+    ra_tiles = np.maximum(1, np.ceil(360 / tile_size * np.cos(band_center))).astype(int)
+    offsets = np.concatenate([[0], np.cumsum(ra_tiles)[:-1]])
+
+    n = ra_tiles[band]
+    ra_tile = np.minimum((ra_hours / 24 * n).astype(int), n - 1)
+
+    return offsets[band] + ra_tile
+
+
+def build(source, destination, tile_size: float, index: bool):
+    df = pq.read_table(source).to_pandas()
+    df["tile"] = tile_ids(df["ra_hours"].values, df["dec_degrees"].values, tile_size)
+    df = df.sort_values(["tile", "magnitude"], na_position="last", kind="stable")
+
+    table = pa.Table.from_pandas(df.drop(columns="tile"), preserve_index=index)
+    tiles = df["tile"].values
+    boundaries = np.flatnonzero(np.diff(tiles)) + 1
+    starts = np.concatenate([[0], boundaries])
+    ends = np.concatenate([boundaries, [len(df)]])
+
+    with pq.ParquetWriter(
+        destination,
+        table.schema,
+        compression="zstd",
+        write_statistics=["ra_hours", "dec_degrees", "magnitude"],
+    ) as writer:
+        for start, end in zip(starts, ends):
+            writer.write_table(table.slice(start, end - start))
+
+    metadata = pq.ParquetFile(destination).metadata
+    print(f"{destination}: {metadata.num_rows} rows, {metadata.num_row_groups} tiles")
+
+
+if __name__ == "__main__":
+    for source, destination, tile_size, index in CATALOGS:
+        build(source, destination, tile_size, index)
@@ -1,26 +1,49 @@
 from abc import ABC, abstractmethod
 from datetime import datetime
+from typing import Union
 
 from adjustText import adjust_text as _adjust_text
 from matplotlib import patches
+from matplotlib.collections import PolyCollection
 from matplotlib import pyplot as plt, patheffects, transforms
 from matplotlib.lines import Line2D
+import numpy as np
+import pandas as pd
 from pytz import timezone
 
-from starplot import geod
+from starplot import geod, planets, sizes
 from starplot.data import load
+from starplot.labels import (
+    LabelCandidate,
+    LabelIndex,
+    LabelLayer,
+    LabelScheduler,
+    GREEDY,
+    MAP_PRIORITIES,
+    label_offsets,
+    text_extent,
+)
 from starplot.models import SkyObject
-from starplot.planets import get_planet_positions
 from starplot.styles import (
     PlotStyle,
     BASE,
     MarkerStyle,
     LegendLocationEnum,
+    ObjectStyle,
     PolygonStyle,
 )
 
 
 class StarPlot(ABC):
+    STAR_SIZES: sizes.StarSizer = sizes.MAP
+    """Default mapping of star magnitudes to marker sizes and alphas (see `starplot.sizes`)"""
+
+    LABEL_PRIORITIES: dict[LabelLayer, int] = MAP_PRIORITIES
+    """Default priorities of label layers (see `starplot.labels.LabelScheduler`)"""
+
+    ADJUST_TEXT_MAX_LABELS: int = 200
+    """If `adjust_text` is True and a plot has more labels than this, then the greedy layout is used instead of adjustText"""
+
     def __init__(
         self,
         dt: datetime = None,
@@ -30,8 +53,11 @@ class StarPlot(ABC):
         style: PlotStyle = BASE,
         resolution: int = 2048,
         hide_colliding_labels: bool = True,
-        adjust_text: bool = False,
+        adjust_text: Union[bool, str] = False,
         rasterize_stars: bool = False,
+        star_sizes: sizes.StarSizer = None,
+        hide_labels_over_stars: bool = False,
+        label_scheduler: LabelScheduler = None,
         *args,
         **kwargs,
     ):
@@ -44,13 +70,20 @@ class StarPlot(ABC):
         self.resolution = resolution
         self.hide_colliding_labels = hide_colliding_labels
         self.adjust_text = adjust_text
+        self._greedy_labels = adjust_text == GREEDY
         self.rasterize_stars = rasterize_stars
+        if star_sizes is None and style.star_sizes is not None:
+            star_sizes = style.star_sizes.scale()
+        self.star_sizes = star_sizes or self.STAR_SIZES
+        self.hide_labels_over_stars = hide_labels_over_stars
+        self.label_scheduler = label_scheduler or LabelScheduler()
 
         self.dt = dt or timezone("UTC").localize(datetime.now())
         self.ephemeris = ephemeris
 
         self.labels = []
-        self._labels_extents = []
+        self._labels_index = LabelIndex()
+        self._label_candidates = None
         self._legend_handles = {}
         self.legend = None
         self.text_border = patheffects.withStroke(
@@ -63,6 +96,7 @@ class StarPlot(ABC):
         )
 
         self.timescale = load.timescale().from_datetime(self.dt)
+        self._positions = None
 
     def _plot_kwargs(self) -> dict:
         return {}
@@ -70,29 +104,142 @@ class StarPlot(ABC):
     def _prepare_coords(self, ra, dec) -> (float, float):
         return ra, dec
 
-    def _is_label_collision(self, extent) -> bool:
-        for e in self._labels_extents:
-            if transforms.Bbox.intersection(e, extent):
-                return True
-        return False
+    def _is_label_collision(
+        self, extent, anchor: tuple = None, markers: bool = None
+    ) -> bool:
+        if markers is None:
+            markers = self.hide_labels_over_stars
+        return self._labels_index.intersects(extent, markers=markers, anchor=anchor)
+
+    def _is_label_inside(self, extent) -> bool:
+        ax_extent = self.ax.get_window_extent()
+        return (
+            ax_extent.x0 <= extent.x0
+            and extent.x1 <= ax_extent.x1
+            and ax_extent.y0 <= extent.y0
+            and extent.y1 <= ax_extent.y1
+        )
+
+    def _is_label_allowed(self, extent, anchor: tuple = None) -> bool:
+        return self._is_label_inside(extent) and not (
+            self.hide_colliding_labels and self._is_label_collision(extent, anchor)
+        )
+
+    def _find_label_offset(self, extent, anchor: tuple) -> tuple[float, float]:
+        """Returns the first offset (in pixels) that moves a label to a free position (clear of other labels and star markers) around its anchor (see `label_offsets`), or None if there's no free position"""
+        for dx, dy in label_offsets(extent, anchor):
+            moved = extent.translated(dx, dy)
+            if self._is_label_inside(moved) and not self._is_label_collision(
+                moved, anchor, markers=True
+            ):
+                return dx, dy
+        return None
 
     def _maybe_remove_label(self, label) -> None:
         extent = label.get_window_extent(renderer=self.fig.canvas.get_renderer())
-        ax_extent = self.ax.get_window_extent()
-        intersection = transforms.Bbox.intersection(ax_extent, extent)
+        anchor = label.get_transform().transform(label.get_position())
 
-        if (
-            intersection is not None
-            and (
-                intersection.height * intersection.width == extent.height * extent.width
-            )
-            and not (self.hide_colliding_labels and self._is_label_collision(extent))
-        ):
+        if self._is_label_allowed(extent, anchor):
             self.labels.append(label)
-            self._labels_extents.append(extent)
+            self._labels_index.insert(extent)
         else:
             label.remove()
 
+    def _add_label(self, x: float, y: float, text: str, **kwargs):
+        """Adds a text label to the plot, unless it's not entirely inside the plot or it collides with another label.
+
+        The label's extent is estimated from font metrics, so a matplotlib `Text` is only created for labels that are plotted.
+
+        Returns:
+            Extent of the label (in display coordinates), or None if the label was not plotted
+        """
+        transform = kwargs.get("transform") or self.ax.transData
+        if not isinstance(transform, transforms.Transform):
+            # cartopy projection
+            transform = transform._as_mpl_transform(self.ax)
+        anchor = transform.transform((x, y))
+
+        extent = text_extent(*anchor, text, self.fig.dpi, **kwargs)
+
+        if extent is None:
+            label = self.ax.text(x, y, text, **kwargs)
+            self._maybe_remove_label(label)
+            if label not in self.labels:
+                return None
+            return label.get_window_extent(renderer=self.fig.canvas.get_renderer())
+
+        offset = None
+        if self._greedy_labels:
+            offset = self._find_label_offset(extent, anchor)
+
+        if offset is None and not self._is_label_allowed(extent, anchor):
+            return None
+
+        label = self.ax.text(x, y, text, **kwargs)
+
+        if offset and offset != (0, 0):
+            dx, dy = offset
+            extent = extent.translated(dx, dy)
+            label.set_transform(
+                transforms.offset_copy(
+                    label.get_transform(),
+                    fig=self.fig,
+                    x=dx * 72 / self.fig.dpi,
+                    y=dy * 72 / self.fig.dpi,
+                    units="points",
+                )
+            )
+
+        self.labels.append(label)
+        self._labels_index.insert(extent)
+        return extent
+
+    def _schedule_label(
+        self,
+        layer: LabelLayer,
+        x: float,
+        y: float,
+        text: str,
+        rank: float = 0,
+        **kwargs,
+    ) -> None:
+        """Adds a label to the plot, or if the plot is collecting labels (see `_collect_labels`), then adds it to the candidates for placing later."""
+        if self._label_candidates is None:
+            self._add_label(x, y, text, **kwargs)
+        else:
+            self._label_candidates.append(
+                LabelCandidate(layer, rank, x, y, text, kwargs)
+            )
+
+    def _collect_labels(self) -> None:
+        """Starts collecting labels from all layers, so they can be placed in order of priority"""
+        self._label_candidates = []
+
+    def _place_labels(self) -> None:
+        """Places the collected labels in order of priority (see `LabelScheduler`), and stops collecting labels"""
+        candidates, self._label_candidates = self._label_candidates or [], None
+        ax_extent = self.ax.get_window_extent()
+
+        if self.adjust_text is True and len(candidates) > self.ADJUST_TEXT_MAX_LABELS:
+            self._greedy_labels = True
+
+        self.label_scheduler.schedule(
+            candidates,
+            lambda c: self._add_label(c.x, c.y, c.text, **c.kwargs),
+            area=ax_extent.width * ax_extent.height,
+            priorities=self.LABEL_PRIORITIES,
+        )
+
+    def _add_label_obstacles(self, markers) -> None:
+        """Adds the markers of a scatter plot to the label index, so labels can avoid them (if `hide_labels_over_stars` is True, or labels may be placed by the greedy layout)"""
+        if markers is None or not (self.hide_labels_over_stars or self.adjust_text):
+            return
+
+        offsets = markers.get_offset_transform().transform(markers.get_offsets())
+        radius = np.sqrt(markers.get_sizes()) * self.fig.dpi / 72 / 2
+
+        self._labels_index.add_markers(offsets[:, 0], offsets[:, 1], radius)
+
     def _add_legend_handle_marker(self, label: str, style: MarkerStyle):
         if label not in self._legend_handles:
             s = style.matplot_kwargs()
@@ -132,9 +279,16 @@ class StarPlot(ABC):
         )
 
     def adjust_labels(self) -> None:
-        """Adjust all the labels to avoid overlapping."""
+        """Adjust all the labels to avoid overlapping (with adjustText).
+
+        This is not necessary for plots that use the greedy layout (`adjust_text="greedy"`), because their labels are already placed at free positions.
+        """
         _adjust_text(self.labels, ax=self.ax, ensure_inside_axes=False)
 
+    def _adjust_labels(self) -> None:
+        if self.adjust_text and not self._greedy_labels:
+            self.adjust_labels()
+
     def close_fig(self) -> None:
         """Closes the underlying matplotlib figure."""
         if self.fig:
@@ -200,9 +354,18 @@ class StarPlot(ABC):
             obj: The object to plot
 
         """
+        self._plot_object(obj, LabelLayer.OBJECT)
+
+    def _plot_object(
+        self, obj: SkyObject, layer: LabelLayer, in_bounds: bool = None
+    ) -> None:
+        # callers that already checked the bounds of many objects at once pass the result in
+        if in_bounds is None:
+            in_bounds = self.in_bounds(obj.ra, obj.dec)
+
         x, y = self._prepare_coords(obj.ra, obj.dec)
 
-        if self.in_bounds(obj.ra, obj.dec):
+        if in_bounds:
             self.ax.plot(
                 x,
                 y,
@@ -217,7 +380,8 @@ class StarPlot(ABC):
                 self._add_legend_handle_marker(obj.legend_label, obj.style.marker)
 
             if obj.style.label.visible:
-                label = self.ax.text(
+                self._schedule_label(
+                    layer,
                     x,
                     y,
                     obj.name,
@@ -226,62 +390,187 @@ class StarPlot(ABC):
                     ),
                     **self._plot_kwargs(),
                     path_effects=[self.text_border],
+                    clip_on=True,
                 )
-                label.set_clip_on(True)
-                self._maybe_remove_label(label)
 
-    def _plot_text(self, ra: float, dec: float, text: str, *args, **kwargs) -> None:
+    def plot_objects(
+        self, objects, styles, legend_labels: Union[dict, str] = None
+    ) -> None:
+        """Plots many objects at once, which is much faster than plotting them one at a time with `plot_object`.
+
+        The objects are filtered to the plot's bounds in one pass, and the markers of all objects with the same style are plotted together. Labels are placed in the order of the objects, with the same collision checks as all other labels.
+
+        Example Usage:
+            Plot an observing list with two styles:
+            ```python
+            p.plot_objects(
+                pd.DataFrame({
+                    "name": ["M42", "M45"],
+                    "ra": [5.58333, 3.7836],
+                    "dec": [-4.61, 24.1167],
+                    "style": ["nebula", "cluster"],
+                }),
+                styles={"nebula": nebula_style, "cluster": cluster_style},
+            )
+            ```
+
+        Args:
+            objects: DataFrame (or dict of arrays) with columns `name`, `ra` (hours), `dec` (degrees) and, if `styles` is a dict, `style`
+            styles: Style of all objects, or dict that maps the values of the `style` column to styles
+            legend_labels: Legend label of all objects, or dict that maps the values of the `style` column to legend labels. If None, then the objects will not be in the legend.
+        """
+        self._plot_objects(objects, styles, legend_labels, LabelLayer.OBJECT)
+
+    def _plot_objects(
+        self,
+        objects,
+        styles,
+        legend_labels: Union[dict, str] = None,
+        layer: LabelLayer = LabelLayer.OBJECT,
+        ranks=None,
+    ) -> None:
+        objects = pd.DataFrame(objects)
+        if ranks is None:
+            ranks = np.arange(len(objects))
+
+        if isinstance(styles, ObjectStyle):
+            objects = objects.assign(style=None)
+            styles = {None: styles}
+            legend_labels = {None: legend_labels}
+
+        legend_labels = legend_labels or {}
+        ra = objects["ra"].to_numpy(dtype=float)
+        dec = objects["dec"].to_numpy(dtype=float)
+        in_bounds = self.in_bounds_many(ra, dec)
+
+        objects = objects[in_bounds]
+        x, y = self._prepare_coords(ra[in_bounds], dec[in_bounds])
+        x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+        # index of each object's style (matched by hash, like dict keys)
+        style_index = pd.Index(list(styles)).get_indexer(objects["style"].to_numpy())
+        names = objects["name"].astype(str).to_numpy()
+        ranks = np.asarray(ranks)[in_bounds]
+
+        collecting = self._label_candidates is not None
+        if not collecting:
+            self._collect_labels()
+
+        for i, (key, style) in enumerate(styles.items()):
+            group = style_index == i
+            if not group.any():
+                continue
+
+            self._plot_markers(
+                x[group],
+                y[group],
+                linestyle="None",
+                **style.marker.matplot_kwargs(size_multiplier=self._size_multiplier),
+            )
+            if legend_labels.get(key) is not None:
+                self._add_legend_handle_marker(legend_labels[key], style.marker)
+
+            if style.label.visible:
+                label_kwargs = style.label.matplot_kwargs(
+                    size_multiplier=self._size_multiplier
+                )
+                for name, x_, y_, rank in zip(
+                    names[group].tolist(),
+                    x[group].tolist(),
+                    y[group].tolist(),
+                    ranks[group].tolist(),
+                ):
+                    # labels are placed in the order of the objects
+                    self._schedule_label(
+                        layer,
+                        x_,
+                        y_,
+                        name,
+                        rank=rank,
+                        **label_kwargs,
+                        **self._plot_kwargs(),
+                        path_effects=[self.text_border],
+                        clip_on=True,
+                    )
+
+        if not collecting:
+            self._place_labels()
+
+    def _plot_markers(self, x, y, **kwargs):
+        """Plots markers at many points (in the plot's coordinates, see `_prepare_coords`) as one artist"""
+        transform = self._plot_kwargs().get("transform")
+
+        if transform is not None:
+            # project the points here, because projecting a path of points
+            # with cartopy would add interpolated points (i.e. markers) between them
+            if not isinstance(transform, transforms.Transform):
+                transform = transform._as_mpl_transform(self.ax)
+            to_data = transform - self.ax.transData
+            x, y = to_data.transform(np.column_stack([x, y])).T
+
+        return self.ax.plot(x, y, **kwargs)
+
+    def _plot_text(
+        self,
+        ra: float,
+        dec: float,
+        text: str,
+        layer: LabelLayer = LabelLayer.OBJECT,
+        rank: float = 0,
+        **kwargs,
+    ) -> None:
         x, y = self._prepare_coords(ra, dec)
         kwargs["path_effects"] = kwargs.get("path_effects") or [self.text_border]
-        label = self.ax.text(
-            x,
-            y,
-            text,
-            *args,
-            **kwargs,
-            **self._plot_kwargs(),
-        )
-        label.set_clip_on(True)
-        self._maybe_remove_label(label)
+        kwargs["clip_on"] = True
+        self._schedule_label(layer, x, y, text, rank, **kwargs, **self._plot_kwargs())
+
+    def _solar_system_positions(self) -> np.ndarray:
+        # planets and the moon are calculated together, once per plot (and cached across plots of the same time)
+        if self._positions is None:
+            self._positions = planets.cached_positions(self.timescale, self.ephemeris)[
+                :, 0
+            ]
+        return self._positions
 
     def _plot_planets(self):
         if not self.style.planets.marker.visible:
             return
 
-        planets = get_planet_positions(self.timescale, ephemeris=self.ephemeris)
+        positions = self._solar_system_positions()
+        positions = positions[positions["name"] != planets.MOON]
 
-        for name, pos in planets.items():
-            ra, dec, apparent_size_degrees = pos
-
-            if self.in_bounds(ra, dec):
-                self._add_legend_handle_marker("Planet", self.style.planets.marker)
+        in_bounds = self.in_bounds_many(positions["ra"], positions["dec"])
+        if in_bounds.any():
+            self._add_legend_handle_marker("Planet", self.style.planets.marker)
 
+        for name, ra, dec, body_in_bounds in zip(
+            positions["name"].tolist(),
+            positions["ra"].tolist(),
+            positions["dec"].tolist(),
+            in_bounds.tolist(),
+        ):
             obj = SkyObject(
                 name=name.upper(),
                 ra=ra,
                 dec=dec,
                 style=self.style.planets,
             )
-            self.plot_object(obj)
+            self._plot_object(obj, LabelLayer.PLANET, body_in_bounds)
 
     def _plot_moon(self):
         if not self.style.moon.marker.visible:
             return
 
-        eph = load(self.ephemeris)
-        earth, moon = eph["earth"], eph["moon"]
-
-        astrometric = earth.at(self.timescale).observe(moon)
-        ra, dec, _ = astrometric.radec()
+        positions = self._solar_system_positions()
+        moon = positions[positions["name"] == planets.MOON][0]
 
         obj = SkyObject(
             name="MOON",
-            ra=ra.hours,
-            dec=dec.degrees,
+            ra=float(moon["ra"]),
+            dec=float(moon["dec"]),
             style=self.style.moon,
             legend_label="Moon",
         )
-        self.plot_object(obj)
+        self._plot_object(obj, LabelLayer.MOON)
 
     @abstractmethod
     def in_bounds(self, ra: float, dec: float) -> bool:
@@ -297,6 +586,28 @@ class StarPlot(ABC):
         """
         raise NotImplementedError
 
+    def in_bounds_many(self, ra, dec) -> np.ndarray:
+        """Determine which coordinates are within the bounds of the plot.
+
+        By default, the coordinates are projected all at once and checked against the axes' background patch. Plots that draw in other coordinates (or have other bounds) override this.
+
+        Args:
+            ra: Array of right ascensions
+            dec: Array of declinations
+
+        Returns:
+            Boolean array: True for each coordinate that is in bounds
+        """
+        x, y = self._prepare_coords(np.asarray(ra), np.asarray(dec))
+        points = np.column_stack([np.ravel(x), np.ravel(y)])
+        points = (self.ax.transData - self.ax.transAxes).transform(points)
+        patch = self.ax.patch
+        return (
+            patch.get_path()
+            .transformed(patch.get_patch_transform())
+            .contains_points(points)
+        )
+
     def _plot_polygon(self, points: list, style: PolygonStyle, **kwargs):
         points = [geod.to_radec(p) for p in points]
         points = [self._prepare_coords(*p) for p in points]
@@ -308,6 +619,32 @@ class StarPlot(ABC):
         )
         self.ax.add_patch(patch)
 
+    def _plot_polygons(self, polygons: list, styles, **kwargs):
+        if isinstance(styles, PolygonStyle):
+            styles = [styles] * len(polygons)
+
+        # group polygons by style
+        groups = {}
+        for points, style in zip(polygons, styles):
+            style_kwargs = style.matplot_kwargs(size_multiplier=self._size_multiplier)
+            key = tuple(style_kwargs.items())
+            groups.setdefault(key, (style_kwargs, []))[1].append(
+                np.asarray(points, dtype=float).reshape(-1, 2)
+            )
+
+        for style_kwargs, group in groups.values():
+            points = np.concatenate(group)
+            x, y = self._prepare_coords(points[:, 0] / 15, points[:, 1])
+            verts = np.split(
+                np.column_stack([x, y]), np.cumsum([len(p) for p in group])[:-1]
+            )
+
+            fill = style_kwargs.pop("fill")
+            collection = PolyCollection(verts, **style_kwargs, **kwargs)
+            if not fill:
+                collection.set_facecolor("none")
+            self.ax.add_collection(collection)
+
     def plot_polygon(self, points: list, style: PolygonStyle):
         """Plots a polygon of points
 
@@ -317,6 +654,15 @@ class StarPlot(ABC):
         """
         self._plot_polygon(points, style)
 
+    def plot_polygons(self, polygons: list, styles):
+        """Plots many polygons at once, which is much faster than plotting them one at a time (all polygons with the same style are plotted as one collection)
+
+        Args:
+            polygons: List of polygons, each a list of points (same as `plot_polygon`)
+            styles: Style of all polygons, or list with the style of each polygon
+        """
+        self._plot_polygons(polygons, styles)
+
     def plot_rectangle(
         self,
         center: tuple,
@@ -1,12 +1,59 @@
+import os
 from enum import Enum
 from pathlib import Path
+from threading import RLock
 
 from skyfield.api import Loader
 
 HERE = Path(__file__).resolve().parent
 DATA_PATH = HERE / "library"
 
-load = Loader(DATA_PATH)
+CACHE_PATH = Path(
+    os.environ.get("STARPLOT_CACHE_DIR")
+    or Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "starplot"
+)
+"""Directory of files that are derived from the data library (e.g. extracted outlines). Set the `STARPLOT_CACHE_DIR` environment variable to change it."""
+
+
+class CachingLoader(Loader):
+    """Skyfield loader that keeps the files it loads (e.g. ephemeris kernels) and its timescales in memory, keyed by filename, so a process opens and parses each file once. Thread-safe.
+
+    Args:
+        directory: Directory of the data files
+        **kwargs: Keyword arguments for `skyfield.api.Loader`
+    """
+
+    def __init__(self, directory, **kwargs) -> None:
+        super().__init__(directory, **kwargs)
+        self._loaded = {}
+        self._lock = RLock()
+
+    def __call__(self, filename: str, reload: bool = False, **kwargs):
+        with self._lock:
+            if reload or filename not in self._loaded:
+                self._loaded[filename] = super().__call__(
+                    filename, reload=reload, **kwargs
+                )
+            return self._loaded[filename]
+
+    def timescale(self, delta_t: float = None, **kwargs):
+        if delta_t is not None:
+            return super().timescale(delta_t=delta_t, **kwargs)
+
+        key = ("timescale", *sorted(kwargs.items()))
+        with self._lock:
+            if key not in self._loaded:
+                self._loaded[key] = super().timescale(**kwargs)
+            return self._loaded[key]
+
+    def clear(self) -> None:
+        """Removes all loaded files and timescales from memory"""
+        with self._lock:
+            self._loaded.clear()
+
+
+load = CachingLoader(DATA_PATH)
+"""Loader of the data library's skyfield files (see `CachingLoader`)"""
 
 
 class DataFiles(str, Enum):
@@ -15,5 +62,31 @@ class DataFiles(str, Enum):
     CONSTELLATION_BORDERS = DATA_PATH / "constellation_borders_inv.gpkg"
     MILKY_WAY = DATA_PATH / "milkyway.gpkg"
     HIPPARCOS = DATA_PATH / "stars.hipparcos.parquet"
+    HIPPARCOS_TILES = DATA_PATH / "stars.hipparcos.tiles.parquet"
+    HIPPARCOS_ARROW = DATA_PATH / "stars.hipparcos.arrow"
     TYCHO_1 = DATA_PATH / "stars.tycho-1.gz.parquet"
+    TYCHO_1_TILES = DATA_PATH / "stars.tycho-1.tiles.parquet"
+    TYCHO_1_ARROW = DATA_PATH / "stars.tycho-1.arrow"
     ONGC = DATA_PATH / "ongc.gpkg.zip"
+
+
+def ra_intervals(ra_min: float, ra_max: float) -> list[tuple]:
+    """Splits a range of right ascension into intervals that don't wrap around 0h, for filtering coordinates by RA.
+
+    Args:
+        ra_min: Minimum right ascension (hours). Can be negative to wrap around 0h.
+        ra_max: Maximum right ascension (hours). Can be more than 24 to wrap around 0h.
+
+    Returns:
+        List of `(start, end)` intervals (hours), all within [0, 24]
+    """
+    if ra_max - ra_min >= 24:
+        return [(0, 24)]
+
+    start = ra_min % 24
+    end = start + (ra_max - ra_min)
+
+    if end > 24:
+        return [(start, 24), (0, end - 24)]
+
+    return [(start, end)]
@@ -0,0 +1,109 @@
+from collections import OrderedDict
+from threading import RLock
+from typing import Any, Callable, Hashable
+
+
+class LRUCache:
+    """Thread-safe, least-recently-used cache with a memory budget.
+
+    Items are evicted (least recently used first) when the total size of all cached items exceeds `max_bytes`. Items larger than the whole budget are never cached.
+
+    Args:
+        max_bytes: Memory budget (in bytes) for all cached items. Set to `0` to disable caching.
+        sizeof: Callable that returns the size (in bytes) of an item
+    """
+
+    def __init__(self, max_bytes: int, sizeof: Callable[[Any], int]) -> None:
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self._items = OrderedDict()
+        self._sizes = {}
+        self._total_bytes = 0
+        self._lock = RLock()
+        # locks of the items that are being loaded (see `get_or_load`)
+        self._loading = {}
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._items
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._items)
+
+    def keys(self) -> list:
+        with self._lock:
+            return list(self._items.keys())
+
+    @property
+    def size_bytes(self) -> int:
+        """Total size (in bytes) of all cached items"""
+        with self._lock:
+            return self._total_bytes
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self._items:
+                return default
+            self._items.move_to_end(key)
+            return self._items[key]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        size = self.sizeof(value)
+
+        with self._lock:
+            self.evict(key)
+
+            if size > self.max_bytes:
+                return
+
+            self._items[key] = value
+            self._sizes[key] = size
+            self._total_bytes += size
+            self._shrink()
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Returns the cached item for `key`, or calls `loader` and caches its result.
+
+        The cache isn't locked while `loader` runs, so other items can be used meanwhile. Threads that need the same item wait for the first thread to load it.
+        """
+        with self._lock:
+            if key in self._items:
+                return self.get(key)
+            loading = self._loading.setdefault(key, RLock())
+
+        with loading:
+            with self._lock:
+                if key in self._items:
+                    return self.get(key)
+
+            try:
+                value = loader()
+                self.put(key, value)
+            finally:
+                with self._lock:
+                    self._loading.pop(key, None)
+
+            return value
+
+    def evict(self, key: Hashable = None) -> None:
+        """Removes an item from the cache. If `key` is None, then all items are removed."""
+        with self._lock:
+            if key is None:
+                self._items.clear()
+                self._sizes.clear()
+                self._total_bytes = 0
+            else:
+                self._items.pop(key, None)
+                self._total_bytes -= self._sizes.pop(key, 0)
+
+    def resize(self, max_bytes: int) -> None:
+        """Changes the memory budget, evicting items if necessary"""
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._shrink()
+
+    def _shrink(self) -> None:
+        while self._items and self._total_bytes > self.max_bytes:
+            key, _ = self._items.popitem(last=False)
+            self._total_bytes -= self._sizes.pop(key, 0)
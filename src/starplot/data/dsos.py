@@ -1,4 +1,19 @@
+import os
+import sqlite3
+from contextlib import closing
 from enum import Enum
+from functools import lru_cache
+from pathlib import Path
+
+import geopandas as gpd
+import numpy as np
+from pandas import DataFrame, read_sql_query
+import pyongc
+from pyongc import ongc
+import shapely
+from shapely import STRtree, box
+
+from starplot.data import CACHE_PATH, DataFiles, ra_intervals
 
 messier = {
     "M1": (5.575547, 22.014472),
@@ -226,3 +241,300 @@ LEGEND_LABELS = {
     DsoType.STAR_CLUSTER_NEBULA: "Nebula",
     DsoType.REFLECTION_NEBULA: "Nebula",
 }
+
+
+ONGC_QUERY = """
+SELECT
+    objects.name AS name,
+    objTypes.typedesc AS dso_type,
+    objects.ra AS ra,
+    objects.dec AS dec,
+    objects.majax AS maj_ax,
+    objects.minax AS min_ax,
+    objects.pa AS angle,
+    objects.bmag AS magnitude_b,
+    objects.vmag AS magnitude_v
+FROM objects JOIN objTypes ON objects.type = objTypes.type
+ORDER BY objects.id
+"""
+
+ONGC_SCHEMA = {
+    "objects": {
+        "id",
+        "name",
+        "type",
+        "ra",
+        "dec",
+        "majax",
+        "minax",
+        "pa",
+        "bmag",
+        "vmag",
+    },
+    "objTypes": {"type", "typedesc"},
+}
+"""Columns of pyongc's (private) database tables that `ONGC_QUERY` reads"""
+
+ONGC_VERSIONS = ("1.1.", "1.2.")
+"""Versions of pyongc whose database `ONGC_QUERY` was written for. With other versions, objects are read with pyongc's public API."""
+
+
+def _has_ongc_schema(db: sqlite3.Connection) -> bool:
+    for table, columns in ONGC_SCHEMA.items():
+        found = {row[1] for row in db.execute(f"PRAGMA table_info({table})")}
+        if not columns <= found:
+            return False
+    return True
+
+
+def _query_ongc() -> DataFrame:
+    """Reads all objects from the OpenNGC database with one query, or returns None if the database isn't one the query was written for"""
+    if not pyongc.__version__.startswith(ONGC_VERSIONS):
+        return None
+
+    try:
+        with closing(sqlite3.connect(f"file:{ongc.DBPATH}?mode=ro", uri=True)) as db:
+            if not _has_ongc_schema(db):
+                return None
+            return read_sql_query(ONGC_QUERY, db)
+    except sqlite3.Error:
+        return None
+
+
+def _list_ongc() -> DataFrame:
+    """Reads all objects with pyongc's public API, which is much slower than `_query_ongc`.
+
+    Objects are ordered by id, like `ONGC_QUERY`. pyongc resolves a few duplicate records (e.g. M102) to the object they duplicate, so those records are missing and each object is listed once.
+    """
+    objects = sorted({d.id: d for d in ongc.listObjects()}.values(), key=lambda d: d.id)
+    values = np.array(
+        [
+            (
+                *(d.rad_coords if d.rad_coords is not None else (None, None)),
+                *d.dimensions,
+                *d.magnitudes[:2],
+            )
+            for d in objects
+        ],
+        dtype=float,
+    )
+
+    df = DataFrame(
+        values,
+        columns=[
+            "ra",
+            "dec",
+            "maj_ax",
+            "min_ax",
+            "angle",
+            "magnitude_b",
+            "magnitude_v",
+        ],
+    )
+    df.insert(0, "name", [d.name for d in objects])
+    df.insert(1, "dso_type", [d.type for d in objects])
+    return df
+
+
+@lru_cache(maxsize=None)
+def load() -> DataFrame:
+    """Returns all objects of the OpenNGC catalog, as a table of numeric columns.
+
+    The table is read from the OpenNGC database once per process, so filtering it (see `query_region`) doesn't have to query the database for each plot. Do not modify the returned table.
+
+    The database is read with one SQL query, because pyongc's API creates an object (and runs a query) for each row. If pyongc's version or database schema isn't one the query was written for (see `ONGC_VERSIONS` and `ONGC_SCHEMA`), then the table is read with pyongc's API instead (without a few duplicate records, see `_list_ongc`).
+
+    Columns:
+
+    - `name`: Name of the object (e.g. "NGC2516")
+    - `dso_type`: Type of the object, as a categorical of `DsoType` values
+    - `ra_hours`: Right ascension (hours)
+    - `dec_degrees`: Declination (degrees)
+    - `maj_ax`: Major axis (arcminutes)
+    - `min_ax`: Minor axis (arcminutes)
+    - `angle`: Position angle of the major axis (degrees)
+    - `magnitude_b`: B magnitude
+    - `magnitude_v`: V magnitude
+
+    Missing values are NaN.
+
+    Returns:
+        DataFrame of all objects
+    """
+    df = _query_ongc()
+    if df is None:
+        df = _list_ongc()
+
+    df["dso_type"] = df["dso_type"].astype("category")
+    df.insert(2, "ra_hours", np.degrees(df.pop("ra")) / 15)
+    df.insert(3, "dec_degrees", np.degrees(df.pop("dec")))
+    return df
+
+
+def query_region(
+    ra_min: float,
+    ra_max: float,
+    dec_min: float,
+    dec_max: float,
+    types: list[DsoType] = None,
+) -> DataFrame:
+    """Returns all objects of the OpenNGC catalog that are within a region of the sky.
+
+    Args:
+        ra_min: Minimum right ascension (hours). Can be negative to wrap around 0h.
+        ra_max: Maximum right ascension (hours). Can be more than 24 to wrap around 0h.
+        dec_min: Minimum declination (degrees)
+        dec_max: Maximum declination (degrees)
+        types: If specified, then only objects of these types will be returned
+
+    Returns:
+        DataFrame of objects, with the columns of `load`
+    """
+    df = load()
+    ra = df["ra_hours"].to_numpy()
+    dec = df["dec_degrees"].to_numpy()
+
+    mask = (dec >= dec_min) & (dec <= dec_max)
+
+    in_ra = np.zeros(len(df), dtype=bool)
+    for ra_start, ra_end in ra_intervals(ra_min, ra_max):
+        in_ra |= (ra >= ra_start) & (ra <= ra_end)
+    mask &= in_ra
+
+    if types is not None:
+        mask &= df["dso_type"].isin([DsoType(t).value for t in types]).to_numpy()
+
+    return df[mask]
+
+
+def find(names: list[str]) -> DataFrame:
+    """Returns the objects of the OpenNGC catalog with the given names.
+
+    Args:
+        names: Names of objects (e.g. "NGC2516"), as they appear in OpenNGC
+
+    Returns:
+        DataFrame of objects (in catalog order), with the columns of `load`
+    """
+    df = load()
+    return df[df["name"].isin(names)]
+
+
+# the version changes when the columns change, so outdated cached outlines are not read
+ONGC_OUTLINES = "ongc.outlines.v2.parquet"
+
+
+def _extract_outlines() -> gpd.GeoDataFrame:
+    """Reads the objects that have an outline (i.e. a polygon) from the OpenNGC GeoPackage"""
+    gdf = gpd.read_file(
+        DataFiles.ONGC.value,
+        engine="pyogrio",
+        use_arrow=True,
+        columns=["Name", "Type", "B-Mag", "V-Mag"],
+    )
+    gdf = gdf[gdf.geom_type.isin(["Polygon", "MultiPolygon"])]
+
+    # outlines that cross 0h are shifted to negative RAs, so they're continuous
+    geometry = gdf.geometry.to_numpy()
+    bounds = shapely.bounds(geometry)
+    wraps = bounds[:, 2] - bounds[:, 0] > 180
+    geometry[wraps] = shapely.transform(
+        geometry[wraps],
+        lambda coords: np.where(coords > [180, 90], coords - [360, 0], coords),
+    )
+
+    return gpd.GeoDataFrame(
+        {
+            "name": gdf["Name"].to_numpy(),
+            "dso_type": [ONGC_TYPE_MAP.get(t) for t in gdf["Type"]],
+            "magnitude_b": gdf["B-Mag"].to_numpy(dtype=float),
+            "magnitude_v": gdf["V-Mag"].to_numpy(dtype=float),
+        },
+        geometry=geometry,
+    ).astype({"dso_type": "category"})
+
+
+@lru_cache(maxsize=None)
+def load_outlines() -> gpd.GeoDataFrame:
+    """Returns the outlines of all objects in the OpenNGC catalog that have one.
+
+    The first time this is called, the outlines are extracted from the (zipped) OpenNGC GeoPackage into the cache directory (see `starplot.data.CACHE_PATH`), and they're extracted again when the GeoPackage changes (or the cached file can't be read). Outlines are then loaded once per process. Do not modify the returned table.
+
+    Columns:
+
+    - `name`: Name of the object (e.g. "NGC1976")
+    - `dso_type`: Type of the object, as a categorical of `DsoType` values
+    - `magnitude_b`: B magnitude
+    - `magnitude_v`: V magnitude
+    - `geometry`: Outline of the object (polygon or multipolygon), in RA (degrees) and DEC (degrees). Outlines that cross 0h have negative RAs, so they're continuous.
+
+    Returns:
+        GeoDataFrame of outlines
+    """
+    source = Path(DataFiles.ONGC.value)
+    cached = CACHE_PATH / ONGC_OUTLINES
+
+    if cached.exists() and cached.stat().st_mtime >= source.stat().st_mtime:
+        try:
+            return gpd.read_parquet(cached)
+        except (OSError, ValueError):
+            # partial or corrupt file, so the outlines are extracted again below
+            pass
+
+    outlines = _extract_outlines()
+
+    tmp = cached.with_name(f"{cached.name}.{os.getpid()}.tmp")
+    try:
+        CACHE_PATH.mkdir(parents=True, exist_ok=True)
+        # write to a temporary file first, so other processes never read a partial file
+        outlines.to_parquet(tmp)
+        os.replace(tmp, cached)
+    except OSError:
+        # cache directory isn't writable, so each process extracts the outlines
+        tmp.unlink(missing_ok=True)
+
+    return outlines
+
+
+@lru_cache(maxsize=None)
+def _outlines_index() -> STRtree:
+    return STRtree(load_outlines().geometry.to_numpy())
+
+
+def query_outlines(
+    ra_min: float,
+    ra_max: float,
+    dec_min: float,
+    dec_max: float,
+    types: list[DsoType] = None,
+) -> gpd.GeoDataFrame:
+    """Returns the outlines of objects that intersect a region of the sky.
+
+    Outlines are found with a spatial index of their bounding boxes, which is built once per process.
+
+    Args:
+        ra_min: Minimum right ascension (hours). Can be negative to wrap around 0h.
+        ra_max: Maximum right ascension (hours). Can be more than 24 to wrap around 0h.
+        dec_min: Minimum declination (degrees)
+        dec_max: Maximum declination (degrees)
+        types: If specified, then only objects of these types will be returned
+
+    Returns:
+        GeoDataFrame of outlines (in catalog order), with the columns of `load_outlines`
+    """
+    # outlines that cross 0h have negative RAs (see `_extract_outlines`)
+    regions = [
+        box(ra_start * 15 + offset, dec_min, ra_end * 15 + offset, dec_max)
+        for ra_start, ra_end in ra_intervals(ra_min, ra_max)
+        for offset in [0, -360]
+    ]
+    _, positions = _outlines_index().query(regions)
+
+    outlines = load_outlines().iloc[np.unique(positions)]
+
+    if types is not None:
+        outlines = outlines[
+            outlines["dso_type"].isin([DsoType(t).value for t in types])
+        ]
+
+    return outlines
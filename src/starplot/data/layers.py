@@ -0,0 +1,219 @@
+import hashlib
+import math
+import os
+from functools import lru_cache
+from pathlib import Path
+
+import cartopy
+import geopandas as gpd
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import shapely
+from shapely import STRtree
+
+from starplot import __version__
+from starplot.data import CACHE_PATH
+from starplot.data.cache import LRUCache
+
+PROJECTED_BUCKET_SIZE = 30
+"""Size (degrees) of the extent buckets of projected geometries (see `load_projected`)"""
+
+PROJECTED_CACHE_VERSION = 1
+"""Version of the projected geometries cached on disk (see `load_projected`), which changes when the way they're projected or stored changes"""
+
+PROJECTED_CACHE_MAX_BYTES = 64 * 1024**2
+"""Memory budget (in bytes) of the per-process cache of projected geometries"""
+
+LOD_TOLERANCES = (0.05, 0.1, 0.25, 0.5, 1.0)
+"""Simplification tolerances (degrees) of the levels of detail of layers (see `lod_tolerance`)"""
+
+
+class GeoLayer:
+    """In-memory layer of geometries (e.g. from a GeoPackage), with a spatial index for bounding box queries.
+
+    Args:
+        gdf: GeoDataFrame of the layer
+    """
+
+    def __init__(self, gdf: gpd.GeoDataFrame) -> None:
+        self.gdf = gdf
+        self._tree = STRtree(gdf.geometry.to_numpy())
+
+    def __len__(self) -> int:
+        return len(self.gdf)
+
+    def query(self, bbox: tuple, clip: bool = True) -> gpd.GeoDataFrame:
+        """Returns the features that intersect a bounding box.
+
+        Args:
+            bbox: Bounding box: (min x, min y, max x, max y)
+            clip: If True, then geometries are clipped to the bounding box. Clipping happens in the layer's coordinates, so don't clip geometries that will be plotted along great circles (e.g. with a geodetic transform).
+
+        Returns:
+            GeoDataFrame of features (in the order of the layer)
+        """
+        positions = np.sort(
+            self._tree.query(shapely.box(*bbox), predicate="intersects")
+        )
+        features = self.gdf.iloc[positions]
+
+        if clip:
+            clipped = shapely.clip_by_rect(features.geometry.to_numpy(), *bbox)
+            features = features.set_geometry(clipped)
+            features = features[~shapely.is_empty(clipped)]
+
+        return features
+
+
+def load(filename: str, tolerance: float = 0) -> GeoLayer:
+    """Returns a layer of a GeoPackage, which is read from disk once per process.
+
+    Args:
+        filename: Path of the GeoPackage
+        tolerance: If greater than 0, then the layer's geometries are simplified to this tolerance (in degrees), which is a level of detail of the layer (see `lod_tolerance`). Each level is simplified once per process.
+
+    Returns:
+        GeoLayer of the GeoPackage
+    """
+    if tolerance:
+        return _load_simplified(filename, tolerance)
+    return _load(filename)
+
+
+@lru_cache(maxsize=None)
+def _load(filename: str) -> GeoLayer:
+    gdf = gpd.read_file(filename, engine="pyogrio", use_arrow=True)
+    return GeoLayer(gdf)
+
+
+@lru_cache(maxsize=None)
+def _load_simplified(filename: str, tolerance: float) -> GeoLayer:
+    gdf = _load(filename).gdf
+    simplified = shapely.simplify(
+        gdf.geometry.to_numpy(), tolerance, preserve_topology=True
+    )
+    return GeoLayer(gdf.set_geometry(simplified))
+
+
+def lod_tolerance(extent: float, resolution: int) -> float:
+    """Returns the coarsest level of detail (see `LOD_TOLERANCES`) that deviates less than half a pixel from the full geometries.
+
+    Args:
+        extent: Width (degrees) of the plot's extent
+        resolution: Size (pixels) of the plot
+
+    Returns:
+        Simplification tolerance (degrees), or 0 if the full geometries should be used
+    """
+    degrees_per_pixel = extent / resolution
+    return max(
+        (t for t in LOD_TOLERANCES if t <= degrees_per_pixel / 2),
+        default=0,
+    )
+
+
+def _sizeof(geometries: np.ndarray) -> int:
+    return int(shapely.get_num_coordinates(geometries).sum()) * 16
+
+
+_projected = LRUCache(PROJECTED_CACHE_MAX_BYTES, _sizeof)
+
+
+def _bucket(bbox: tuple, size: float = PROJECTED_BUCKET_SIZE) -> tuple:
+    """Rounds a bounding box (lon/lat) out to multiples of `size` degrees"""
+    lon_min, lat_min, lon_max, lat_max = bbox
+    return (
+        max(-180, math.floor(lon_min / size) * size),
+        max(-90, math.floor(lat_min / size) * size),
+        min(180, math.ceil(lon_max / size) * size),
+        min(90, math.ceil(lat_max / size) * size),
+    )
+
+
+def _crs_key(crs) -> str:
+    return f"{type(crs).__name__} {crs.proj4_init} {getattr(crs, 'threshold', '')}"
+
+
+def _data_version(filename: str) -> str:
+    stat = os.stat(filename)
+    return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+
+def _read_wkb(filename: Path) -> np.ndarray:
+    wkb = pq.read_table(filename).column("wkb").to_pylist()
+    return shapely.from_wkb(np.array(wkb, dtype=object))
+
+
+def _write_wkb(filename: Path, geometries: np.ndarray) -> None:
+    tmp = filename.with_name(f"{filename.name}.{os.getpid()}.tmp")
+    try:
+        filename.parent.mkdir(parents=True, exist_ok=True)
+        # write to a temporary file first, so other processes never read a partial file
+        pq.write_table(pa.table({"wkb": shapely.to_wkb(geometries)}), tmp)
+        os.replace(tmp, filename)
+    except OSError:
+        # cache directory isn't writable, so geometries are only cached in memory
+        tmp.unlink(missing_ok=True)
+
+
+def load_projected(
+    filename: str,
+    bbox: tuple,
+    crs,
+    src_crs,
+    clip: bool = True,
+    tolerance: float = 0,
+) -> np.ndarray:
+    """Returns the geometries of a GeoPackage layer that intersect a bounding box, projected to a (cartopy) CRS.
+
+    Projecting geometries is slow (especially along great circles), so projected geometries are cached in memory and on disk (in `starplot.data.CACHE_PATH`). They're keyed by the layer (and its level of detail), the projection (including its center), the bounding box rounded out to `PROJECTED_BUCKET_SIZE` degrees, the version of the layer's file, and the versions of the cache (`PROJECTED_CACHE_VERSION`), starplot, cartopy and shapely. The returned geometries cover the rounded bounding box, so clip them to the plot.
+
+    Args:
+        filename: Path of the GeoPackage
+        bbox: Bounding box (lon/lat): (min lon, min lat, max lon, max lat)
+        crs: CRS to project the geometries to
+        src_crs: CRS of the layer's coordinates (e.g. `Geodetic` to project lines along great circles)
+        clip: If True, then geometries are clipped to the rounded bounding box before they're projected (see `GeoLayer.query`)
+        tolerance: Level of detail of the layer (see `load` and `lod_tolerance`)
+
+    Returns:
+        Array of geometries, in the coordinates of `crs`
+    """
+    bucket = _bucket(bbox)
+    key = (
+        Path(filename).name,
+        _crs_key(crs),
+        _crs_key(src_crs),
+        bucket,
+        clip,
+        tolerance,
+        _data_version(filename),
+        # projections (and geometries) can change between versions of these libraries
+        PROJECTED_CACHE_VERSION,
+        __version__,
+        cartopy.__version__,
+        shapely.__version__,
+    )
+
+    geometries = _projected.get(key)
+    if geometries is not None:
+        return geometries
+
+    digest = hashlib.sha1(repr(key).encode()).hexdigest()[:16]
+    cached = CACHE_PATH / "projected" / f"{Path(filename).stem}.{digest}.parquet"
+
+    if cached.exists():
+        geometries = _read_wkb(cached)
+    else:
+        features = (
+            load(filename, tolerance).query(bucket, clip=clip).geometry.to_numpy()
+        )
+        geometries = np.empty(len(features), dtype=object)
+        geometries[:] = [
+            crs.project_geometry(geometry, src_crs) for geometry in features
+        ]
+        _write_wkb(cached, geometries)
+
+    _projected.put(key, geometries)
+    return geometries
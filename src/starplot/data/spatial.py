@@ -0,0 +1,131 @@
+import numpy as np
+
+
+def unit_vectors(ra_hours, dec_degrees) -> np.ndarray:
+    """Returns an array of 3D unit vectors (shape = `(n, 3)`) for arrays of RA/DEC"""
+    ra = np.radians(np.asarray(ra_hours, dtype=np.float64) * 15)
+    dec = np.radians(np.asarray(dec_degrees, dtype=np.float64))
+    cos_dec = np.cos(dec)
+    return np.column_stack([cos_dec * np.cos(ra), cos_dec * np.sin(ra), np.sin(dec)])
+
+
+class SkyIndex:
+    """Spatial index of points on the celestial sphere, for fast cone searches.
+
+    Points are split into declination bands, and sorted by right ascension within each band. A cone search only looks at the bands that intersect the cone, and within each band only at the RA range that can be inside the cone. Near the poles, the bands are small, so searches cost about the same anywhere on the sky. Candidates are then checked exactly by the angle between their unit vectors.
+
+    Args:
+        ra_hours: Array of right ascensions (hours)
+        dec_degrees: Array of declinations (degrees)
+        band_size: Height (degrees) of each declination band
+    """
+
+    ARRAYS = ["_order", "_ra", "_xyz", "_band_offsets"]
+    """Arrays of the index that are saved to files (see `save`)"""
+
+    def __init__(self, ra_hours, dec_degrees, band_size: float = 1.0) -> None:
+        ra_hours = np.asarray(ra_hours, dtype=np.float64) % 24
+        dec_degrees = np.asarray(dec_degrees, dtype=np.float64)
+
+        self.band_size = band_size
+        self.num_bands = int(np.ceil(180 / band_size))
+
+        band = self._band(dec_degrees)
+        order = np.lexsort((ra_hours, band))
+
+        self._order = order
+        self._ra = ra_hours[order]
+        self._xyz = unit_vectors(ra_hours[order], dec_degrees[order])
+        self._band_offsets = np.searchsorted(band[order], np.arange(self.num_bands + 1))
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    @property
+    def nbytes(self) -> int:
+        return self._order.nbytes + self._ra.nbytes + self._xyz.nbytes
+
+    def save(self, filename) -> None:
+        """Saves the index to a NumPy file (`.npz`), so other processes can load it instead of building it.
+
+        Args:
+            filename: Path of the file
+        """
+        np.savez(
+            filename,
+            band_size=self.band_size,
+            **{name.lstrip("_"): getattr(self, name) for name in self.ARRAYS},
+        )
+
+    @classmethod
+    def load(cls, filename) -> "SkyIndex":
+        """Loads an index that was saved with `save`.
+
+        Args:
+            filename: Path of the file
+
+        Returns:
+            SkyIndex of the file
+        """
+        index = cls.__new__(cls)
+        with np.load(filename) as data:
+            index.band_size = float(data["band_size"])
+            index.num_bands = int(np.ceil(180 / index.band_size))
+            for name in cls.ARRAYS:
+                setattr(index, name, data[name.lstrip("_")])
+        return index
+
+    def _band(self, dec_degrees):
+        band = np.floor((np.asarray(dec_degrees) + 90) / self.band_size).astype(int)
+        return np.clip(band, 0, self.num_bands - 1)
+
+    def cone_search(self, ra: float, dec: float, radius: float) -> np.ndarray:
+        """Returns the positions (in the arrays the index was built from) of all points within a cone.
+
+        Args:
+            ra: Right ascension (hours) of the cone's center
+            dec: Declination (degrees) of the cone's center
+            radius: Radius (degrees) of the cone
+
+        Returns:
+            Sorted array of positions
+        """
+        center = unit_vectors([ra], [dec])[0]
+        min_cos = np.cos(np.radians(radius))
+
+        if abs(dec) + radius >= 90:
+            # cone contains a pole, so it includes all right ascensions
+            ra_ranges = [(0, 24)]
+        else:
+            half_width = (
+                np.degrees(
+                    np.arcsin(np.sin(np.radians(radius)) / np.cos(np.radians(dec)))
+                )
+                / 15
+            )
+            ra_min = (ra - half_width) % 24
+            ra_max = ra_min + 2 * half_width
+            if ra_max > 24:
+                ra_ranges = [(ra_min, 24), (0, ra_max - 24)]
+            else:
+                ra_ranges = [(ra_min, ra_max)]
+
+        band_min, band_max = self._band([dec - radius, dec + radius])
+        candidates = []
+
+        for band in range(band_min, band_max + 1):
+            start, end = self._band_offsets[band], self._band_offsets[band + 1]
+            ra_band = self._ra[start:end]
+
+            for ra_start, ra_end in ra_ranges:
+                i = np.searchsorted(ra_band, ra_start, side="left")
+                j = np.searchsorted(ra_band, ra_end, side="right")
+                candidates.append(np.arange(start + i, start + j))
+
+        if not candidates:
+            return np.array([], dtype=np.int64)
+
+        candidates = np.concatenate(candidates)
+        inside = self._xyz[candidates] @ center >= min_cos
+
+        return np.sort(self._order[candidates[inside]])
@@ -1,8 +1,20 @@
+import hashlib
+import os
 from enum import Enum
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, NamedTuple
 
-from pandas import read_parquet
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pandas import DataFrame, read_parquet
+from skyfield.precessionlib import compute_precession
 
-from starplot.data import DataFiles
+from starplot.data import CACHE_PATH, DataFiles, ra_intervals
+from starplot.data.cache import LRUCache
+from starplot.data.spatial import SkyIndex
+from starplot.data.table import StarTable
 
 """
     Dictionary of stars that will be labeled on the plot
@@ -149,6 +161,9 @@ ZENITH_BASE = [
 
 BASE_LIMITING_MAG = 8
 
+CACHE_MAX_BYTES = 512 * 1024 * 1024
+"""Default memory budget (in bytes) for the process-wide star catalog cache"""
+
 
 class StarCatalog(str, Enum):
     """Built-in star catalogs"""
@@ -160,22 +175,74 @@ class StarCatalog(str, Enum):
     """Tycho-1 Catalog = 1,055,115 stars"""
 
 
-def load_hipparcos():
-    return read_parquet(DataFiles.HIPPARCOS)
+class Astrometry(str, Enum):
+    """Methods of calculating the positions of stars"""
+
+    FULL = "full"
+    """Astrometric positions from skyfield (proper motion, parallax and light-time)"""
+
+    FAST = "fast"
+    """Catalog positions moved by proper motion only, with NumPy (see `propagate`)"""
+
+
+def _filters(limiting_magnitude: float = None) -> list:
+    if limiting_magnitude is None:
+        return None
+    return [("magnitude", "<=", limiting_magnitude)]
+
+
+@lru_cache(maxsize=None)
+def _arrow_table(filename: str) -> pa.Table:
+    """Opens an Arrow IPC file via memory map. The table's buffers point into the memory map, so they're shared (through the page cache) by all processes that open the same file."""
+    return pa.ipc.open_file(pa.memory_map(filename, "r")).read_all()
+
+
+def _load_arrow(
+    filename: str, limiting_magnitude: float = None, columns: list[str] = None
+) -> DataFrame:
+    table = _arrow_table(filename)
+
+    if limiting_magnitude is not None:
+        magnitudes = table.column("magnitude").to_numpy()
+        metadata = table.schema.metadata or {}
+
+        if metadata.get(b"starplot.sorted_by") == b"magnitude":
+            # zero-copy: the brightest stars are at the start of the table
+            table = table.slice(
+                0, np.searchsorted(magnitudes, limiting_magnitude, side="right")
+            )
+        else:
+            table = table.filter(magnitudes <= limiting_magnitude)
+
+    if columns is not None:
+        table = table.select([c for c in columns if c != "hip"] + ["hip"])
+
+    # for numeric columns without nulls, split_blocks avoids copying the data
+    return table.to_pandas(split_blocks=True)
+
+
+def _arrow_file(catalog: "StarCatalog") -> str:
+    filename = _files[catalog].arrow
+    return str(filename) if filename.exists() else None
+
+
+def load_hipparcos(limiting_magnitude: float = None, columns: list[str] = None):
+    arrow_file = _arrow_file(StarCatalog.HIPPARCOS)
+    if arrow_file:
+        return _load_arrow(arrow_file, limiting_magnitude, columns)
+
+    return read_parquet(
+        DataFiles.HIPPARCOS,
+        engine="pyarrow",
+        columns=columns,
+        filters=_filters(limiting_magnitude),
+    )
+
+
+TYCHO_1_DERIVED_COLUMNS = ["ra_degrees", "epoch_year"]
 
 
-def load_tycho1():
-    # columns=[
-    #     "hip",
-    #     "magnitude",
-    #     "ra_hours",
-    #     "dec_degrees",
-    #     "parallax_mas",
-    #     "ra_mas_per_year",
-    #     "dec_mas_per_year",
-    #     "bv",
-    # ]
-    df = read_parquet(DataFiles.TYCHO_1)
+def _prepare_tycho1(df: DataFrame) -> DataFrame:
     df = df.assign(
         ra_degrees=df["ra_hours"] * 15.0,
         epoch_year=1991.25,
@@ -183,10 +250,451 @@ def load_tycho1():
     return df.set_index("hip")
 
 
-def load(catalog: StarCatalog = StarCatalog.HIPPARCOS):
-    if catalog == StarCatalog.TYCHO_1:
-        return load_tycho1()
-    elif catalog == StarCatalog.HIPPARCOS:
-        return load_hipparcos()
+def load_tycho1(limiting_magnitude: float = None, columns: list[str] = None):
+    arrow_file = _arrow_file(StarCatalog.TYCHO_1)
+    if arrow_file:
+        return _load_arrow(arrow_file, limiting_magnitude, columns)
+
+    read_columns = None
+
+    if columns is not None:
+        read_columns = ["hip", "ra_hours"] + [
+            c
+            for c in columns
+            if c not in ["hip", "ra_hours"] and c not in TYCHO_1_DERIVED_COLUMNS
+        ]
+
+    df = read_parquet(
+        DataFiles.TYCHO_1,
+        engine="pyarrow",
+        columns=read_columns,
+        filters=_filters(limiting_magnitude),
+    )
+    df = _prepare_tycho1(df)
+
+    if columns is not None:
+        df = df[[c for c in columns if c != "hip"]]
+
+    return df
+
+
+def _sizeof(item) -> int:
+    if isinstance(item, (SkyIndex, StarTable)):
+        return item.nbytes
+    return int(item.memory_usage(index=True).sum())
+
+
+_cache = LRUCache(max_bytes=CACHE_MAX_BYTES, sizeof=_sizeof)
+
+_loaders = {
+    StarCatalog.HIPPARCOS: load_hipparcos,
+    StarCatalog.TYCHO_1: load_tycho1,
+}
+
+
+class CatalogFiles(NamedTuple):
+    parquet: Path
+    """Catalog file (sorted by magnitude once `scripts/star_parquet.py` has rewritten it)"""
+
+    tiles: Path
+    """Optional sky-tiled build of the catalog (see `scripts/star_tiles.py`)"""
+
+    arrow: Path
+    """Optional uncompressed Arrow IPC build of the catalog (see `scripts/star_arrow.py`)"""
+
+    prepare: Callable[[DataFrame], DataFrame] = None
+    """Function that prepares a DataFrame read from the parquet files"""
+
+
+_files = {
+    StarCatalog.HIPPARCOS: CatalogFiles(
+        parquet=Path(DataFiles.HIPPARCOS.value),
+        tiles=Path(DataFiles.HIPPARCOS_TILES.value),
+        arrow=Path(DataFiles.HIPPARCOS_ARROW.value),
+    ),
+    StarCatalog.TYCHO_1: CatalogFiles(
+        parquet=Path(DataFiles.TYCHO_1.value),
+        tiles=Path(DataFiles.TYCHO_1_TILES.value),
+        arrow=Path(DataFiles.TYCHO_1_ARROW.value),
+        prepare=_prepare_tycho1,
+    ),
+}
+
+
+def _catalog(catalog: StarCatalog) -> StarCatalog:
+    try:
+        return StarCatalog(catalog)
+    except ValueError:
+        raise ValueError("Unrecognized star catalog.") from None
+
+
+def _filter(df: DataFrame, limiting_magnitude: float = None, columns: list[str] = None):
+    if limiting_magnitude is not None:
+        df = df[df["magnitude"] <= limiting_magnitude]
+    if columns is not None:
+        df = df[[c for c in columns if c != df.index.name]]
+    return df
+
+
+def _load_table(catalog: StarCatalog) -> StarTable:
+    return StarTable.from_dataframe(_loaders[catalog]())
+
+
+def load(
+    catalog: StarCatalog = StarCatalog.HIPPARCOS,
+    limiting_magnitude: float = None,
+    columns: list[str] = None,
+    cache: bool = True,
+    as_table: bool = False,
+):
+    """Loads a star catalog as a DataFrame.
+
+    When the catalog isn't cached (or `cache` is False), the limiting magnitude and columns are pushed down to the parquet reader, so only the row groups and columns that are needed get read from disk. Row groups are skipped by their magnitude statistics, so a low limiting magnitude only reads a small part of a catalog file that's sorted by magnitude (see `scripts/star_parquet.py`).
+
+    If the catalog has an uncompressed Arrow IPC build (see `scripts/star_arrow.py`), then it's opened via memory map instead of reading the parquet file. The columns are not decompressed or copied, so they're shared (through the page cache) by all processes that load the catalog.
+
+    Catalogs are kept in a process-wide cache (see `preload`, `evict` and `set_cache_limit`). Only full catalogs are cached: a filtered load filters the cached catalog in memory if it's already cached (e.g. by `preload` or an unfiltered load), and otherwise reads only the stars and columns it needs without caching them. So if you load the same catalog with filters many times, then `preload` it first. The cached DataFrames are shared, so this returns a shallow copy: adding columns is safe, but values should not be modified in place.
+
+    If `as_table` is True, then the catalog is returned as a `StarTable`, which uses much less memory than a DataFrame. The full catalog is cached as a table, and filtered by the limiting magnitude in memory.
+
+    Args:
+        catalog: The catalog to load
+        limiting_magnitude: If specified, then only stars with a magnitude less than or equal to this value will be loaded
+        columns: If specified, then only these columns will be loaded (the index, `hip`, is always loaded). Ignored if `as_table` is True.
+        cache: If True, then the catalog will be read from (and stored in) the cache
+        as_table: If True, then return a `StarTable` instead of a DataFrame
+
+    Returns:
+        DataFrame (or `StarTable`) of stars
+    """
+    catalog = _catalog(catalog)
+    loader = _loaders[catalog]
+    columns = list(columns) if columns is not None else None
+
+    if as_table:
+        if cache:
+            table = _cache.get_or_load((catalog, "table"), lambda: _load_table(catalog))
+        else:
+            table = _load_table(catalog)
+
+        if limiting_magnitude is not None:
+            table = table[table.magnitude <= limiting_magnitude]
+
+        return table
+
+    if not cache:
+        return loader(limiting_magnitude, columns)
+
+    if limiting_magnitude is None and columns is None:
+        return _cache.get_or_load(catalog, loader).copy(deep=False)
+
+    df = _cache.get(catalog)
+    if df is None:
+        # filtered loads don't fill the cache, so they only read what they need
+        return loader(limiting_magnitude, columns)
+
+    return _filter(df, limiting_magnitude, columns).copy(deep=False)
+
+
+def preload(*catalogs: StarCatalog, as_table: bool = False) -> None:
+    """Loads star catalogs into the process-wide cache, so later plots do not have to read them from disk.
+
+    Args:
+        catalogs: Catalogs to load. If none are specified, then all built-in catalogs are loaded.
+        as_table: If True, then the catalogs are cached as `StarTable`s (which is what the plots use) instead of DataFrames
+    """
+    for catalog in catalogs or list(StarCatalog):
+        load(catalog, as_table=as_table)
+
+
+def evict(catalog: StarCatalog = None) -> None:
+    """Removes a star catalog (and its table and spatial index) from the process-wide cache.
+
+    Args:
+        catalog: Catalog to remove. If None, then all catalogs are removed.
+    """
+    if catalog is None:
+        _cache.evict()
+        return
+
+    catalog = _catalog(catalog)
+
+    for key in _cache.keys():
+        if key == catalog or (isinstance(key, tuple) and key[0] == catalog):
+            _cache.evict(key)
+
+
+def set_cache_limit(max_bytes: int) -> None:
+    """Sets the memory budget of the process-wide star catalog cache.
+
+    When the budget is exceeded, the least recently used catalogs are evicted first.
+
+    Args:
+        max_bytes: Memory budget in bytes. Set to `0` to disable caching.
+    """
+    _cache.resize(max_bytes)
+
+
+@lru_cache(maxsize=None)
+def _row_group_bounds(filename: str) -> tuple:
+    """Returns the parquet metadata of a file, and the bounds of each row group as an array of: [ra_min, ra_max, dec_min, dec_max, magnitude_min]"""
+    metadata = pq.read_metadata(filename)
+    columns = ["ra_hours", "dec_degrees", "magnitude"]
+    bounds = np.empty((metadata.num_row_groups, 5))
+    unbounded = [0, 24, -90, 90, -np.inf]
+
+    for i in range(metadata.num_row_groups):
+        row_group = metadata.row_group(i)
+        stats = {}
+        for j in range(row_group.num_columns):
+            column = row_group.column(j)
+            if column.path_in_schema in columns and column.is_stats_set:
+                stats[column.path_in_schema] = column.statistics
+
+        bounds[i] = unbounded
+        for k, name in enumerate(columns):
+            if name in stats and stats[name].has_min_max:
+                bounds[i][k * 2] = stats[name].min
+                if k < 2:
+                    bounds[i][k * 2 + 1] = stats[name].max
+
+    return metadata, bounds
+
+
+def _region_mask(
+    stars, intervals: list[tuple], dec_min: float, dec_max: float, mag: float = None
+) -> np.ndarray:
+    ra = np.asarray(stars["ra_hours"])
+    dec = np.asarray(stars["dec_degrees"])
+
+    mask = (dec >= dec_min) & (dec <= dec_max)
+
+    in_ra = np.zeros(len(ra), dtype=bool)
+    for ra_start, ra_end in intervals:
+        in_ra |= (ra >= ra_start) & (ra <= ra_end)
+    mask &= in_ra
+
+    if mag is not None:
+        mask &= np.asarray(stars["magnitude"]) <= mag
+
+    return mask
+
+
+def query_region(
+    ra_min: float,
+    ra_max: float,
+    dec_min: float,
+    dec_max: float,
+    mag: float = None,
+    catalog: StarCatalog = StarCatalog.HIPPARCOS,
+    as_table: bool = False,
+):
+    """Returns all stars of a catalog that are within a region of the sky.
+
+    If the catalog is in the process-wide cache, then it's filtered in memory. If the catalog has an Arrow IPC build (see `scripts/star_arrow.py`), then it's filtered directly on the memory-mapped file. Otherwise, only the parquet row groups that intersect the region are read from disk: the sky-tiled build of the catalog (see `scripts/star_tiles.py`) stores one row group per sky tile, so small regions only have to read a few tiles. If the tiled file does not exist, then the regular catalog file is used.
+
+    Args:
+        ra_min: Minimum right ascension (hours). Can be negative to wrap around 0h.
+        ra_max: Maximum right ascension (hours). Can be more than 24 to wrap around 0h.
+        dec_min: Minimum declination (degrees)
+        dec_max: Maximum declination (degrees)
+        mag: If specified, then only stars with a magnitude less than or equal to this value will be returned
+        catalog: The catalog to query
+        as_table: If True, then return a `StarTable` instead of a DataFrame
+
+    Returns:
+        DataFrame (or `StarTable`) of stars
+    """
+    catalog = _catalog(catalog)
+    intervals = ra_intervals(ra_min, ra_max)
+
+    files = _files[catalog]
+    arrow_file = _arrow_file(catalog)
+
+    if as_table and (catalog, "table") in _cache:
+        table = _cache.get((catalog, "table"))
+        return table[_region_mask(table, intervals, dec_min, dec_max, mag)]
+
+    if catalog in _cache:
+        df = _cache.get(catalog)
+
+    elif arrow_file:
+        table = _arrow_table(arrow_file)
+        ra = table.column("ra_hours").to_numpy()
+        dec = table.column("dec_degrees").to_numpy()
+
+        in_ra = np.zeros(len(ra), dtype=bool)
+        for ra_start, ra_end in intervals:
+            in_ra |= (ra >= ra_start) & (ra <= ra_end)
+
+        df = table.filter(in_ra & (dec >= dec_min) & (dec <= dec_max)).to_pandas()
+
     else:
-        raise ValueError("Unrecognized star catalog.")
+        filename = str(files.parquet)
+        if files.tiles.exists():
+            filename = str(files.tiles)
+
+        metadata, bounds = _row_group_bounds(filename)
+
+        in_ra = np.zeros(len(bounds), dtype=bool)
+        for ra_start, ra_end in intervals:
+            in_ra |= (bounds[:, 0] <= ra_end) & (bounds[:, 1] >= ra_start)
+
+        selected = in_ra & (bounds[:, 2] <= dec_max) & (bounds[:, 3] >= dec_min)
+        if mag is not None:
+            selected &= bounds[:, 4] <= mag
+
+        row_groups = np.flatnonzero(selected).tolist()
+
+        parquet_file = pq.ParquetFile(filename, metadata=metadata)
+        df = parquet_file.read_row_groups(
+            row_groups, use_pandas_metadata=True
+        ).to_pandas()
+
+        if files.prepare:
+            df = files.prepare(df)
+
+    df = df[_region_mask(df, intervals, dec_min, dec_max, mag)]
+
+    if as_table:
+        return StarTable.from_dataframe(df)
+
+    return df
+
+
+def _build_index(stars) -> SkyIndex:
+    return SkyIndex(np.asarray(stars["ra_hours"]), np.asarray(stars["dec_degrees"]))
+
+
+def _source_file(catalog: StarCatalog) -> Path:
+    """Returns the file that `load` reads a catalog from"""
+    files = _files[catalog]
+    return files.arrow if files.arrow.exists() else files.parquet
+
+
+def _load_index(catalog: StarCatalog, stars, kind: str) -> SkyIndex:
+    """Returns the spatial index of a loaded catalog, from the cache directory if it's there, otherwise it's built and saved there.
+
+    Saved indexes are keyed by the file the catalog was read from (its path, size and modification time), because the catalog's files can have their stars in different orders.
+    """
+    source = _source_file(catalog)
+    stat = source.stat()
+    version = f"{source.resolve()} {stat.st_size}-{stat.st_mtime_ns}"
+    digest = hashlib.sha1(version.encode()).hexdigest()[:16]
+    cached = CACHE_PATH / f"stars.{catalog.value}.{kind}.{digest}.index.npz"
+
+    if cached.exists():
+        try:
+            index = SkyIndex.load(cached)
+            if len(index) == len(stars):
+                return index
+        except (OSError, ValueError, KeyError):
+            # partial or outdated file, so it's rebuilt below
+            pass
+
+    index = _build_index(stars)
+
+    tmp = cached.with_name(f"{cached.name}.{os.getpid()}.tmp")
+    try:
+        CACHE_PATH.mkdir(parents=True, exist_ok=True)
+        # write to a temporary file first, so other processes never read a partial file
+        with open(tmp, "wb") as f:
+            index.save(f)
+        os.replace(tmp, cached)
+    except OSError:
+        # cache directory isn't writable, so each process builds the index
+        tmp.unlink(missing_ok=True)
+
+    return index
+
+
+def cone_search(
+    ra: float,
+    dec: float,
+    radius: float,
+    max_mag: float = None,
+    catalog: StarCatalog = StarCatalog.HIPPARCOS,
+    as_table: bool = False,
+):
+    """Returns all stars of a catalog that are within a circular region (cone) of the sky.
+
+    The first search of each catalog builds a spatial index of it (see `SkyIndex`), which is saved in the cache directory (see `starplot.data.CACHE_PATH`) so later processes load it instead, and kept in the process-wide cache with the catalog. Searches near the poles cost about the same as searches near the equator.
+
+    Args:
+        ra: Right ascension (hours) of the cone's center
+        dec: Declination (degrees) of the cone's center
+        radius: Radius (degrees) of the cone
+        max_mag: If specified, then only stars with a magnitude less than or equal to this value will be returned
+        catalog: The catalog to search
+        as_table: If True, then return a `StarTable` instead of a DataFrame
+
+    Returns:
+        DataFrame (or `StarTable`) of stars
+    """
+    catalog = _catalog(catalog)
+    stars = load(catalog, as_table=as_table)
+
+    # the DataFrame and table of a catalog are indexed separately, so each index matches its rows
+    kind = "table" if as_table else "frame"
+    index = _cache.get_or_load(
+        (catalog, "index", kind), lambda: _load_index(catalog, stars, kind)
+    )
+    rows = index.cone_search(ra, dec, radius)
+
+    if max_mag is not None:
+        rows = rows[np.asarray(stars["magnitude"])[rows] <= max_mag]
+
+    if as_table:
+        return stars[rows]
+
+    return stars.iloc[rows]
+
+
+def propagate(stars: StarTable, t, precess: bool = False) -> tuple:
+    """Returns the positions of stars at a time, by moving their catalog positions by their proper motions.
+
+    This skips the rest of skyfield's astrometric reduction, so each position is within the star's parallax of its astrometric position (see `astrometry_error`), which is less than 1 arcsecond for all stars.
+
+    Args:
+        stars: Table of stars
+        t: Skyfield `Time` to calculate positions for
+        precess: If True, then positions are precessed to the mean equator and equinox of `t` (instead of ICRS)
+
+    Returns:
+        Tuple of arrays: (right ascensions in hours, declinations in degrees)
+    """
+    ra = np.radians(stars.ra_hours.astype(np.float64) * 15)
+    dec = np.radians(stars.dec_degrees.astype(np.float64))
+    years = (t.tdb - (1721045.0 + stars.epoch_year * 365.25)) / 365.25
+
+    # milliarcseconds per year -> radians
+    scale = years * np.pi / (180 * 3600 * 1000)
+    pm_ra = stars.ra_mas_per_year * scale
+    pm_dec = stars.dec_mas_per_year * scale
+
+    # move along the tangent plane (directions of increasing RA and Dec), which is stable near the poles
+    sin_ra, cos_ra = np.sin(ra), np.cos(ra)
+    sin_dec, cos_dec = np.sin(dec), np.cos(dec)
+    x = cos_dec * cos_ra - pm_ra * sin_ra - pm_dec * sin_dec * cos_ra
+    y = cos_dec * sin_ra + pm_ra * cos_ra - pm_dec * sin_dec * sin_ra
+    z = sin_dec + pm_dec * cos_dec
+
+    if precess:
+        x, y, z = compute_precession(t.tdb) @ np.array([x, y, z])
+
+    ra_hours = np.degrees(np.arctan2(y, x)) / 15 % 24
+    dec_degrees = np.degrees(np.arctan2(z, np.hypot(x, y)))
+
+    return ra_hours, dec_degrees
+
+
+def astrometry_error(stars: StarTable) -> np.ndarray:
+    """Returns the largest difference (arcseconds) between the positions of stars from `propagate` and their astrometric positions, which is each star's parallax.
+
+    Args:
+        stars: Table of stars
+
+    Returns:
+        Array of errors (arcseconds)
+    """
+    return np.nan_to_num(stars.parallax_mas.astype(np.float64)) / 1000
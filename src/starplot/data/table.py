@@ -0,0 +1,155 @@
+import numpy as np
+from pandas import DataFrame
+from skyfield.api import Star
+
+
+class StarTable:
+    """Compact, array-backed table of stars.
+
+    Holds only the columns needed to plot stars, as float32 arrays (plus an int32 array of Hipparcos IDs), which uses about a third of the memory of a DataFrame of the same stars. Missing values are NaN, and stars without a Hipparcos ID have an ID of `0`. All stars share the same epoch.
+
+    Indexing with a boolean mask, array of positions or slice returns a new table (slices are views, so they do not copy any data). Indexing with a column name returns that column's array.
+
+    Args:
+        hip: Hipparcos IDs
+        ra_hours: Right ascensions (hours)
+        dec_degrees: Declinations (degrees)
+        magnitude: Magnitudes
+        ra_mas_per_year: Proper motions in right ascension (milliarcseconds per year)
+        dec_mas_per_year: Proper motions in declination (milliarcseconds per year)
+        parallax_mas: Parallaxes (milliarcseconds)
+        bv: B-V color indexes
+        epoch_year: Epoch (year) of the positions
+    """
+
+    COLUMNS = [
+        "ra_hours",
+        "dec_degrees",
+        "magnitude",
+        "ra_mas_per_year",
+        "dec_mas_per_year",
+        "parallax_mas",
+        "bv",
+    ]
+    """Float columns of the table"""
+
+    def __init__(
+        self,
+        hip,
+        ra_hours,
+        dec_degrees,
+        magnitude,
+        ra_mas_per_year=None,
+        dec_mas_per_year=None,
+        parallax_mas=None,
+        bv=None,
+        epoch_year: float = 1991.25,
+    ) -> None:
+        self.hip = np.asarray(hip, dtype=np.int32)
+        self.ra_hours = np.asarray(ra_hours, dtype=np.float32)
+        self.dec_degrees = np.asarray(dec_degrees, dtype=np.float32)
+        self.magnitude = np.asarray(magnitude, dtype=np.float32)
+        self.ra_mas_per_year = self._column(ra_mas_per_year)
+        self.dec_mas_per_year = self._column(dec_mas_per_year)
+        self.parallax_mas = self._column(parallax_mas)
+        self.bv = self._column(bv)
+        self.epoch_year = float(epoch_year)
+        self._hip_order = None
+
+    def _column(self, values) -> np.ndarray:
+        if values is None:
+            return np.full(len(self.hip), np.nan, dtype=np.float32)
+        return np.asarray(values, dtype=np.float32)
+
+    @classmethod
+    def from_dataframe(cls, df: DataFrame) -> "StarTable":
+        """Creates a table from a DataFrame of stars (e.g. one returned by `stars.load`). The Hipparcos ID can be the index or a column."""
+        if "hip" in df.columns:
+            hip = df["hip"].to_numpy()
+        elif df.index.name == "hip":
+            hip = df.index.to_numpy()
+        else:
+            hip = np.zeros(len(df))
+
+        columns = {
+            c: df[c].to_numpy(dtype=np.float32, na_value=np.nan)
+            for c in cls.COLUMNS
+            if c in df.columns
+        }
+
+        if "ra_hours" not in columns:
+            columns["ra_hours"] = df["ra_degrees"].to_numpy(dtype=np.float32) / 15
+
+        epoch_year = 1991.25
+        if "epoch_year" in df.columns and len(df):
+            epoch_year = df["epoch_year"].iloc[0]
+
+        return cls(
+            hip=np.nan_to_num(hip.astype(np.float64), nan=0),
+            epoch_year=epoch_year,
+            **columns,
+        )
+
+    def __len__(self) -> int:
+        return len(self.hip)
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            if key == "hip" or key in self.COLUMNS:
+                return getattr(self, key)
+            raise KeyError(key)
+
+        return StarTable(
+            epoch_year=self.epoch_year,
+            hip=self.hip[key],
+            **{c: getattr(self, c)[key] for c in self.COLUMNS},
+        )
+
+    @property
+    def nbytes(self) -> int:
+        """Total size (in bytes) of the table's arrays"""
+        return self.hip.nbytes + sum(getattr(self, c).nbytes for c in self.COLUMNS)
+
+    def rows(self, hip_ids) -> np.ndarray:
+        """Returns the positions of stars in the table, by Hipparcos ID.
+
+        Args:
+            hip_ids: Hipparcos IDs to find
+
+        Returns:
+            Array of positions
+
+        Raises:
+            KeyError: If any of the stars is not in the table
+        """
+        if self._hip_order is None:
+            self._hip_order = np.argsort(self.hip, kind="stable")
+
+        hip_ids = np.asarray(hip_ids, dtype=np.int64)
+        sorted_hip = self.hip[self._hip_order]
+        i = np.searchsorted(sorted_hip, hip_ids).clip(0, max(len(self) - 1, 0))
+
+        if len(self) == 0 or (sorted_hip[i] != hip_ids).any():
+            missing = hip_ids if len(self) == 0 else hip_ids[sorted_hip[i] != hip_ids]
+            raise KeyError(f"Stars not found: {missing.tolist()}")
+
+        return self._hip_order[i]
+
+    def star(self) -> Star:
+        """Returns a skyfield `Star` for all stars in the table, for computing their positions"""
+        return Star(
+            ra_hours=self.ra_hours.astype(np.float64),
+            dec_degrees=self.dec_degrees.astype(np.float64),
+            ra_mas_per_year=self.ra_mas_per_year.astype(np.float64),
+            dec_mas_per_year=self.dec_mas_per_year.astype(np.float64),
+            parallax_mas=self.parallax_mas.astype(np.float64),
+            epoch=1721045.0 + self.epoch_year * 365.25,
+        )
+
+    def to_dataframe(self) -> DataFrame:
+        """Returns the table as a DataFrame, indexed by Hipparcos ID"""
+        df = DataFrame({c: getattr(self, c) for c in self.COLUMNS})
+        df["epoch_year"] = self.epoch_year
+        df.index = self.hip
+        df.index.name = "hip"
+        return df
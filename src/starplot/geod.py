@@ -1,55 +1,141 @@
-import math
-
+import numpy as np
 import pyproj
 
 
 GEOD = pyproj.Geod("+a=6378137 +f=0.0", sphere=True)
 
+POLE_OFFSET = 0.00000001
+"""Offset (degrees) of shapes centered exactly on a pole, which have no defined azimuth"""
+
 
 def distance_m(distance_degrees: float, lat: float = 0, lon: float = 0):
     _, _, distance = GEOD.inv(lon, lat, lon + distance_degrees, lat)
     return distance
 
 
+def _distances_m(distance_degrees) -> np.ndarray:
+    """Vectorized `distance_m` along the equator"""
+    distance_degrees = np.asarray(distance_degrees, dtype=float)
+    zeros = np.zeros(distance_degrees.shape)
+    _, _, distance = GEOD.inv(zeros, zeros, distance_degrees, zeros)
+    return np.asarray(distance)
+
+
 def to_radec(p) -> tuple:
     return (p[0] / 15, p[1])
 
 
+def _centers(centers) -> tuple[np.ndarray, np.ndarray]:
+    """Returns the lons (degrees) and lats of shape centers `[(ra, dec), ...]`"""
+    centers = np.asarray(centers, dtype=float).reshape(-1, 2)
+    lon = centers[:, 0] * 15
+    lat = centers[:, 1].copy()
+    lat[lat == 90] -= POLE_OFFSET
+    lat[lat == -90] += POLE_OFFSET
+    return lon, lat
+
+
+def _fwd(lon, lat, azimuth, distance) -> np.ndarray:
+    """Vectorized `GEOD.fwd` of each center (rows) for each azimuth/distance (columns), returns array of points with shape (shapes, points, 2)"""
+    azimuth, distance = np.broadcast_arrays(azimuth, distance)
+    lons = np.broadcast_to(lon[:, None], azimuth.shape)
+    lats = np.broadcast_to(lat[:, None], azimuth.shape)
+
+    p_lon, p_lat, _ = GEOD.fwd(
+        lons.ravel(), lats.ravel(), azimuth.ravel(), distance.ravel()
+    )
+
+    return np.stack(
+        [np.reshape(p_lon, azimuth.shape), np.reshape(p_lat, azimuth.shape)],
+        axis=-1,
+    )
+
+
+def rectangles(
+    centers,
+    height_degrees,
+    width_degrees,
+    angle=0,
+) -> np.ndarray:
+    """Calculates the corners of many rectangles at once (with a single call to `GEOD.fwd`).
+
+    Args:
+        centers: Array of rectangle centers `[(ra, dec), ...]`
+        height_degrees: Height of each rectangle (degrees), a scalar or array
+        width_degrees: Width of each rectangle (degrees), a scalar or array
+        angle: Angle of rotation clockwise (degrees) of each rectangle, a scalar or array
+
+    Returns:
+        Array with shape (rectangles, 4, 2) of corners `(lon, lat)`
+    """
+    lon, lat = _centers(centers)
+    height_degrees, width_degrees, angle = np.broadcast_arrays(
+        np.asarray(height_degrees, dtype=float),
+        np.asarray(width_degrees, dtype=float),
+        np.asarray(angle, dtype=float),
+    )
+    angle = np.broadcast_to(180 - angle, lon.shape)
+
+    half_height = np.broadcast_to(_distances_m(height_degrees) / 2, lon.shape)
+    half_width = np.broadcast_to(_distances_m(width_degrees) / 2, lon.shape)
+
+    c = np.hypot(half_height, half_width)
+    angle_th = np.degrees(np.arctan2(half_height, half_width))
+
+    azimuths = angle[:, None] + np.column_stack(
+        [90 - angle_th, 90 + angle_th, 270 - angle_th, 270 + angle_th]
+    )
+
+    return _fwd(lon, lat, azimuths, c[:, None])
+
+
 def rectangle(
     center: tuple,
     height_degrees: float,
     width_degrees: float,
     angle: float = 0,
 ) -> list:
-    ra, dec = center
-    ra = ra * 15
-    angle = 180 - angle
-
-    if dec == 90:
-        dec -= 0.00000001
-    if dec == -90:
-        dec += 0.00000001
-
-    height_m = distance_m(height_degrees)
-    width_m = distance_m(width_degrees)
+    points = rectangles([center], height_degrees, width_degrees, angle)[0]
+    return [tuple(p) for p in points.tolist()]
 
-    c = math.sqrt((height_m / 2) ** 2 + (width_m / 2) ** 2)
-    angle_th = math.atan((height_m / 2) / (width_m / 2))
 
-    angle_th = math.degrees(angle_th)
-    points = []
+def ellipses(
+    centers,
+    height_degrees,
+    width_degrees,
+    angle=0,
+    num_pts: int = 100,
+) -> np.ndarray:
+    """Calculates the points of many ellipses at once (with a single call to `GEOD.fwd`).
+
+    Args:
+        centers: Array of ellipse centers `[(ra, dec), ...]`
+        height_degrees: Height of each ellipse (degrees), a scalar or array
+        width_degrees: Width of each ellipse (degrees), a scalar or array
+        angle: Angle of rotation clockwise (degrees) of each ellipse, a scalar or array
+        num_pts: Number of points to calculate for each ellipse
+
+    Returns:
+        Array with shape (ellipses, points, 2) of points `(lon, lat)`
+    """
+    lon, lat = _centers(centers)
+    height_degrees, width_degrees, angle = np.broadcast_arrays(
+        np.asarray(height_degrees, dtype=float),
+        np.asarray(width_degrees, dtype=float),
+        np.asarray(angle, dtype=float),
+    )
+    angle = np.broadcast_to(180 - angle, lon.shape)
 
-    p0_lon, p0_lat, _ = GEOD.fwd([ra], [dec], angle + (90 - angle_th), c)
-    p1_lon, p1_lat, _ = GEOD.fwd([ra], [dec], angle + (90 + angle_th), c)
-    p2_lon, p2_lat, _ = GEOD.fwd([ra], [dec], angle + (270 - angle_th), c)
-    p3_lon, p3_lat, _ = GEOD.fwd([ra], [dec], angle + (270 + angle_th), c)
+    height = np.broadcast_to(_distances_m(height_degrees / 2), lon.shape)[:, None]  # b
+    width = np.broadcast_to(_distances_m(width_degrees / 2), lon.shape)[:, None]  # a
 
-    points.append((p0_lon[0], p0_lat[0]))
-    points.append((p1_lon[0], p1_lat[0]))
-    points.append((p2_lon[0], p2_lat[0]))
-    points.append((p3_lon[0], p3_lat[0]))
+    angle_pts = np.arange(0, 360, int(360 / num_pts))
+    radians = np.radians(angle_pts)
+    radius_a = (height * width) / np.sqrt(
+        height**2 * np.sin(radians) ** 2 + width**2 * np.cos(radians) ** 2
+    )
 
-    return points
+    return _fwd(lon, lat, angle[:, None] + angle_pts, radius_a)
 
 
 def ellipse(
@@ -59,30 +145,8 @@ def ellipse(
     angle: float = 0,
     num_pts: int = 100,
 ) -> list:
-    ra, dec = center
-    ra = ra * 15
-    angle = 180 - angle
-
-    if dec == 90:
-        dec -= 0.00000001
-    if dec == -90:
-        dec += 0.00000001
-
-    height = distance_m(height_degrees / 2)  # b
-    width = distance_m(width_degrees / 2)  # a
-
-    points = []
-    for angle_pt in range(0, 360, int(360 / num_pts)):
-        radians = math.radians(angle_pt)
-        radius_a = (height * width) / math.sqrt(
-            height**2 * (math.sin(radians)) ** 2
-            + width**2 * (math.cos(radians)) ** 2
-        )
-        lon, lat, _ = GEOD.fwd([ra], [dec], angle + angle_pt, radius_a)
-
-        points.append((lon[0], lat[0]))
-
-    return points
+    points = ellipses([center], height_degrees, width_degrees, angle, num_pts)[0]
+    return [tuple(p) for p in points.tolist()]
 
 
 def circle(center: tuple, radius_degrees: float, num_pts: int = 100) -> list:
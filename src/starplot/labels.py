@@ -0,0 +1,527 @@
+"""Label placement"""
+
+import math
+from collections import defaultdict
+from enum import Enum
+from threading import RLock
+from typing import Callable, NamedTuple
+
+import numpy as np
+from matplotlib import font_manager
+from matplotlib.backends.backend_agg import FigureCanvasAgg, get_hinting_flag
+from matplotlib.figure import Figure
+from matplotlib.text import Text
+from matplotlib.transforms import Bbox, IdentityTransform
+
+
+def _bounds(extent) -> tuple[float, float, float, float]:
+    if isinstance(extent, Bbox):
+        return extent.xmin, extent.ymin, extent.xmax, extent.ymax
+    x0, y0, x1, y1 = extent
+    return min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1)
+
+
+class LabelIndex:
+    """Spatial hash of rectangles in display (pixel) coordinates, for checking if a label collides with labels (or markers) that are already on the plot.
+
+    The plot is split into a uniform grid of square cells, and each rectangle is stored in all the cells it overlaps. A collision check only compares a label to the rectangles in the cells it overlaps, so checks and inserts take about the same time no matter how many labels are on the plot.
+
+    Markers are added in bulk as fixed obstacles (see `add_markers`), and are stored in sorted arrays instead of the grid's dictionary, so adding hundreds of thousands of markers is fast.
+
+    Args:
+        cell_size: Width and height (in pixels) of each grid cell
+    """
+
+    def __init__(self, cell_size: float = 64) -> None:
+        self.cell_size = cell_size
+        self._cells = defaultdict(list)
+        self._boxes = []
+
+        self._marker_boxes = np.empty((0, 4))
+        self._marker_cells = np.empty(0, dtype=np.int64)
+        self._marker_ids = np.empty(0, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self._boxes)
+
+    def _cell_range(self, x0, y0, x1, y1):
+        return (
+            math.floor(x0 / self.cell_size),
+            math.floor(y0 / self.cell_size),
+            math.floor(x1 / self.cell_size),
+            math.floor(y1 / self.cell_size),
+        )
+
+    def insert(self, extent) -> None:
+        """Adds a rectangle to the index.
+
+        Args:
+            extent: Rectangle, as a `Bbox` or tuple of `(x0, y0, x1, y1)`
+        """
+        bounds = _bounds(extent)
+        i = len(self._boxes)
+        self._boxes.append(bounds)
+
+        cx0, cy0, cx1, cy1 = self._cell_range(*bounds)
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                self._cells[(cx, cy)].append(i)
+
+    def add_markers(self, x, y, radius) -> None:
+        """Adds markers to the index, as squares around each marker's center.
+
+        Args:
+            x: Array of x coordinates (pixels) of the markers' centers
+            y: Array of y coordinates (pixels) of the markers' centers
+            radius: Radius (pixels) of the markers. Can be an array, one per marker.
+        """
+        x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+        radius = np.broadcast_to(np.asarray(radius, dtype=float), x.shape)
+
+        valid = np.isfinite(x) & np.isfinite(y) & (radius > 0)
+        boxes = np.column_stack([x - radius, y - radius, x + radius, y + radius])[valid]
+
+        self._marker_boxes = np.concatenate([self._marker_boxes, boxes])
+        self._index_markers()
+
+    def _index_markers(self) -> None:
+        cells = np.floor(self._marker_boxes / self.cell_size).astype(np.int64)
+        cx0, cy0, cx1, cy1 = cells.T
+
+        # each marker is stored once for every cell it overlaps
+        widths = cx1 - cx0 + 1
+        heights = cy1 - cy0 + 1
+        counts = widths * heights
+        ids = np.repeat(np.arange(len(cells)), counts)
+        offsets = np.arange(len(ids)) - np.repeat(np.cumsum(counts) - counts, counts)
+
+        cell_x = cx0[ids] + offsets % widths[ids]
+        cell_y = cy0[ids] + offsets // widths[ids]
+        keys = self._cell_key(cell_x, cell_y)
+
+        order = np.argsort(keys, kind="stable")
+        self._marker_cells = keys[order]
+        self._marker_ids = ids[order]
+
+    @staticmethod
+    def _cell_key(cx, cy):
+        return (np.asarray(cx, dtype=np.int64) << 32) + (
+            np.asarray(cy, dtype=np.int64) & 0xFFFFFFFF
+        )
+
+    def intersects(self, extent, markers: bool = True, anchor: tuple = None) -> bool:
+        """Returns True if a rectangle intersects any rectangle in the index.
+
+        Args:
+            extent: Rectangle, as a `Bbox` or tuple of `(x0, y0, x1, y1)`
+            markers: If True, then also check for collisions with markers
+            anchor: Point `(x, y)` that the rectangle (label) belongs to. Markers that contain this point are ignored, so a label does not collide with the marker it's labeling.
+        """
+        x0, y0, x1, y1 = _bounds(extent)
+        cx0, cy0, cx1, cy1 = self._cell_range(x0, y0, x1, y1)
+
+        checked = set()
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                for i in self._cells.get((cx, cy), ()):
+                    if i in checked:
+                        continue
+                    checked.add(i)
+                    bx0, by0, bx1, by1 = self._boxes[i]
+                    if bx0 <= x1 and x0 <= bx1 and by0 <= y1 and y0 <= by1:
+                        return True
+
+        if not markers or len(self._marker_cells) == 0:
+            return False
+
+        cell_x, cell_y = np.meshgrid(
+            np.arange(cx0, cx1 + 1), np.arange(cy0, cy1 + 1), indexing="ij"
+        )
+        keys = self._cell_key(cell_x.ravel(), cell_y.ravel())
+        starts = np.searchsorted(self._marker_cells, keys, side="left")
+        ends = np.searchsorted(self._marker_cells, keys, side="right")
+
+        if not (ends > starts).any():
+            return False
+
+        ids = np.concatenate([self._marker_ids[s:e] for s, e in zip(starts, ends)])
+        boxes = self._marker_boxes[ids]
+
+        collisions = (
+            (boxes[:, 0] <= x1)
+            & (x0 <= boxes[:, 2])
+            & (boxes[:, 1] <= y1)
+            & (y0 <= boxes[:, 3])
+        )
+
+        if anchor is not None:
+            ax, ay = anchor
+            collisions &= ~(
+                (boxes[:, 0] <= ax)
+                & (ax <= boxes[:, 2])
+                & (boxes[:, 1] <= ay)
+                & (ay <= boxes[:, 3])
+            )
+
+        return bool(collisions.any())
+
+
+FONT_KWARGS = {
+    "family": "family",
+    "fontfamily": "family",
+    "fontname": "family",
+    "name": "family",
+    "size": "size",
+    "fontsize": "size",
+    "weight": "weight",
+    "fontweight": "weight",
+    "style": "style",
+    "fontstyle": "style",
+    "variant": "variant",
+    "fontvariant": "variant",
+    "stretch": "stretch",
+    "fontstretch": "stretch",
+}
+"""Keyword arguments of matplotlib's `Text` that set font properties"""
+
+
+def font_properties(**kwargs) -> font_manager.FontProperties:
+    """Returns the font properties for keyword arguments of matplotlib's `Text` (e.g. the ones returned by `LabelStyle.matplot_kwargs`)"""
+    fp = kwargs.get("fontproperties") or kwargs.get("font_properties")
+    fp = font_manager.FontProperties(fp) if isinstance(fp, str) else fp
+    fp = fp.copy() if fp is not None else font_manager.FontProperties()
+
+    # like matplotlib, apply the properties in order, so later ones take precedence
+    for kwarg, value in kwargs.items():
+        if kwarg in FONT_KWARGS and value is not None:
+            getattr(fp, f"set_{FONT_KWARGS[kwarg]}")(value)
+
+    return fp
+
+
+class FontMetrics:
+    """Measures text in one font (at one size and resolution), without creating a matplotlib `Text` or using a renderer.
+
+    Lines of text are laid out by FreeType exactly as matplotlib's Agg renderer does, and the result is cached per line. The font's minimum ascent and descent (which matplotlib applies to every line of text) are measured once, from a probe text.
+
+    Args:
+        fp: Font properties
+        dpi: Resolution (dots per inch) of the figure
+    """
+
+    def __init__(self, fp: font_manager.FontProperties, dpi: float) -> None:
+        self.font_properties = fp
+        self.dpi = dpi
+        self._lines = {}
+        self._lock = RLock()
+        self.min_ascent, self.min_descent = self._measure_font()
+
+    def _measure_font(self) -> tuple[float, float]:
+        # the ink of a dash is smaller than the font's minimum ascent and descent,
+        # so the probe's extent is determined by the minimums alone
+        figure, renderer = _probe_figure(self.dpi)
+        probe = Text(0, 0, "-", fontproperties=self.font_properties)
+        probe.set_figure(figure)
+        probe.set_transform(IdentityTransform())
+        extent = probe.get_window_extent(renderer=renderer)
+        return extent.y1, -extent.y0
+
+    def line(self, text: str) -> tuple[float, float, float]:
+        """Returns the width, ascent and descent (in pixels) of a line of text"""
+        metrics = self._lines.get(text)
+
+        if metrics is None:
+            with self._lock:
+                font = font_manager.get_font(
+                    font_manager.findfont(self.font_properties)
+                )
+                font.clear()
+                font.set_size(self.font_properties.get_size_in_points(), self.dpi)
+                font.set_text(text, 0.0, flags=get_hinting_flag())
+                w, h = font.get_width_height()
+                d = font.get_descent()
+            metrics = (w / 64, (h - d) / 64, d / 64)
+            self._lines[text] = metrics
+
+        return metrics
+
+    def extent(self, text: str, ha: str = "left", va: str = "baseline") -> Bbox:
+        """Returns the extent (in pixels, relative to the text's position) of a line of text
+
+        Args:
+            text: Line of text
+            ha: Horizontal alignment: left, right, or center
+            va: Vertical alignment: baseline, top, bottom, or center
+
+        Returns:
+            Extent of the text
+        """
+        width, ascent, descent = self.line(text)
+        ascent = max(ascent, self.min_ascent)
+        descent = max(descent, self.min_descent)
+
+        if ha == "right":
+            x0 = -width
+        elif ha == "center":
+            x0 = -width / 2
+        else:
+            x0 = 0
+
+        if va == "top":
+            y0 = -(ascent + descent)
+        elif va == "bottom":
+            y0 = 0
+        elif va == "center":
+            y0 = -(ascent + descent) / 2
+        else:
+            y0 = -descent
+
+        return Bbox.from_bounds(x0, y0, width, ascent + descent)
+
+
+_probe_figures = {}
+
+
+def _probe_figure(dpi: float):
+    """Returns a figure (and its renderer) for measuring probe texts"""
+    if dpi not in _probe_figures:
+        figure = Figure(figsize=(1, 1), dpi=dpi)
+        _probe_figures[dpi] = (figure, FigureCanvasAgg(figure).get_renderer())
+
+    return _probe_figures[dpi]
+
+
+_metrics = {}
+_metrics_lock = RLock()
+
+
+def font_metrics(fp: font_manager.FontProperties, dpi: float) -> FontMetrics:
+    """Returns the (cached) metrics of a font, by its properties (family, size, weight, etc) and resolution"""
+    key = (hash(fp), dpi)
+    metrics = _metrics.get(key)
+    if metrics is None:
+        with _metrics_lock:
+            metrics = _metrics.get(key)
+            if metrics is None:
+                metrics = FontMetrics(fp.copy(), dpi)
+                _metrics[key] = metrics
+    return metrics
+
+
+def text_extent(x: float, y: float, text: str, dpi: float, **kwargs) -> Bbox:
+    """Estimates the extent of a text (in display coordinates), without creating a matplotlib `Text` or using a renderer.
+
+    Only single lines of unrotated plain text (no math text) with the default line spacing can be measured this way.
+
+    Args:
+        x: X coordinate (pixels) of the text's position
+        y: Y coordinate (pixels) of the text's position
+        text: Text
+        dpi: Resolution (dots per inch) of the figure
+        **kwargs: Keyword arguments that would be passed to matplotlib's `Text` (font properties and alignment)
+
+    Returns:
+        Extent of the text, or None if the text cannot be measured without a renderer
+    """
+    ha = kwargs.get("ha") or kwargs.get("horizontalalignment") or "left"
+    va = kwargs.get("va") or kwargs.get("verticalalignment") or "baseline"
+
+    if (
+        not text
+        or "\n" in text
+        or "$" in text
+        or kwargs.get("rotation")
+        or kwargs.get("usetex")
+        or kwargs.get("linespacing")
+        or kwargs.get("wrap")
+        or ha not in ("left", "right", "center")
+        or va not in ("baseline", "top", "bottom", "center")
+    ):
+        return None
+
+    metrics = font_metrics(font_properties(**kwargs), dpi)
+    return metrics.extent(text, ha, va).translated(x, y)
+
+
+GREEDY = "greedy"
+"""Value of a plot's `adjust_text` argument for the greedy label layout"""
+
+OFFSET_DIRECTIONS = [
+    (1, 0),  # right
+    (-1, 0),  # left
+    (0, 1),  # above
+    (0, -1),  # below
+    (1, 1),
+    (-1, 1),
+    (1, -1),
+    (-1, -1),
+]
+"""Directions of the positions tried by the greedy label layout, in order"""
+
+
+def label_offsets(extent, anchor: tuple, padding: float = None):
+    """Yields the candidate offsets (in pixels) of a label for the greedy label layout: first its original position, then positions around its anchor (see `OFFSET_DIRECTIONS`).
+
+    Args:
+        extent: Extent of the label at its original position
+        anchor: Position (in pixels) the label belongs to
+        padding: Space (in pixels) between the anchor and the moved label. Defaults to a quarter of the label's height.
+    """
+    x0, y0, x1, y1 = _bounds(extent)
+    width, height = x1 - x0, y1 - y0
+    ax, ay = anchor
+    padding = height / 4 if padding is None else padding
+
+    yield 0.0, 0.0
+
+    for dx, dy in OFFSET_DIRECTIONS:
+        if dx > 0:
+            left = ax + padding
+        elif dx < 0:
+            left = ax - padding - width
+        else:
+            left = ax - width / 2
+
+        if dy > 0:
+            bottom = ay + padding
+        elif dy < 0:
+            bottom = ay - padding - height
+        else:
+            bottom = ay - height / 2
+
+        yield left - x0, bottom - y0
+
+
+class LabelLayer(str, Enum):
+    """Layers of labels on a plot, for prioritizing labels (see [`LabelScheduler`][starplot.labels.LabelScheduler])"""
+
+    STAR = "star"
+    """Star names"""
+
+    BAYER = "bayer"
+    """Bayer designations of stars"""
+
+    CONSTELLATION = "constellation"
+    DSO = "dso"
+    PLANET = "planet"
+    MOON = "moon"
+    ECLIPTIC = "ecliptic"
+    CELESTIAL_EQUATOR = "celestial_equator"
+
+    OBJECT = "object"
+    """Labels of objects plotted with `plot_object`"""
+
+
+class LabelCandidate(NamedTuple):
+    """Label that may be plotted"""
+
+    layer: LabelLayer
+    rank: float
+    """Order of the label within its layer (lower values are placed first, e.g. magnitudes)"""
+
+    x: float
+    y: float
+    text: str
+    kwargs: dict
+    """Keyword arguments for matplotlib's `Text`"""
+
+
+class LabelScheduler:
+    """Places the labels of a plot in order of priority, until the plot has enough labels.
+
+    Plots collect the labels of all their layers (stars, constellations, DSOs, etc) before placing any of them. Labels are then placed in order of their layer's priority, and within each layer by rank (e.g. brighter stars first). Labels that collide with an already placed label are skipped (if `hide_colliding_labels` is True), so labels of higher priority always win.
+
+    Placing stops when the budget or coverage limit is reached, which bounds the time it takes to label dense fields.
+
+    Args:
+        priorities: Priority of each layer (lower values are placed first), which override the plot type's default priorities. Layers without a priority are placed last.
+        budget: Maximum number of labels to plot. If None, then there's no limit.
+        coverage: Maximum fraction (0 to 1) of the plot's area that can be covered by labels. If None, then there's no limit.
+    """
+
+    def __init__(
+        self,
+        priorities: dict[LabelLayer, int] = None,
+        budget: int = None,
+        coverage: float = None,
+    ) -> None:
+        self.priorities = dict(priorities or {})
+        self.budget = budget
+        self.coverage = coverage
+
+    def schedule(
+        self,
+        candidates: list[LabelCandidate],
+        place: Callable[[LabelCandidate], Bbox],
+        area: float,
+        priorities: dict[LabelLayer, int] = None,
+    ) -> list[LabelCandidate]:
+        """Places labels in order of priority.
+
+        Args:
+            candidates: Labels that may be plotted
+            place: Callable that plots a label, and returns its extent (or None if it was not plotted)
+            area: Area of the plot, in the same units as the extents
+            priorities: Default priority of each layer
+
+        Returns:
+            Labels that were plotted
+        """
+        priorities = {**(priorities or {}), **self.priorities}
+        order = sorted(
+            range(len(candidates)),
+            key=lambda i: (
+                priorities.get(candidates[i].layer, math.inf),
+                candidates[i].rank,
+                i,
+            ),
+        )
+
+        placed = []
+        covered = 0.0
+
+        for i in order:
+            if self.budget is not None and len(placed) >= self.budget:
+                break
+            if self.coverage is not None and covered >= self.coverage * area:
+                break
+
+            extent = place(candidates[i])
+            if extent is not None:
+                placed.append(candidates[i])
+                covered += extent.width * extent.height
+
+        return placed
+
+
+MAP_PRIORITIES = {
+    LabelLayer.CONSTELLATION: 0,
+    LabelLayer.STAR: 1,
+    LabelLayer.BAYER: 1,
+    LabelLayer.ECLIPTIC: 2,
+    LabelLayer.CELESTIAL_EQUATOR: 3,
+    LabelLayer.DSO: 4,
+    LabelLayer.PLANET: 5,
+    LabelLayer.MOON: 6,
+    LabelLayer.OBJECT: 7,
+}
+"""Default label priorities for map plots"""
+
+OPTIC_PRIORITIES = {
+    LabelLayer.STAR: 0,
+    LabelLayer.BAYER: 0,
+    LabelLayer.PLANET: 1,
+    LabelLayer.MOON: 2,
+    LabelLayer.OBJECT: 3,
+}
+"""Default label priorities for optic plots"""
+
+ZENITH_PRIORITIES = {
+    LabelLayer.STAR: 0,
+    LabelLayer.CONSTELLATION: 1,
+    LabelLayer.DSO: 2,
+    LabelLayer.PLANET: 3,
+    LabelLayer.MOON: 4,
+    LabelLayer.OBJECT: 5,
+}
+"""Default label priorities for zenith plots"""
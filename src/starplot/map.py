@@ -2,23 +2,32 @@ import datetime
 import warnings
 
 from enum import Enum
+from typing import Union
 
 from cartopy import crs as ccrs
 from matplotlib import pyplot as plt
-from matplotlib import patches
+from matplotlib.collections import LineCollection, PatchCollection
+from matplotlib.patches import PathPatch
+from matplotlib.path import Path
 from matplotlib.ticker import FuncFormatter, FixedLocator
-import geopandas as gpd
 import numpy as np
+import shapely
 
-from pyongc import ongc
-from skyfield.api import Star
-
-from starplot import geod
+from starplot import geod, sizes
 from starplot.base import StarPlot
-from starplot.data import load, DataFiles, bayer, constellations, stars, ecliptic, dsos
-from starplot.models import SkyObject
+from starplot.data import (
+    load,
+    DataFiles,
+    bayer,
+    constellations,
+    stars,
+    ecliptic,
+    dsos,
+    layers,
+)
+from starplot.labels import LabelLayer, LabelScheduler, MAP_PRIORITIES
 from starplot.styles import PlotStyle, PolygonStyle, MAP_BASE, MarkerSymbolEnum
-from starplot.utils import lon_to_ra, dec_str_to_float
+from starplot.utils import lon_to_ra
 
 # Silence noisy cartopy warnings
 warnings.filterwarnings("ignore", module="cartopy")
@@ -72,16 +81,24 @@ class MapPlot(StarPlot):
         style: Styling for the plot (colors, sizes, fonts, etc)
         resolution: Size (in pixels) of largest dimension of the map
         hide_colliding_labels: If True, then labels will not be plotted if they collide with another existing label
-        adjust_text: If True, then the labels will be adjusted to avoid overlapping
+        adjust_text: If True, then the labels will be adjusted to avoid overlapping (with adjustText). If "greedy", then labels that collide are moved to the first position around their anchor that is clear of other labels and star markers instead, which is much faster on busy plots. Plots with many labels (see `ADJUST_TEXT_MAX_LABELS`) always use the greedy layout when this is True.
         rasterize_stars: If True, then the stars will be rasterized when plotted, which can speed up exporting to SVG and reduce the file size but with a loss of image quality
         star_catalog: The catalog of stars to use: "hipparcos" or "tycho-1" -- Hipparcos is the default and has about 10x less stars than Tycho-1 but will also plot much faster
         dso_types: List of Deep Sky Objects (DSOs) types that will be plotted
+        star_sizes: Callable that maps star magnitudes to marker sizes and alphas (see [`MagnitudeScale`][starplot.sizes.MagnitudeScale]). If None, then the style's `star_sizes` is used, or the plot type's default scale if the style doesn't have one.
+        hide_labels_over_stars: If True, then labels will not be plotted if they collide with a star marker (other than the one they're labeling)
+        label_scheduler: Places the labels of all layers in order of priority, with an optional limit on the number of labels (see [`LabelScheduler`][starplot.labels.LabelScheduler]). If None, then all labels are placed in the plot type's default order.
+        dso_outlines: If True, then DSOs that have an outline in OpenNGC (mostly large nebulae) are plotted as their outline instead of an ellipse
+        astrometry: How to calculate the positions of stars: "full" uses skyfield's astrometric positions, and "fast" only applies proper motion (with NumPy), which is much faster for large catalogs. In "fast" mode, stars that are close enough for their parallax to be visible at the map's resolution and extent (more than half a pixel) still get full astrometric positions.
 
     Returns:
         MapPlot: A new instance of a MapPlot
 
     """
 
+    STAR_SIZES = sizes.MAP
+    LABEL_PRIORITIES = MAP_PRIORITIES
+
     def __init__(
         self,
         projection: Projection,
@@ -96,10 +113,15 @@ class MapPlot(StarPlot):
         style: PlotStyle = MAP_BASE,
         resolution: int = 2048,
         hide_colliding_labels: bool = True,
-        adjust_text: bool = False,
+        adjust_text: Union[bool, str] = False,
         rasterize_stars: bool = False,
         star_catalog: stars.StarCatalog = stars.StarCatalog.HIPPARCOS,
         dso_types: list[dsos.DsoType] = dsos.DEFAULT_DSO_TYPES,
+        star_sizes: sizes.StarSizer = None,
+        hide_labels_over_stars: bool = False,
+        label_scheduler: LabelScheduler = None,
+        dso_outlines: bool = False,
+        astrometry: stars.Astrometry = stars.Astrometry.FULL,
         *args,
         **kwargs,
     ) -> "MapPlot":
@@ -113,6 +135,9 @@ class MapPlot(StarPlot):
             hide_colliding_labels,
             adjust_text,
             rasterize_stars,
+            star_sizes,
+            hide_labels_over_stars,
+            label_scheduler,
             *args,
             **kwargs,
         )
@@ -129,7 +154,10 @@ class MapPlot(StarPlot):
         self.dec_max = dec_max
         self.star_catalog = star_catalog
         self.dso_types = dso_types
+        self.dso_outlines = dso_outlines
+        self.astrometry = astrometry
 
+        self._layers_plotted = 0
         self._geodetic = ccrs.Geodetic()
         self._plate_carree = ccrs.PlateCarree()
         self._crs = ccrs.CRS(
@@ -166,9 +194,31 @@ class MapPlot(StarPlot):
                 ra > self.ra_min or ra < self.ra_max - 24
             ) and self.dec_min < dec < self.dec_max
 
+    def in_bounds_many(self, ra, dec) -> np.ndarray:
+        """Determine which coordinates are within the bounds of the plot.
+
+        Args:
+            ra: Array of right ascensions
+            dec: Array of declinations
+
+        Returns:
+            Boolean array: True for each coordinate that is in bounds
+        """
+        ra, dec = np.asarray(ra), np.asarray(dec)
+
+        if self.ra_max < 24:
+            in_ra = (self.ra_min < ra) & (ra < self.ra_max)
+        else:
+            in_ra = (ra > self.ra_min) | (ra < self.ra_max - 24)
+
+        return in_ra & (self.dec_min < dec) & (dec < self.dec_max)
+
     def _plot_polygon(self, points, style, **kwargs):
         super()._plot_polygon(points, style, transform=self._crs)
 
+    def _plot_polygons(self, polygons, styles, **kwargs):
+        super()._plot_polygons(polygons, styles, transform=self._crs)
+
     def _latlon_bounds(self):
         # convert the RA/DEC bounds to lat/lon bounds
         return [
@@ -215,152 +265,96 @@ class MapPlot(StarPlot):
             self.ra_max = ra_max
             # print(f"[ {ra_min} , {ra_max} ]")
 
-    def _read_geo_package(self, filename: str):
-        """Returns GeoDataFrame of a GeoPackage file"""
-        extent = self.ax.get_extent(crs=self._plate_carree)
-        bbox = (extent[0], extent[2], extent[1], extent[3])
-
-        return gpd.read_file(
-            filename,
-            engine="pyogrio",
-            use_arrow=True,
-            bbox=bbox,
-        )
-
-    def _plot_dso_outlines_experimental(self):
-        extent = self.ax.get_extent(crs=self._crs)
-        bbox = (180 + extent[0], extent[2], 180 + extent[1], extent[3])
-        ongc = gpd.read_file(
-            DataFiles.ONGC.value,
-            engine="pyogrio",
-            use_arrow=True,
-            bbox=bbox,
-        )
-
-        dso_types = [dsos.ONGC_TYPE[dtype] for dtype in self.dso_types]
-        nearby_dsos = ongc[ongc["Type"].isin(dso_types)]
-
-        styles = {
-            # Star Clusters ----------
-            dsos.DsoType.OPEN_CLUSTER: self.style.dso_open_cluster,
-            dsos.DsoType.GLOBULAR_CLUSTER: self.style.dso_globular_cluster,
-            # Galaxies ----------
-            dsos.DsoType.GALAXY: self.style.dso_galaxy,
-            dsos.DsoType.GALAXY_PAIR: self.style.dso_galaxy,
-            dsos.DsoType.GALAXY_TRIPLET: self.style.dso_galaxy,
-            dsos.DsoType.GROUP_OF_GALAXIES: self.style.dso_galaxy,
-            # Nebulas ----------
-            dsos.DsoType.NEBULA: self.style.dso_nebula,
-            dsos.DsoType.PLANETARY_NEBULA: self.style.dso_nebula,
-            dsos.DsoType.EMISSION_NEBULA: self.style.dso_nebula,
-            dsos.DsoType.STAR_CLUSTER_NEBULA: self.style.dso_nebula,
-            dsos.DsoType.REFLECTION_NEBULA: self.style.dso_nebula,
-            # Stars ----------
-            dsos.DsoType.STAR: None,
-            dsos.DsoType.DOUBLE_STAR: self.style.dso_double_star,
-            dsos.DsoType.ASSOCIATION_OF_STARS: self.style.dso,
-            # Others (hidden by default style)
-            dsos.DsoType.DARK_NEBULA: self.style.dso_dark_nebula,
-            dsos.DsoType.HII_IONIZED_REGION: self.style.dso_hii_ionized_region,
-            dsos.DsoType.SUPERNOVA_REMNANT: self.style.dso_supernova_remnant,
-            dsos.DsoType.NOVA_STAR: self.style.dso_nova_star,
-            dsos.DsoType.NONEXISTENT: self.style.dso_nonexistant,
-            dsos.DsoType.UNKNOWN: self.style.dso_unknown,
-            dsos.DsoType.DUPLICATE_RECORD: self.style.dso_duplicate,
-        }
-        nearby_dsos = nearby_dsos.replace({np.nan: None})
-
-        for n, d in nearby_dsos.iterrows():
-            if d.ra_degrees is None or d.dec_degrees is None:
-                continue
-
-            ra = d.ra_degrees
-            dec = d.dec_degrees
-
-            name = d["Name"]
-            dso_type = dsos.ONGC_TYPE_MAP[d["Type"]]
-            style = styles.get(dso_type)
-            maj_ax, min_ax, angle = d.MajAx, d.MinAx, d.PosAng
-            legend_label = dsos.LEGEND_LABELS.get(dso_type) or dso_type
-            magnitude = d["V-Mag"] or d["B-Mag"] or None
-
-            if magnitude:
-                magnitude = float(magnitude)
-            else:
-                magnitude = None
-
-            if (
-                not style
-                or (magnitude is not None and magnitude > self.limiting_magnitude)
-                # or (not self.dso_plot_null_magnitudes and magnitude is None)
-            ):
-                continue
-
-            geometry_types = d["geometry"].geom_type
-
-            if "MultiPolygon" in geometry_types or "Polygon" in geometry_types:
-                gs = gpd.GeoSeries(d["geometry"])
-                gs.plot(
-                    ax=self.ax,
-                    facecolor=style.marker.color.as_hex(),
-                    edgecolor=style.marker.edge_color.as_hex(),
-                    alpha=style.marker.alpha,
-                    zorder=style.marker.zorder,
-                    transform=self._crs,
-                )
+    def _plot_geo_package(
+        self,
+        filename: str,
+        transform,
+        clip: bool = True,
+        lod: bool = False,
+        **kwargs,
+    ):
+        """Plots the features of a GeoPackage file that are in the plot's extent.
 
-            elif maj_ax and style.marker.visible:
-                # If object has a major axis then plot it's actual extent
-                x, y = self._proj.transform_point(ra, dec, self._crs)
-                maj_ax = geod.distance_m((maj_ax / 60) / 2)
+        Features are projected once per projection and extent (see `layers.load_projected`), and then plotted in the plot's native coordinates, clipped to the axes.
 
-                if min_ax:
-                    min_ax = geod.distance_m((min_ax / 60) / 2)
-                else:
-                    min_ax = maj_ax
+        Args:
+            filename: Path of the GeoPackage
+            transform: CRS of the GeoPackage's coordinates
+            clip: If True, then features are clipped to the extent before they're projected (see `layers.GeoLayer.query`)
+            lod: If True, then features are plotted at the coarsest level of detail that looks the same at the plot's resolution and extent (see `layers.lod_tolerance`)
+            **kwargs: Style of the features, as for `GeoSeries.plot`
+        """
+        filename = str(filename)
+        extent = self.ax.get_extent(crs=self._plate_carree)
+        bbox = (extent[0], extent[2], extent[1], extent[3])
 
-                if angle:
-                    angle = 180 - angle
+        tolerance = 0
+        if lod:
+            tolerance = layers.lod_tolerance(
+                max(bbox[2] - bbox[0], bbox[3] - bbox[1]), self.resolution
+            )
 
-                if style.marker.symbol == MarkerSymbolEnum.SQUARE:
-                    patch_class = patches.Rectangle
-                    xy = (x - min_ax, y - maj_ax)
-                    width = min_ax * 2
-                    height = maj_ax * 2
-                else:
-                    patch_class = patches.Ellipse
-                    xy = (x, y)
-                    width = maj_ax * 2
-                    height = min_ax * 2
-
-                fill = False if style.marker.fill == "none" else True
-                p = patch_class(
-                    xy,
-                    width=width,
-                    height=height,
-                    angle=angle or 0,
-                    facecolor=style.marker.color.as_hex(),
-                    edgecolor=style.marker.edge_color.as_hex(),
-                    alpha=style.marker.alpha,
-                    zorder=style.marker.zorder,
-                    fill=fill,
-                )
-                self.ax.add_patch(p)
+        # the full, unclipped features (as GeoPandas read them) decide the axes aspect below
+        features = layers.load(filename).query(bbox, clip=False)
 
-                if style.label.visible:
-                    self._plot_text(ra, dec, name)
+        if features.empty:
+            return
 
-            else:
-                # If no major axis, then just plot as a marker
-                obj = SkyObject(
-                    name=name,
-                    ra=ra / 15,
-                    dec=dec,
-                    style=style,
+        geometries = layers.load_projected(
+            filename, bbox, self._proj, transform, clip=clip, tolerance=tolerance
+        )
+        x_min, x_max = self.ax.get_xlim()
+        y_min, y_max = self.ax.get_ylim()
+        geometries = shapely.clip_by_rect(geometries, x_min, y_min, x_max, y_max)
+
+        self._plot_geometries(geometries[~shapely.is_empty(geometries)], **kwargs)
+
+        # GeoPandas sets this aspect when it plots geographic data, and then
+        # redraws the figure (which lays it out), so keep both to keep the maps' shapes
+        lat_min, lat_max = features.total_bounds[[1, 3]]
+        self.ax.set_aspect(1 / np.cos(np.radians((lat_min + lat_max) / 2)))
+        self._layers_plotted += 1
+
+    def _plot_geometries(self, geometries, color=None, **kwargs):
+        """Plots geometries (in the plot's native coordinates) with the same styling as `GeoSeries.plot`, but without redrawing the figure"""
+        parts = shapely.get_parts(geometries)
+        type_ids = shapely.get_type_id(parts)
+
+        polygons = parts[type_ids == shapely.GeometryType.POLYGON]
+        if len(polygons):
+            facecolor = kwargs.pop("facecolor", None)
+            if color is not None:
+                facecolor = color
+
+            paths = [
+                Path.make_compound_path(
+                    *[
+                        Path(shapely.get_coordinates(ring), closed=True)
+                        for ring in [polygon.exterior, *polygon.interiors]
+                    ]
                 )
-                self.plot_object(obj)
+                for polygon in polygons
+            ]
+            self.ax.add_collection(
+                PatchCollection(
+                    [PathPatch(path) for path in paths], facecolor=facecolor, **kwargs
+                ),
+                autolim=False,
+            )
 
-            self._add_legend_handle_marker(legend_label, style.marker)
+        lines = parts[
+            (type_ids == shapely.GeometryType.LINESTRING)
+            | (type_ids == shapely.GeometryType.LINEARRING)
+        ]
+        if len(lines):
+            self.ax.add_collection(
+                LineCollection(
+                    [shapely.get_coordinates(line) for line in lines],
+                    color=color,
+                    **kwargs,
+                ),
+                autolim=False,
+            )
 
     def _plot_constellation_lines(self):
         if not self.style.constellation.line.visible:
@@ -372,37 +366,27 @@ class MapPlot(StarPlot):
         else:
             transform = self._geodetic
 
-        constellation_lines = self._read_geo_package(
-            DataFiles.CONSTELLATION_LINES.value
-        )
-
-        if constellation_lines.empty:
-            return
-
-        constellation_lines.plot(
-            ax=self.ax,
+        # lines plotted along great circles are not clipped before they're projected, so they keep their shape
+        self._plot_geo_package(
+            DataFiles.CONSTELLATION_LINES.value,
+            transform,
+            clip=transform == self._plate_carree,
             **self.style.constellation.line.matplot_kwargs(
                 size_multiplier=self._size_multiplier
             ),
-            transform=transform,
         )
 
     def _plot_constellation_borders(self):
         if not self.style.constellation_borders.visible:
             return
-        constellation_borders = self._read_geo_package(
-            DataFiles.CONSTELLATION_BORDERS.value
-        )
-
-        if constellation_borders.empty:
-            return
 
-        constellation_borders.plot(
-            ax=self.ax,
+        self._plot_geo_package(
+            DataFiles.CONSTELLATION_BORDERS.value,
+            self._plate_carree,
+            lod=True,
             **self.style.constellation_borders.matplot_kwargs(
                 size_multiplier=self._size_multiplier
             ),
-            transform=self._plate_carree,
         )
 
     def _plot_constellation_labels(self):
@@ -411,83 +395,74 @@ class MapPlot(StarPlot):
         style = self.style.constellation.label.matplot_kwargs(
             size_multiplier=self._size_multiplier
         )
-        for con in constellations.iterator():
-            fullname, ra, dec = constellations.get(con)
-            if self.in_bounds(ra, dec):
-                self._plot_text(ra, dec, con.upper(), **style)
+        cons = list(constellations.iterator())
+        ras = [constellations.get(con)[1] for con in cons]
+        decs = [constellations.get(con)[2] for con in cons]
+
+        for con, ra, dec, in_bounds in zip(
+            cons, ras, decs, self.in_bounds_many(ras, decs)
+        ):
+            if in_bounds:
+                self._plot_text(ra, dec, con.upper(), LabelLayer.CONSTELLATION, **style)
 
     def _plot_milky_way(self):
         if not self.style.milky_way.visible:
             return
 
-        mw = self._read_geo_package(DataFiles.MILKY_WAY.value)
-
-        if mw.empty:
-            return
-
         style_kwargs = self.style.milky_way.matplot_kwargs(
             size_multiplier=self._size_multiplier
         )
         style_kwargs.pop("fill", None)
 
-        mw.plot(
-            ax=self.ax,
-            **style_kwargs,
-            transform=self._plate_carree,
+        self._plot_geo_package(
+            DataFiles.MILKY_WAY.value, self._plate_carree, lod=True, **style_kwargs
         )
 
     def _plot_stars(self):
-        stardata = stars.load(self.star_catalog)
-        eph = load(self.ephemeris)
-        earth = eph["earth"]
-
         ra_buffer = (self.ra_max - self.ra_min) / 4
         dec_buffer = (self.dec_max - self.dec_min) / 4
 
-        nearby_stars_df = stardata[
-            (stardata["magnitude"] <= self.limiting_magnitude)
-            & (stardata["dec_degrees"] < self.dec_max + dec_buffer)
-            & (stardata["dec_degrees"] > self.dec_min - dec_buffer)
-        ]
+        nearby_stars = stars.query_region(
+            ra_min=self.ra_min - ra_buffer,
+            ra_max=self.ra_max + ra_buffer,
+            dec_min=self.dec_min - dec_buffer,
+            dec_max=self.dec_max + dec_buffer,
+            mag=self.limiting_magnitude,
+            catalog=self.star_catalog,
+            as_table=True,
+        )
 
-        if self.ra_max < 24:
-            nearby_stars_df = nearby_stars_df[
-                (nearby_stars_df["ra_hours"] < self.ra_max + ra_buffer)
-                & (nearby_stars_df["ra_hours"] > self.ra_min - ra_buffer)
-            ]
-        else:
-            # handle wrapping
-            nearby_stars_df = nearby_stars_df[
-                (nearby_stars_df["ra_hours"] > self.ra_min - ra_buffer)
-                | (nearby_stars_df["ra_hours"] < self.ra_max - 24 + ra_buffer)
-            ]
+        if self.astrometry == stars.Astrometry.FAST:
+            stars_ra, stars_dec = stars.propagate(nearby_stars, self.timescale)
 
-        nearby_stars = Star.from_dataframe(nearby_stars_df)
-        astrometric = earth.at(self.timescale).observe(nearby_stars)
-        stars_ra, stars_dec, _ = astrometric.radec()
-
-        sizes = []
-        alphas = []
-
-        for m in nearby_stars_df["magnitude"]:
-            if m < 1.6:
-                sizes.append((9 - m) ** 2.85 * self._star_size_multiplier)
-                alphas.append(1)
-            elif m < 4.6:
-                sizes.append((8 - m) ** 2.92 * self._star_size_multiplier)
-                alphas.append(1)
-            elif m < 5.8:
-                sizes.append((9 - m) ** 2.46 * self._star_size_multiplier)
-                alphas.append(0.9)
-            else:
-                sizes.append(2.23 * self._star_size_multiplier)
-                alphas.append((16 - m) * 0.09)
+            # error budget: stars with visible parallax still get full positions
+            pixel_arcsec = (
+                max((self.ra_max - self.ra_min) * 15, self.dec_max - self.dec_min)
+                * 3600
+                / self.resolution
+            )
+            full = stars.astrometry_error(nearby_stars) > pixel_arcsec / 2
+        else:
+            stars_ra = np.empty(len(nearby_stars))
+            stars_dec = np.empty(len(nearby_stars))
+            full = np.ones(len(nearby_stars), dtype=bool)
+
+        if full.any():
+            earth = load(self.ephemeris)["earth"]
+            astrometric = earth.at(self.timescale).observe(nearby_stars[full].star())
+            ra, dec, _ = astrometric.radec()
+            stars_ra[full] = ra.hours
+            stars_dec[full] = dec.degrees
+
+        star_sizes, star_alphas = self.star_sizes(
+            nearby_stars.magnitude, self._star_size_multiplier
+        )
 
         # Plot Stars
         if self.style.star.marker.visible:
-            self.ax.scatter(
-                *self._prepare_coords(stars_ra.hours, stars_dec.degrees),
-                sizes,
+            self._plotted_stars = self.ax.scatter(
+                *self._prepare_coords(stars_ra, stars_dec),
+                star_sizes,
                 marker=self.style.star.marker.symbol,
                 zorder=self.style.star.marker.zorder,
                 color=self.style.star.marker.color.as_hex(),
@@ -495,33 +470,50 @@ class MapPlot(StarPlot):
                 if self.style.star.marker.edge_color
                 else "none",
                 rasterized=self.rasterize_stars,
-                alpha=alphas,
+                alpha=star_alphas,
                 **self._plot_kwargs(),
             )
             self._add_legend_handle_marker("Star", self.style.star.marker)
+            self._add_label_obstacles(self._plotted_stars)
 
         # Plot star labels (names and bayer designations)
-        stars_labeled = nearby_stars_df[
-            (nearby_stars_df["magnitude"] <= self.limiting_magnitude_labels)
+        stars_labeled = nearby_stars[
+            nearby_stars.magnitude <= self.limiting_magnitude_labels
         ]
 
-        stars_labeled.sort_values("magnitude")
-
-        for hip_id, s in stars_labeled.iterrows():
+        for hip_id, ra, dec, mag in zip(
+            stars_labeled.hip.tolist(),
+            stars_labeled.ra_hours.tolist(),
+            stars_labeled.dec_degrees.tolist(),
+            stars_labeled.magnitude.tolist(),
+        ):
             name = stars.hip_names.get(hip_id)
             bayer_desig = bayer.hip.get(hip_id)
-            ra, dec = s["ra_hours"], s["dec_degrees"]
 
             if name and self.style.star.label.visible:
                 style = self.style.star.label.matplot_kwargs(self._size_multiplier)
                 self._plot_text(
-                    ra - 0.01, dec - 0.12, name, ha="left", va="top", **style
+                    ra - 0.01,
+                    dec - 0.12,
+                    name,
+                    LabelLayer.STAR,
+                    rank=mag,
+                    ha="left",
+                    va="top",
+                    **style,
                 )
 
             if bayer_desig and self.style.bayer_labels.visible:
                 style = self.style.bayer_labels.matplot_kwargs(self._size_multiplier)
                 self._plot_text(
-                    ra + 0.01, dec, bayer_desig, ha="right", va="bottom", **style
+                    ra + 0.01,
+                    dec,
+                    bayer_desig,
+                    LabelLayer.BAYER,
+                    rank=mag,
+                    ha="right",
+                    va="bottom",
+                    **style,
                 )
 
     def _plot_ecliptic(self):
@@ -541,10 +533,11 @@ class MapPlot(StarPlot):
         )
 
         if self.style.ecliptic.label.visible:
-            inbounds = []
-            for ra, dec in ecliptic.RA_DECS:
-                if self.in_bounds(ra, dec):
-                    inbounds.append((ra, dec))
+            ras, decs = zip(*ecliptic.RA_DECS)
+            inbounds = [
+                ecliptic.RA_DECS[i]
+                for i in np.flatnonzero(self.in_bounds_many(ras, decs))
+            ]
 
             if len(inbounds) > 4:
                 label_spacing = int(len(inbounds) / 3) or 1
@@ -555,6 +548,7 @@ class MapPlot(StarPlot):
                         ra,
                         dec - 0.4,
                         "ECLIPTIC",
+                        LabelLayer.ECLIPTIC,
                         **self.style.ecliptic.label.matplot_kwargs(
                             self._size_multiplier
                         ),
@@ -578,7 +572,9 @@ class MapPlot(StarPlot):
 
             label_spacing = (self.ra_max - self.ra_min) / 3
             for ra in np.arange(self.ra_min, self.ra_max, label_spacing):
-                self._plot_text(ra, 0.25, "CELESTIAL EQUATOR", **style)
+                self._plot_text(
+                    ra, 0.25, "CELESTIAL EQUATOR", LabelLayer.CELESTIAL_EQUATOR, **style
+                )
 
     def _plot_gridlines(self):
         labels_visible = self.style.gridlines.label.visible
@@ -640,26 +636,14 @@ class MapPlot(StarPlot):
         )
 
     def _plot_dsos(self):
-        dso_types = [dsos.ONGC_TYPE[dtype] for dtype in self.dso_types]
-        base_kwargs = dict(
-            mindec=self.dec_min,
-            maxdec=self.dec_max,
-            type=dso_types,
+        nearby_dsos = dsos.query_region(
+            self.ra_min,
+            self.ra_max,
+            self.dec_min,
+            self.dec_max,
+            types=self.dso_types,
         )
 
-        if self.ra_max < 24:
-            nearby_dsos = ongc.listObjects(
-                minra=self.ra_min * 15,  # convert to degrees (0-360)
-                maxra=self.ra_max * 15,  # convert to degrees (0-360)
-                **base_kwargs,
-            )
-        else:
-            # handle wrapping
-            nearby_dsos = ongc.listObjects(minra=self.ra_min * 15, **base_kwargs)
-            nearby_dsos += ongc.listObjects(
-                maxra=(self.ra_max - 24) * 15, **base_kwargs
-            )
-
         styles = {
             # Star Clusters ----------
             dsos.DsoType.OPEN_CLUSTER: self.style.dso_open_cluster,
@@ -689,41 +673,61 @@ class MapPlot(StarPlot):
             dsos.DsoType.DUPLICATE_RECORD: self.style.dso_duplicate,
         }
 
-        for d in nearby_dsos:
-            if d.coords is None:
-                continue
-
-            ra = d.coords[0][0] + d.coords[0][1] / 60 + d.coords[0][2] / 3600
-            dec = dec_str_to_float(d.dec)
-            style = styles.get(d.type)
-            maj_ax, min_ax, angle = d.dimensions
-            legend_label = dsos.LEGEND_LABELS.get(d.type) or d.type
-
-            if (
-                not style
-                or (
-                    d.magnitudes[1] is not None
-                    and d.magnitudes[1] > self.limiting_magnitude
-                )
-                or (
-                    d.magnitudes[0] is not None
-                    and d.magnitudes[0] > self.limiting_magnitude
-                )
-                or (d.magnitudes[0] is None and "Nebula" in legend_label)
-            ):
-                # print(d.name)
-                continue
-
-            if maj_ax and style.marker.visible:
-                # If object has a major axis then plot it's actual extent
+        styled_types = [dso_type for dso_type, style in styles.items() if style]
+        nebula_types = [
+            dso_type
+            for dso_type in dsos.DsoType
+            if "Nebula" in (dsos.LEGEND_LABELS.get(dso_type) or dso_type)
+        ]
+        types = nearby_dsos["dso_type"]
+        magnitude_b = nearby_dsos["magnitude_b"].to_numpy()
+        magnitude_v = nearby_dsos["magnitude_v"].to_numpy()
+
+        nearby_dsos = nearby_dsos[
+            types.isin(styled_types).to_numpy()
+            & ~(magnitude_v > self.limiting_magnitude)
+            & ~(magnitude_b > self.limiting_magnitude)
+            & ~(np.isnan(magnitude_b) & types.isin(nebula_types).to_numpy())
+        ]
 
-                maj_ax_degrees = (maj_ax / 60) / 2
+        if self.dso_outlines:
+            outlines = dsos.query_outlines(
+                self.ra_min,
+                self.ra_max,
+                self.dec_min,
+                self.dec_max,
+                types=self.dso_types,
+            )
+            outlines = dict(zip(outlines["name"].tolist(), outlines.geometry))
+        else:
+            outlines = {}
+
+        # outlines and extents of DSOs, which are plotted all at once
+        polygons = []
+        polygon_styles = []
+        # extents: (center, height, width, angle, style)
+        rectangles = []
+        ellipses = []
+        # DSOs without an extent, which are plotted as markers all at once
+        markers = []
+
+        columns = [
+            "name",
+            "dso_type",
+            "ra_hours",
+            "dec_degrees",
+            "maj_ax",
+            "min_ax",
+            "angle",
+        ]
+        rows = zip(*(nearby_dsos[c].tolist() for c in columns))
 
-                if min_ax:
-                    min_ax_degrees = (min_ax / 60) / 2
-                else:
-                    min_ax_degrees = maj_ax_degrees
+        for i, (name, dso_type, ra, dec, maj_ax, min_ax, angle) in enumerate(rows):
+            style = styles[dso_type]
+            legend_label = dsos.LEGEND_LABELS.get(dso_type) or dso_type
+            outline = outlines.get(name)
 
+            if (outline is not None or maj_ax > 0) and style.marker.visible:
                 poly_style = PolygonStyle(
                     fill_color=style.marker.color.as_hex()
                     if style.marker.color
@@ -733,39 +737,72 @@ class MapPlot(StarPlot):
                     zorder=style.marker.zorder,
                 )
 
-                if style.marker.symbol == MarkerSymbolEnum.SQUARE:
-                    self.plot_rectangle(
-                        (ra, dec),
-                        min_ax_degrees * 2,
-                        maj_ax_degrees * 2,
-                        poly_style,
-                        angle or 0,
-                    )
+                if outline is not None:
+                    # If object has an outline then plot it instead of its extent
+                    for part in shapely.get_parts(outline):
+                        points = shapely.get_coordinates(part.exterior)
+                        # rings must be clockwise in RA/DEC (i.e. counter-clockwise
+                        # in the inverted CRS), or cartopy fills the outside
+                        if part.exterior.is_ccw:
+                            points = points[::-1]
+                        polygons.append(points)
+                        polygon_styles.append(poly_style)
+
                 else:
-                    self.plot_ellipse(
+                    # If object has a major axis then plot it's actual extent
+                    maj_ax_degrees = (maj_ax / 60) / 2
+
+                    if min_ax > 0:
+                        min_ax_degrees = (min_ax / 60) / 2
+                    else:
+                        min_ax_degrees = maj_ax_degrees
+
+                    shape = (
                         (ra, dec),
                         min_ax_degrees * 2,
                         maj_ax_degrees * 2,
+                        0 if np.isnan(angle) else angle,
                         poly_style,
-                        angle or 0,
                     )
+                    if style.marker.symbol == MarkerSymbolEnum.SQUARE:
+                        rectangles.append(shape)
+                    else:
+                        ellipses.append(shape)
 
                 if style.label.visible:
-                    self._plot_text(ra, dec, d.name)
+                    self._plot_text(ra, dec, name, LabelLayer.DSO, rank=i)
 
             else:
                 # If no major axis, then just plot as a marker
-                obj = SkyObject(
-                    name=d.name,
-                    ra=ra,
-                    dec=dec,
-                    style=style,
-                )
-                self.plot_object(obj)
+                markers.append((i, name, ra, dec, dso_type))
 
             self._add_legend_handle_marker(legend_label, style.marker)
 
+        if markers:
+            ranks, names, ras, decs, keys = zip(*markers)
+            self._plot_objects(
+                dict(name=names, ra=ras, dec=decs, style=keys),
+                styles,
+                layer=LabelLayer.DSO,
+                ranks=ranks,
+            )
+
+        for shapes, calc_points in [
+            (rectangles, geod.rectangles),
+            (ellipses, geod.ellipses),
+        ]:
+            if shapes:
+                centers, heights, widths, angles, shape_styles = zip(*shapes)
+                polygons.extend(calc_points(centers, heights, widths, angles))
+                polygon_styles.extend(shape_styles)
+
+        self._plot_polygons(polygons, polygon_styles)
+
     def _fit_to_ax(self) -> None:
+        # lay out the figure first, as GeoPandas did each time it plotted a layer (see `_plot_geo_package`)
+        for _ in range(self._layers_plotted):
+            self.fig.get_layout_engine().execute(self.fig)
+            self.ax.apply_aspect()
         bbox = self.ax.get_window_extent().transformed(
             self.fig.dpi_scale_trans.inverted()
         )
@@ -851,6 +888,8 @@ class MapPlot(StarPlot):
         self.ax.set_facecolor(self.style.background_color.as_hex())
         self._adjust_radec_minmax()
 
+        self._collect_labels()
+
         self._plot_gridlines()
         self._plot_tick_marks()
         self._plot_constellation_lines()
@@ -861,13 +900,13 @@ class MapPlot(StarPlot):
         self._plot_ecliptic()
         self._plot_celestial_equator()
         self._plot_dsos()
-        # self._plot_dso_outlines_experimental()
         self._plot_planets()
         self._plot_moon()
 
+        self._place_labels()
+
         self._fit_to_ax()
 
         self.refresh_legend()
 
-        if self.adjust_text:
-            self.adjust_labels()
+        self._adjust_labels()
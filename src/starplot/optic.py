@@ -1,14 +1,18 @@
 from datetime import datetime
+from typing import Union
 
 from cartopy import crs as ccrs
 from matplotlib import pyplot as plt
+import numpy as np
 from skyfield.api import Star, wgs84
 
+from starplot import sizes
 from starplot.base import StarPlot
 from starplot.data import load, stars, bayer
+from starplot.labels import LabelLayer, LabelScheduler, OPTIC_PRIORITIES
 from starplot.optics import Optic
 from starplot.styles import PlotStyle, OPTIC_BASE
-from starplot.utils import bv_to_hex_color, azimuth_to_string
+from starplot.utils import bv_to_hex_colors, azimuth_to_string
 
 import pandas as pd
 
@@ -32,10 +36,13 @@ class OpticPlot(StarPlot):
         style: Styling for the plot (colors, sizes, fonts, etc)
         resolution: Size (in pixels) of largest dimension of the map
         hide_colliding_labels: If True, then labels will not be plotted if they collide with another existing label
-        adjust_text: If True, then the labels will be adjusted to avoid overlapping
+        adjust_text: If True, then the labels will be adjusted to avoid overlapping (with adjustText). If "greedy", then labels that collide are moved to the first position around their anchor that is clear of other labels and star markers instead, which is much faster on busy plots. Plots with many labels (see `ADJUST_TEXT_MAX_LABELS`) always use the greedy layout when this is True.
         rasterize_stars: If True, then the stars will be rasterized when plotted, which can speed up exporting to SVG and reduce the file size but with a loss of image quality
         colorize_stars: If True, then stars will be filled with their BV color index
         raise_on_below_horizon: If True, then a ValueError will be raised if the target is below the horizon at the observing time/location
+        star_sizes: Callable that maps star magnitudes to marker sizes and alphas (see [`MagnitudeScale`][starplot.sizes.MagnitudeScale]). If None, then the style's `star_sizes` is used, or the plot type's default scale if the style doesn't have one.
+        hide_labels_over_stars: If True, then labels will not be plotted if they collide with a star marker (other than the one they're labeling)
+        label_scheduler: Places the labels of all layers in order of priority, with an optional limit on the number of labels (see [`LabelScheduler`][starplot.labels.LabelScheduler]). If None, then all labels are placed in the plot type's default order.
 
     Returns:
         OpticPlot: A new instance of a OpticPlot
@@ -43,6 +50,8 @@ class OpticPlot(StarPlot):
     """
 
     FIELD_OF_VIEW_MAX = 9.0
+    STAR_SIZES = sizes.OPTIC
+    LABEL_PRIORITIES = OPTIC_PRIORITIES
 
     def __init__(
         self,
@@ -59,10 +68,13 @@ class OpticPlot(StarPlot):
         style: PlotStyle = OPTIC_BASE,
         resolution: int = 2048,
         hide_colliding_labels: bool = True,
-        adjust_text: bool = False,
+        adjust_text: Union[bool, str] = False,
         rasterize_stars: bool = False,
         colorize_stars: bool = False,
         raise_on_below_horizon: bool = True,
+        star_sizes: sizes.StarSizer = None,
+        hide_labels_over_stars: bool = False,
+        label_scheduler: LabelScheduler = None,
         *args,
         **kwargs,
     ) -> "OpticPlot":
@@ -76,6 +88,9 @@ class OpticPlot(StarPlot):
             hide_colliding_labels,
             adjust_text,
             rasterize_stars,
+            star_sizes,
+            hide_labels_over_stars,
+            label_scheduler,
             *args,
             **kwargs,
         )
@@ -123,13 +138,42 @@ class OpticPlot(StarPlot):
         az, alt = self._prepare_coords(ra, dec)
         return self.in_bounds_altaz(alt, az)
 
+    def in_bounds_many(self, ra, dec) -> np.ndarray:
+        ra, dec = np.atleast_1d(ra).astype(float), np.atleast_1d(dec).astype(float)
+        if len(ra) == 0:
+            return np.zeros(0, dtype=bool)
+
+        az, alt = self._prepare_coords(ra, dec)
+        return self.in_bounds_altaz_many(alt, az)
+
     def in_bounds_altaz(self, alt, az, scale: float = 1) -> bool:
         x, y = self._proj.transform_point(az, alt, self._crs)
         return self.optic.in_bounds(x, y, scale)
 
+    def in_bounds_altaz_many(self, alt, az, scale: float = 1) -> np.ndarray:
+        """Determine which alt/az coordinates are within the bounds of the optic.
+
+        Args:
+            alt: Array of altitudes (degrees)
+            az: Array of azimuths (degrees)
+            scale: Scale of the optic's field of view
+
+        Returns:
+            Boolean array: True for each coordinate that is in bounds
+        """
+        alt, az = np.atleast_1d(alt), np.atleast_1d(az)
+        if len(alt) == 0:
+            return np.zeros(0, dtype=bool)
+
+        points = self._proj.transform_points(self._crs, az, alt)
+        return self.optic.in_bounds_many(points[:, 0], points[:, 1], scale)
+
     def _plot_polygon(self, points, style, **kwargs):
         super()._plot_polygon(points, style, transform=self._crs)
 
+    def _plot_polygons(self, polygons, styles, **kwargs):
+        super()._plot_polygons(polygons, styles, transform=self._crs)
+
     def _calc_position(self):
         eph = load(self.ephemeris)
         earth = eph["earth"]
@@ -146,89 +190,42 @@ class OpticPlot(StarPlot):
             raise ValueError("Target is below horizon at specified time/location.")
 
     def _plot_stars(self):
-        stardata = stars.load(stars.StarCatalog.TYCHO_1)
-        self._stardata = stardata
-
-        ra_min = self.ra - self.optic.true_fov / 15 * 1.08
-        ra_max = self.ra + self.optic.true_fov / 15 * 1.08
-
-        if self.dec > 70 or self.dec < -70:
-            # naive method of getting all the stars near the poles
-            ra_min = 0
-            ra_max = 24
-
-        nearby_stars_df = stardata[
-            (stardata["magnitude"] <= self.limiting_magnitude)
-            & (stardata["dec_degrees"] < self.dec + self.optic.true_fov / 2 * 1.03)
-            & (stardata["dec_degrees"] > self.dec - self.optic.true_fov / 2 * 1.03)
-        ]
-
-        if ra_max < 24:
-            nearby_stars_df = nearby_stars_df[
-                (nearby_stars_df["ra_hours"] < ra_max)
-                & (nearby_stars_df["ra_hours"] > ra_min)
-            ]
-        else:
-            # handle wrapping
-            nearby_stars_df = nearby_stars_df[
-                (nearby_stars_df["ra_hours"] > ra_min)
-                | (nearby_stars_df["ra_hours"] < ra_max - 24)
-            ]
-
-        x = []
-        y = []
-        sizes = []
-        alphas = []
-        colors = []
+        nearby_stars = stars.cone_search(
+            ra=self.ra,
+            dec=self.dec,
+            radius=self.optic.fov_radius * 1.03,
+            max_mag=self.limiting_magnitude,
+            catalog=stars.StarCatalog.TYCHO_1,
+            as_table=True,
+        )
 
         # calculate apparent position (alt/az) of stars
-        stars_apparent = self.observe(Star.from_dataframe(nearby_stars_df)).apparent()
+        stars_apparent = self.observe(nearby_stars.star()).apparent()
         nearby_stars_alt, nearby_stars_az, _ = stars_apparent.altaz()
-        nearby_stars_df["alt"], nearby_stars_df["az"] = (
-            nearby_stars_alt.degrees,
-            nearby_stars_az.degrees,
+        nearby_stars_alt = nearby_stars_alt.degrees
+        nearby_stars_az = nearby_stars_az.degrees
+
+        in_bounds = self.in_bounds_altaz_many(nearby_stars_alt, nearby_stars_az)
+
+        star_sizes, star_alphas = self.star_sizes(
+            nearby_stars.magnitude[in_bounds], self._star_size_multiplier
         )
 
-        for _, star in nearby_stars_df.iterrows():
-            m = star["magnitude"]
-            alt, az = star["alt"], star["az"]
-
-            if not self.in_bounds_altaz(alt, az):
-                continue
-
-            if m < 4.6:
-                sizes.append((9 - m) ** 3.76 * self._star_size_multiplier)
-                alphas.append(1)
-            # elif m < 4.6:
-            #     sizes.append((9 - m) ** 3.68 * self._size_multiplier)
-            #     alphas.append(1)
-            elif m < 5.85:
-                sizes.append((9 - m) ** 3.72 * self._star_size_multiplier)
-                alphas.append(0.94)
-            elif m < 9:
-                sizes.append((13 - m) ** 1.91 * self._star_size_multiplier)
-                alphas.append(0.88)
-            else:
-                sizes.append(4.93 * self._star_size_multiplier)
-                alphas.append((16 - m) * 0.09)
-
-            if self.colorize_stars:
-                c = bv_to_hex_color(star["bv"]) or self.style.star.marker.color.as_hex()
-            else:
-                c = self.style.star.marker.color.as_hex()
-
-            colors.append(c)
-            x.append(az)
-            y.append(alt)
+        if self.colorize_stars:
+            colors = bv_to_hex_colors(
+                nearby_stars.bv[in_bounds], self.style.star.marker.color.as_hex()
+            )
+        else:
+            colors = self.style.star.marker.color.as_hex()
 
         # Draw stars
         if self.style.star.marker.visible:
             self._plotted_stars = self.ax.scatter(
-                x,
-                y,
-                sizes,
+                nearby_stars_az[in_bounds],
+                nearby_stars_alt[in_bounds],
+                star_sizes,
                 colors,
-                alpha=alphas,
+                alpha=star_alphas,
                 marker=self.style.star.marker.symbol,
                 edgecolors=self.style.star.marker.edge_color.as_hex()
                 if self.style.star.marker.edge_color
@@ -241,30 +238,45 @@ class OpticPlot(StarPlot):
             self._plotted_stars.set_clip_on(True)
             self._plotted_stars.set_clip_path(self.background_patch)
             self._add_legend_handle_marker("Star", self.style.star.marker)
+            self._add_label_obstacles(self._plotted_stars)
 
         # Plot star labels (names and bayer designations)
-        stars_labeled = nearby_stars_df[
-            (nearby_stars_df["magnitude"] <= self.limiting_magnitude_labels)
+        labeled = np.flatnonzero(
+            nearby_stars.magnitude <= self.limiting_magnitude_labels
+        )
+        labeled = labeled[
+            self.in_bounds_altaz_many(
+                nearby_stars_alt[labeled], nearby_stars_az[labeled], scale=0.9
+            )
         ]
 
-        stars_labeled.sort_values("magnitude")
-
-        for hip_id, s in stars_labeled.iterrows():
+        for hip_id, ra, dec, mag in zip(
+            nearby_stars.hip[labeled].tolist(),
+            nearby_stars.ra_hours[labeled].tolist(),
+            nearby_stars.dec_degrees[labeled].tolist(),
+            nearby_stars.magnitude[labeled].tolist(),
+        ):
             name = stars.hip_names.get(hip_id)
             bayer_desig = bayer.hip.get(hip_id)
-            ra, dec = s["ra_hours"], s["dec_degrees"]
-            alt, az = s["alt"], s["az"]
-
-            if not self.in_bounds_altaz(alt, az, scale=0.9):
-                continue
 
             if name and self.style.star.label.visible:
                 style = self.style.star.label.matplot_kwargs(self._size_multiplier)
-                self._plot_text(ra, dec, name, ha="left", va="top", **style)
+                self._plot_text(
+                    ra, dec, name, LabelLayer.STAR, mag, ha="left", va="top", **style
+                )
 
             if bayer_desig and self.style.bayer_labels.visible:
                 style = self.style.bayer_labels.matplot_kwargs(self._size_multiplier)
-                self._plot_text(ra, dec, bayer_desig, ha="right", va="bottom", **style)
+                self._plot_text(
+                    ra,
+                    dec,
+                    bayer_desig,
+                    LabelLayer.BAYER,
+                    mag,
+                    ha="right",
+                    va="bottom",
+                    **style,
+                )
 
     def _plot_info(self):
         if not self.include_info_text:
@@ -380,11 +392,15 @@ class OpticPlot(StarPlot):
         self.ax.yaxis.set_visible(False)
         self.ax.axis("off")
 
+        self._collect_labels()
+
         self._plot_border()
         self._plot_stars()
         self._plot_planets()
         self._plot_moon()
 
+        self._place_labels()
+
         self._fit_to_ax()
 
         self.ax.set_xlim(-1.03 * self.optic.xlim, 1.03 * self.optic.xlim)
@@ -396,5 +412,4 @@ class OpticPlot(StarPlot):
 
         self.refresh_legend()
 
-        if self.adjust_text:
-            self.adjust_labels()
+        self._adjust_labels()
@@ -2,6 +2,7 @@ import math
 
 from abc import ABC, abstractmethod
 
+import numpy as np
 import pyproj
 
 from matplotlib import patches
@@ -40,10 +41,32 @@ class Optic(ABC):
     def transform(self, axis) -> None:
         pass
 
+    @property
+    def fov_radius(self) -> float:
+        """Radius (degrees) of the smallest circle that contains the optic's entire field of view"""
+        return self.true_fov / 2
+
     @abstractmethod
     def in_bounds(self, x, y, scale: float = 1) -> bool:
         pass
 
+    def in_bounds_many(self, x, y, scale: float = 1) -> np.ndarray:
+        """Determine which points (in the optic's projected coordinates) are within the optic's field of view.
+
+        Args:
+            x: Array of x coordinates
+            y: Array of y coordinates
+            scale: Scale of the field of view
+
+        Returns:
+            Boolean array: True for each point that is in bounds
+        """
+        # all points are checked at once against the optic's own patch, centered at the origin
+        patch = self.patch(0, 0)
+        path = patch.get_path().transformed(patch.get_patch_transform())
+        points = np.column_stack([np.asarray(x), np.asarray(y)]) / scale
+        return path.contains_points(points)
+
     def _compute_radius(self, radius_degrees: float, x: float = 0, y: float = 0):
         geod = pyproj.Geod("+a=6378137 +f=0.0", sphere=True)
         _, _, distance = geod.inv(x, y, x + radius_degrees, y)
@@ -106,6 +129,9 @@ class Scope(Optic):
     def in_bounds(self, x, y, scale: float = 1) -> bool:
         return in_circle(x, y, 0, 0, self.radius * scale)
 
+    def in_bounds_many(self, x, y, scale: float = 1) -> np.ndarray:
+        return in_circle(np.asarray(x), np.asarray(y), 0, 0, self.radius * scale)
+
 
 class Refractor(Scope):
     """Creates a new Refractor Telescope optic
@@ -204,6 +230,9 @@ class Binoculars(Optic):
     def in_bounds(self, x, y, scale: float = 1) -> bool:
         return in_circle(x, y, 0, 0, self.radius * scale)
 
+    def in_bounds_many(self, x, y, scale: float = 1) -> np.ndarray:
+        return in_circle(np.asarray(x), np.asarray(y), 0, 0, self.radius * scale)
+
 
 class Camera(Optic):
     """Creates a new Camera optic
@@ -272,6 +301,10 @@ class Camera(Optic):
     def label(self):
         return "Camera"
 
+    @property
+    def fov_radius(self) -> float:
+        return math.hypot(self.true_fov_x, self.true_fov_y) / 2
+
     def patch(self, center_x, center_y, **kwargs):
         padding = kwargs.pop("padding", 0)
         x = center_x - self.radius_x - padding
@@ -294,3 +327,14 @@ class Camera(Optic):
         in_bounds_x = px < self.radius_x * scale and px > -1 * self.radius_x * scale
         in_bounds_y = py < self.radius_y * scale and py > -1 * self.radius_y * scale
         return in_bounds_x and in_bounds_y
+
+    def in_bounds_many(self, x, y, scale: float = 1) -> np.ndarray:
+        radians = math.radians(180 - self.rotation)
+        x, y = np.asarray(x), np.asarray(y)
+
+        px = x * math.cos(radians) - y * math.sin(radians)
+        py = x * math.sin(radians) + y * math.cos(radians)
+
+        in_bounds_x = np.abs(px) < self.radius_x * scale
+        in_bounds_y = np.abs(py) < self.radius_y * scale
+        return in_bounds_x & in_bounds_y
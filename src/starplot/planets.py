@@ -1,10 +1,13 @@
+from datetime import datetime
 from enum import Enum
+from typing import Iterable, Union
 
 import numpy as np
-
-from skyfield.api import Angle
+from numpy.polynomial import chebyshev
+from skyfield.timelib import Time
 
 from starplot.data import load
+from starplot.data.cache import LRUCache
 
 
 class Planets(str, Enum):
@@ -34,25 +37,378 @@ https://science.nasa.gov/resource/solar-system-sizes/
 Retrieved on 28-Jan-2024
 """
 
+MOON = "moon"
 
-def get_planet_positions(timescale, ephemeris: str = "de421_2001.bsp") -> dict:
-    result = {}
+MOON_SIZE_KM = 1_737
+"""Radius of the moon (km), from NASA (same source as `PLANET_SIZE_KM`)"""
+
+POSITION_DTYPE = np.dtype(
+    [
+        ("name", "U7"),
+        ("ra", "f8"),
+        ("dec", "f8"),
+        ("distance_km", "f8"),
+        ("apparent_size", "f8"),
+    ]
+)
+"""Data type of solar system positions (see `positions`):
+
+- `name`: name of the body (a `Planets` value or `"moon"`)
+- `ra`: right ascension (hours)
+- `dec`: declination (degrees)
+- `distance_km`: distance from earth (km)
+- `apparent_size`: apparent (angular) diameter (degrees)
+"""
+
+
+def _bodies(eph) -> list:
+    """Returns (name, skyfield body, radius in km) of all planets and the moon, in the order of positions"""
+    bodies = [
+        (p.value, eph[f"{p.value} barycenter"], PLANET_SIZE_KM[p]) for p in Planets
+    ]
+    bodies.append((MOON, eph["moon"], MOON_SIZE_KM))
+    return bodies
+
+
+def _apparent_size(radius_km: float, distance_km: np.ndarray) -> np.ndarray:
+    # angular diameter:
+    # https://rhodesmill.org/skyfield/examples.html#what-is-the-angular-diameter-of-a-planet-given-its-radius
+    return np.degrees(np.arcsin(radius_km / distance_km) * 2.0)
+
+
+def positions(
+    t, ephemeris: str = "de421_2001.bsp", table: "PositionTable" = None
+) -> np.ndarray:
+    """Returns the astrometric positions of all planets and the moon, as seen from earth.
+
+    Earth's position is calculated once for all times, and each body is observed (with skyfield's light travel time correction) for all times at once. Bodies are observed one at a time, because each body's positions come from its own segments of the ephemeris, so the light travel time of each body needs its own evaluations of the ephemeris anyway.
+
+    Args:
+        t: Skyfield `Time`, which can be one time or an array of times
+        ephemeris: Ephemeris to use for calculating positions
+        table: If specified, then positions are looked up in this table (see `precompute`) instead of calculated from the ephemeris
+
+    Returns:
+        Structured array (see `POSITION_DTYPE`) with one row per body (the planets in the order of `Planets`, then the moon). If `t` is an array of times, then each row has a column per time.
+    """
+    if table is not None:
+        return table.positions(t)
 
     eph = load(ephemeris)
-    earth = eph["earth"]
+    earth = eph["earth"].at(t)
+    bodies = _bodies(eph)
 
-    for p in Planets:
-        planet = eph[f"{p.value} barycenter"]
-        astrometric = earth.at(timescale).observe(planet)
-        ra, dec, distance = astrometric.radec()
+    result = np.empty((len(bodies),) + np.shape(t.tt), dtype=POSITION_DTYPE)
 
-        # angular diameter:
-        # https://rhodesmill.org/skyfield/examples.html#what-is-the-angular-diameter-of-a-planet-given-its-radius
-        radius_km = PLANET_SIZE_KM[p]
-        apparent_diameter_degrees = Angle(
-            radians=np.arcsin(radius_km / distance.km) * 2.0
-        ).degrees
+    for i, (name, body, radius_km) in enumerate(bodies):
+        ra, dec, distance = earth.observe(body).radec()
 
-        result[p.value] = (ra.hours, dec.degrees, apparent_diameter_degrees)
+        result["name"][i] = name
+        result["ra"][i] = ra.hours
+        result["dec"][i] = dec.degrees
+        result["distance_km"][i] = distance.km
+        result["apparent_size"][i] = _apparent_size(radius_km, distance.km)
 
     return result
+
+
+TABLE_DEGREE = 12
+"""Degree of the Chebyshev series of position tables (see `precompute`)"""
+
+TABLE_MAX_SEGMENT_DAYS = 128
+"""Longest segment (days) of position tables"""
+
+
+class PositionTable:
+    """Tables of Chebyshev series of the positions of all planets and the moon, for looking up positions without an ephemeris (see `precompute`).
+
+    Each body's geocentric (astrometric) position vector is split into segments of equal length, and each coordinate of a segment is a Chebyshev series of degree `TABLE_DEGREE`. Looking up positions evaluates these series, which takes microseconds per time.
+
+    Args:
+        ephemeris: Ephemeris that the table was fitted to
+        start: Start of the table's span (TAI Julian date)
+        end: End of the table's span (TAI Julian date)
+        coefficients: Dictionary of body name to an array of Chebyshev coefficients (km), with shape (segments, 3, degree + 1)
+        errors: Dictionary of body name to the largest error (arcseconds) of the body's positions, measured against the ephemeris when the table was fitted
+    """
+
+    def __init__(
+        self,
+        ephemeris: str,
+        start: float,
+        end: float,
+        coefficients: dict,
+        errors: dict,
+    ) -> None:
+        self.ephemeris = ephemeris
+        self.start = start
+        self.end = end
+        self.coefficients = coefficients
+        self.errors = errors
+
+    def positions(self, t) -> np.ndarray:
+        """Returns the positions of all planets and the moon (as for `positions`).
+
+        Args:
+            t: Skyfield `Time`, which can be one time or an array of times (in the table's span)
+
+        Returns:
+            Structured array (see `POSITION_DTYPE`) with one row per body. If `t` is an array of times, then each row has a column per time.
+        """
+        jd = np.asarray(t.tai, dtype=np.float64)
+        if jd.min() < self.start or jd.max() > self.end:
+            raise ValueError(
+                f"Times are outside of the span of the position table (TAI Julian dates {self.start} to {self.end})"
+            )
+
+        names = [p.value for p in Planets] + [MOON]
+        radii = [PLANET_SIZE_KM[p] for p in Planets] + [MOON_SIZE_KM]
+        result = np.empty((len(names),) + jd.shape, dtype=POSITION_DTYPE)
+
+        for i, (name, radius_km) in enumerate(zip(names, radii)):
+            x, y, z = _evaluate(
+                self.coefficients[name], self.start, self.end, jd.ravel()
+            )
+            distance_km = np.sqrt(x * x + y * y + z * z)
+
+            result["name"][i] = name
+            result["ra"][i] = (np.degrees(np.arctan2(y, x)) / 15 % 24).reshape(jd.shape)
+            result["dec"][i] = np.degrees(np.arctan2(z, np.hypot(x, y))).reshape(
+                jd.shape
+            )
+            result["distance_km"][i] = distance_km.reshape(jd.shape)
+            result["apparent_size"][i] = _apparent_size(radius_km, distance_km).reshape(
+                jd.shape
+            )
+
+        return result
+
+    def save(self, filename: str) -> None:
+        """Saves the table to a (compressed) NumPy file.
+
+        Args:
+            filename: Path of the file (`.npz`)
+        """
+        names = list(self.coefficients)
+        np.savez_compressed(
+            filename,
+            ephemeris=self.ephemeris,
+            span=np.array([self.start, self.end]),
+            names=np.array(names),
+            errors=np.array([self.errors[name] for name in names]),
+            **{f"coefficients_{name}": self.coefficients[name] for name in names},
+        )
+
+    @classmethod
+    def load(cls, filename: str) -> "PositionTable":
+        """Loads a table that was saved with `save`.
+
+        Args:
+            filename: Path of the file (`.npz`)
+
+        Returns:
+            PositionTable of the file
+        """
+        with np.load(filename) as data:
+            names = data["names"].tolist()
+            start, end = data["span"].tolist()
+            return cls(
+                ephemeris=str(data["ephemeris"]),
+                start=start,
+                end=end,
+                coefficients={name: data[f"coefficients_{name}"] for name in names},
+                errors=dict(zip(names, data["errors"].tolist())),
+            )
+
+
+def _evaluate(coefficients: np.ndarray, start: float, end: float, jd: np.ndarray):
+    """Evaluates the Chebyshev segments of one body at TAI Julian dates, and returns (x, y, z)"""
+    n = len(coefficients)
+    segment_days = (end - start) / n
+    i = np.clip(((jd - start) // segment_days).astype(np.int64), 0, n - 1)
+    x = 2 * (jd - start - i * segment_days) / segment_days - 1
+    return chebyshev.chebval(x, coefficients[i].transpose(2, 1, 0), tensor=False)
+
+
+def _separation_arcsec(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Returns the angle (arcseconds) between arrays of vectors (along the first axis)"""
+    a = a / np.linalg.norm(a, axis=0)
+    b = b / np.linalg.norm(b, axis=0)
+    chord = np.linalg.norm(a - b, axis=0)
+    return np.degrees(2 * np.arcsin(chord / 2)) * 3600
+
+
+def precompute(
+    filename: str = None,
+    ephemeris: str = "de421_2001.bsp",
+    tolerance: float = 1.0,
+    start: Time = None,
+    end: Time = None,
+) -> PositionTable:
+    """Fits tables of the positions of all planets and the moon (see `PositionTable`), so positions can be looked up later without an ephemeris.
+
+    Each body's table starts with segments of `TABLE_MAX_SEGMENT_DAYS`, which are halved until the table is within half of `tolerance` of the ephemeris at check points between the fitted points of every segment (including the ends of segments, where the error of Chebyshev series is largest). The largest error at the check points of each body is kept in `PositionTable.errors`. Errors between check points are slightly larger (about 10% for `de421_2001.bsp`), so positions looked up in the table are within `tolerance` of the ephemeris.
+
+    Fitting the full span of `de421_2001.bsp` (1899 to 2053) at the default tolerance takes about 5 seconds, and makes a file of about 3.5 MB (a third of which is the moon's table).
+
+    Args:
+        filename: If specified, then the table is saved to this path (`.npz`)
+        ephemeris: Ephemeris to fit the table to
+        tolerance: Largest error (arcseconds) of the positions of the table
+        start: Start of the table's span. If None, then the table starts at the start of the ephemeris.
+        end: End of the table's span. If None, then the table ends at the end of the ephemeris.
+
+    Returns:
+        PositionTable of the positions
+    """
+    eph = load(ephemeris)
+    ts = load.timescale()
+
+    # keep a day from the ends of the ephemeris, for the light travel time of observations
+    start_jd = (
+        start.tai
+        if start is not None
+        else max(s.spk_segment.start_jd for s in eph.segments) + 1
+    )
+    end_jd = (
+        end.tai
+        if end is not None
+        else min(s.spk_segment.end_jd for s in eph.segments) - 1
+    )
+
+    earth = eph["earth"]
+    degree = TABLE_DEGREE
+    nodes = np.cos(np.pi * (np.arange(degree + 1) + 0.5) / (degree + 1))
+    checks = np.linspace(-1, 1, 2 * (degree + 1) + 1)
+
+    def observe(body, n: int, x: np.ndarray) -> np.ndarray:
+        # positions (km) at points x (in [-1, 1]) of n segments, with shape (3, n, len(x))
+        segment_days = (end_jd - start_jd) / n
+        jd = start_jd + segment_days * (np.arange(n)[:, None] + (x[None, :] + 1) / 2)
+        km = earth.at(ts.tai_jd(jd.ravel())).observe(body).position.km
+        return km.reshape(3, n, len(x))
+
+    coefficients = {}
+    errors = {}
+
+    for name, body, _ in _bodies(eph):
+        n = max(1, int(np.ceil((end_jd - start_jd) / TABLE_MAX_SEGMENT_DAYS)))
+
+        while True:
+            fitted = chebyshev.chebfit(
+                nodes,
+                observe(body, n, nodes).transpose(2, 0, 1).reshape(degree + 1, -1),
+                degree,
+            )
+            fitted = fitted.reshape(degree + 1, 3, n).transpose(2, 1, 0)
+
+            expected = observe(body, n, checks)
+            actual = np.stack(
+                [
+                    chebyshev.chebval(checks, fitted[:, k, :].T, tensor=True)
+                    for k in range(3)
+                ]
+            )
+            error = float(_separation_arcsec(actual, expected).max())
+
+            if error <= tolerance / 2:
+                break
+            n *= 2
+
+        coefficients[name] = fitted
+        errors[name] = error
+
+    table = PositionTable(ephemeris, start_jd, end_jd, coefficients, errors)
+
+    if filename:
+        table.save(filename)
+
+    return table
+
+
+TIME_BUCKET_SECONDS = 1
+"""Resolution (seconds) of cached positions (see `positions_over`): times are rounded to a multiple of this before positions are calculated"""
+
+POSITIONS_CACHE_MAX_BYTES = 16 * 1024**2
+"""Memory budget (in bytes) of the cache of positions"""
+
+_cache = LRUCache(POSITIONS_CACHE_MAX_BYTES, lambda positions: positions.nbytes)
+
+
+def cached_positions(
+    t: Union[Time, Iterable[datetime]], ephemeris: str = "de421_2001.bsp"
+) -> np.ndarray:
+    """Returns the positions of all planets and the moon (as for `positions`), calculating only the times that aren't cached yet.
+
+    Positions are cached in memory by ephemeris and time (rounded to `TIME_BUCKET_SECONDS`), up to `POSITIONS_CACHE_MAX_BYTES`.
+
+    Args:
+        t: Skyfield `Time` (one time or an array of times), or an iterable of timezone-aware datetimes
+        ephemeris: Ephemeris to use for calculating positions
+
+    Returns:
+        Structured array (see `POSITION_DTYPE`) with one row per body and a column per time (even if `t` is one time)
+    """
+    ts = load.timescale()
+    if not isinstance(t, Time):
+        t = ts.from_datetimes(list(t))
+
+    # TAI is offset from UTC by whole seconds, so whole UTC seconds aren't rounded
+    buckets = np.rint(np.atleast_1d(t.tai) * (86_400 / TIME_BUCKET_SECONDS)).astype(
+        np.int64
+    )
+
+    found = {}
+    for bucket in np.unique(buckets).tolist():
+        column = _cache.get((ephemeris, bucket))
+        if column is not None:
+            found[bucket] = column
+
+    missing = [b for b in np.unique(buckets).tolist() if b not in found]
+    if missing:
+        jd = np.array(missing, dtype=np.float64) * (TIME_BUCKET_SECONDS / 86_400)
+        calculated = positions(ts.tai_jd(jd), ephemeris)
+        for i, bucket in enumerate(missing):
+            found[bucket] = calculated[:, i].copy()
+            _cache.put((ephemeris, bucket), found[bucket])
+
+    return np.stack([found[bucket] for bucket in buckets.tolist()], axis=1)
+
+
+def positions_over(
+    times: Union[Time, Iterable[datetime]], ephemeris: str = "de421_2001.bsp"
+) -> dict:
+    """Returns the positions of all planets and the moon over a series of times (e.g. every night of a year, for animations).
+
+    Positions are calculated for all times at once (see `positions`), and cached in memory (see `cached_positions`), so plots of those times reuse them.
+
+    Args:
+        times: Skyfield `Time` (one time or an array of times), or an iterable of timezone-aware datetimes (e.g. a pandas `date_range`)
+        ephemeris: Ephemeris to use for calculating positions
+
+    Returns:
+        Dictionary of body name (a `Planets` value or `"moon"`) to a structured array (see `POSITION_DTYPE`) with one element per time
+    """
+    result = cached_positions(times, ephemeris)
+    return {str(name): result[i] for i, name in enumerate(result["name"][:, 0])}
+
+
+def get_planet_positions(timescale, ephemeris: str = "de421_2001.bsp") -> dict:
+    """Returns the positions of the planets at a time (see `positions`).
+
+    Args:
+        timescale: Skyfield `Time`
+        ephemeris: Ephemeris to use for calculating positions
+
+    Returns:
+        Dictionary of planet name to (ra, dec, apparent diameter in degrees)
+    """
+    return {
+        str(row["name"]): (
+            float(row["ra"]),
+            float(row["dec"]),
+            float(row["apparent_size"]),
+        )
+        for row in positions(timescale, ephemeris)
+        if row["name"] != MOON
+    }
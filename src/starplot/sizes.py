@@ -0,0 +1,105 @@
+"""Marker sizes and alphas of stars, by magnitude"""
+
+from typing import Callable, NamedTuple
+
+import numpy as np
+
+
+class MagnitudeTier(NamedTuple):
+    """Sizing of stars that are brighter than a magnitude"""
+
+    magnitude: float
+    """Tier applies to stars with a magnitude less than this value (and not in a brighter tier)"""
+
+    base: float
+    """Size of a star with magnitude `m` = `(base - m) ** exponent`"""
+
+    exponent: float
+    """Exponent of the size"""
+
+    alpha: float = 1.0
+    """Alpha of the star markers"""
+
+
+class MagnitudeScale:
+    """Maps star magnitudes to marker sizes and alphas, for many stars at once.
+
+    Stars are sized by the first tier they're brighter than. Stars that are fainter than all tiers get a fixed size, and an alpha that fades with magnitude: `(16 - m) * 0.09` (unless `faint_alpha` is specified).
+
+    Any callable with the same signature as `MagnitudeScale.__call__` can be used in place of a scale (see the `star_sizes` argument of each plot type).
+
+    Args:
+        tiers: Tiers, ordered from brightest to faintest
+        faint_size: Size of stars fainter than all tiers
+        faint_alpha: Alpha of stars fainter than all tiers. If None, then it fades with magnitude.
+    """
+
+    def __init__(
+        self, tiers: list[MagnitudeTier], faint_size: float, faint_alpha: float = None
+    ) -> None:
+        self.tiers = list(tiers)
+        self.faint_size = faint_size
+        self.faint_alpha = faint_alpha
+
+    def __call__(
+        self, magnitudes: np.ndarray, size_multiplier: float = 1.0
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Returns the marker sizes and alphas of stars.
+
+        Args:
+            magnitudes: Array of magnitudes
+            size_multiplier: Multiplier for all sizes
+
+        Returns:
+            Tuple of arrays: (sizes, alphas)
+        """
+        m = np.asarray(magnitudes, dtype=np.float64)
+
+        sizes = np.full(m.shape, float(self.faint_size))
+        if self.faint_alpha is None:
+            alphas = (16 - m) * 0.09
+        else:
+            alphas = np.full(m.shape, float(self.faint_alpha))
+
+        # assign tiers from faintest to brightest, so brighter tiers take precedence
+        for tier in reversed(self.tiers):
+            in_tier = m < tier.magnitude
+            sizes[in_tier] = (tier.base - m[in_tier]) ** tier.exponent
+            alphas[in_tier] = tier.alpha
+
+        return sizes * size_multiplier, alphas
+
+
+StarSizer = Callable[[np.ndarray, float], tuple[np.ndarray, np.ndarray]]
+"""Type of callables that map star magnitudes (and a size multiplier) to marker sizes and alphas"""
+
+
+MAP = MagnitudeScale(
+    tiers=[
+        MagnitudeTier(1.6, base=9, exponent=2.85),
+        MagnitudeTier(4.6, base=8, exponent=2.92),
+        MagnitudeTier(5.8, base=9, exponent=2.46, alpha=0.9),
+    ],
+    faint_size=2.23,
+)
+"""Default scale for map plots"""
+
+OPTIC = MagnitudeScale(
+    tiers=[
+        MagnitudeTier(4.6, base=9, exponent=3.76),
+        MagnitudeTier(5.85, base=9, exponent=3.72, alpha=0.94),
+        MagnitudeTier(9, base=13, exponent=1.91, alpha=0.88),
+    ],
+    faint_size=4.93,
+)
+"""Default scale for optic plots"""
+
+ZENITH = MagnitudeScale(
+    tiers=[
+        MagnitudeTier(2, base=8, exponent=2.56),
+        MagnitudeTier(8, base=8, exponent=1.68),
+    ],
+    faint_size=2,
+    faint_alpha=1.0,
+)
+"""Default scale for zenith plots (alphas are all 1, because zenith plots use the alpha of the star marker style)"""
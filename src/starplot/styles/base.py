@@ -10,6 +10,8 @@ from pydantic.color import Color
 from pydantic.functional_serializers import PlainSerializer
 from typing_extensions import Annotated
 
+from starplot import sizes
+
 
 ColorStr = Annotated[
     Color,
@@ -368,6 +370,45 @@ class PathStyle(BaseStyle):
     """Style for the path's label (see [LabelStyle][starplot.styles.LabelStyle])"""
 
 
+class MagnitudeTierStyle(BaseStyle):
+    """Defines the sizing of stars that are brighter than a magnitude (see [MagnitudeTier][starplot.sizes.MagnitudeTier])"""
+
+    magnitude: float
+    """Tier applies to stars with a magnitude less than this value (and not in a brighter tier)"""
+
+    base: float
+    """Size of a star with magnitude `m` = `(base - m) ** exponent`"""
+
+    exponent: float
+    """Exponent of the size"""
+
+    alpha: float = 1.0
+    """Alpha of the star markers"""
+
+
+class StarSizeStyle(BaseStyle):
+    """Defines the marker sizes and alphas of stars, by magnitude (see [MagnitudeScale][starplot.sizes.MagnitudeScale])"""
+
+    tiers: list[MagnitudeTierStyle]
+    """Tiers, ordered from brightest to faintest"""
+
+    faint_size: float
+    """Size of stars fainter than all tiers"""
+
+    faint_alpha: Optional[float] = None
+    """Alpha of stars fainter than all tiers. If None, then it fades with magnitude."""
+
+    def scale(self) -> sizes.MagnitudeScale:
+        return sizes.MagnitudeScale(
+            tiers=[
+                sizes.MagnitudeTier(t.magnitude, t.base, t.exponent, t.alpha)
+                for t in self.tiers
+            ],
+            faint_size=self.faint_size,
+            faint_alpha=self.faint_alpha,
+        )
+
+
 class LegendStyle(BaseStyle):
     """Defines the style for the map legend. *Only applies to map plots.*"""
 
@@ -453,6 +494,9 @@ class PlotStyle(BaseStyle):
     )
     """Styling for stars *(see [`ObjectStyle`][starplot.styles.ObjectStyle])*"""
 
+    star_sizes: Optional[StarSizeStyle] = None
+    """Marker sizes and alphas of stars, by magnitude *(see [`StarSizeStyle`][starplot.styles.StarSizeStyle])*. If None, then the plot type's default scale is used. The `star_sizes` argument of a plot takes precedence over this."""
+
     bayer_labels: LabelStyle = LabelStyle(
         font_size=8, font_weight=FontWeightEnum.LIGHT, zorder=1
     )
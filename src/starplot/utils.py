@@ -1,5 +1,6 @@
 import math
 
+import numpy as np
 from matplotlib.transforms import Bbox
 
 
@@ -63,70 +64,91 @@ def dec_str_to_float(dec_str):
     return round(dec_f, 6)
 
 
+BV_COLORS = [
+    "#9bb2ff",
+    "#9eb5ff",
+    "#a3b9ff",
+    "#aabfff",
+    "#b2c5ff",
+    "#bbccff",
+    "#c4d2ff",
+    "#ccd8ff",
+    "#d3ddff",
+    "#dae2ff",
+    "#dfe5ff",
+    "#e4e9ff",
+    "#e9ecff",
+    "#eeefff",
+    "#f3f2ff",
+    "#f8f6ff",
+    "#fef9ff",
+    "#fff9fb",
+    "#fff7f5",
+    "#fff5ef",
+    "#fff3ea",
+    "#fff1e5",
+    "#ffefe0",
+    "#ffeddb",
+    "#ffebd6",
+    "#ffe9d2",
+    "#ffe8ce",
+    "#ffe6ca",
+    "#ffe5c6",
+    "#ffe3c3",
+    "#ffe2bf",
+    "#ffe0bb",
+    "#ffdfb8",
+    "#ffddb4",
+    "#ffdbb0",
+    "#ffdaad",
+    "#ffd8a9",
+    "#ffd6a5",
+    "#ffd5a1",
+    "#ffd29c",
+    "#ffd096",
+    "#ffcc8f",
+    "#ffc885",
+    "#ffc178",
+    "#ffb765",
+    "#ffa94b",
+    "#ff9523",
+    "#ff7b00",
+    "#ff5200",
+]
+"""
+List of BV colors from -0.40 -> 2.00 (with 0.05 increments)
+source: http://www.vendian.org/mncharity/dir3/starcolor/details.html
+"""
+
+
 def bv_to_hex_color(bv_index):
     """
-    Returns hex color for a BV Index
-
-    List of BV colors from -0.40 -> 2.00 (with 0.05 increments)
-    source: http://www.vendian.org/mncharity/dir3/starcolor/details.html
+    Returns hex color for a BV Index (see `BV_COLORS`)
     """
-    bv_colors = [
-        "#9bb2ff",
-        "#9eb5ff",
-        "#a3b9ff",
-        "#aabfff",
-        "#b2c5ff",
-        "#bbccff",
-        "#c4d2ff",
-        "#ccd8ff",
-        "#d3ddff",
-        "#dae2ff",
-        "#dfe5ff",
-        "#e4e9ff",
-        "#e9ecff",
-        "#eeefff",
-        "#f3f2ff",
-        "#f8f6ff",
-        "#fef9ff",
-        "#fff9fb",
-        "#fff7f5",
-        "#fff5ef",
-        "#fff3ea",
-        "#fff1e5",
-        "#ffefe0",
-        "#ffeddb",
-        "#ffebd6",
-        "#ffe9d2",
-        "#ffe8ce",
-        "#ffe6ca",
-        "#ffe5c6",
-        "#ffe3c3",
-        "#ffe2bf",
-        "#ffe0bb",
-        "#ffdfb8",
-        "#ffddb4",
-        "#ffdbb0",
-        "#ffdaad",
-        "#ffd8a9",
-        "#ffd6a5",
-        "#ffd5a1",
-        "#ffd29c",
-        "#ffd096",
-        "#ffcc8f",
-        "#ffc885",
-        "#ffc178",
-        "#ffb765",
-        "#ffa94b",
-        "#ff9523",
-        "#ff7b00",
-        "#ff5200",
-    ]
     color_index = round((bv_index + 0.4) / 0.05)
 
-    if color_index < 0 or color_index > len(bv_colors) - 1:
+    if color_index < 0 or color_index > len(BV_COLORS) - 1:
         return None
 
-    return bv_colors[color_index]
+    return BV_COLORS[color_index]
+
+
+def bv_to_hex_colors(bv_indexes, default: str = None) -> np.ndarray:
+    """
+    Returns an array of hex colors for an array of BV Indexes (see `bv_to_hex_color`)
+
+    BV indexes that are missing or out of range get the default color
+    """
+    bv_indexes = np.asarray(bv_indexes, dtype=np.float64)
+    colors = np.array(BV_COLORS + [default], dtype=object)
+
+    with np.errstate(invalid="ignore"):
+        color_index = np.round((bv_indexes + 0.4) / 0.05)
+
+    out_of_range = ~((color_index >= 0) & (color_index <= len(BV_COLORS) - 1))
+    color_index[out_of_range] = len(BV_COLORS)
+
+    return colors[color_index.astype(int)]
 
 
 def azimuth_to_string(azimuth_degrees: int):
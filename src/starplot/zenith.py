@@ -1,41 +1,39 @@
 from datetime import datetime
+from typing import Union
 
 from matplotlib import pyplot as plt
 from matplotlib.collections import LineCollection
 import numpy as np
 
-from skyfield.api import Star, wgs84
+from skyfield.api import wgs84
 from skyfield.positionlib import position_of_radec
 from skyfield.projections import build_stereographic_projection
 
+from starplot import sizes
 from starplot.base import StarPlot
 from starplot.data import load, constellations, stars, dsos, ecliptic
+from starplot.labels import LabelLayer, LabelScheduler, ZENITH_PRIORITIES
 from starplot.styles import PlotStyle, ZENITH_BASE
 from starplot.utils import in_circle
 
 
-def create_projected_constellation_lines(stardata_projected):
+def create_projected_constellation_lines(star_table, x, y):
     consdata = constellations.load()
     stars_1 = []
     stars_2 = []
     for _, lines in consdata:
-        any_star_in_view = False
-        constars_1 = []
-        constars_2 = []
-        for s1, s2 in lines:
-            sx1, sy1 = stardata_projected[["x", "y"]].loc[s1].values
-            sx2, sy2 = stardata_projected[["x", "y"]].loc[s2].values
-            if in_circle(sx1, sy1, radius=1.1) or in_circle(sx2, sy2, radius=1.1):
-                any_star_in_view = True
-            constars_1.append(s1)
-            constars_2.append(s2)
-
-        if any_star_in_view:
-            stars_1.extend(constars_1)
-            stars_2.extend(constars_2)
-
-    xy1 = stardata_projected[["x", "y"]].loc[stars_1].values
-    xy2 = stardata_projected[["x", "y"]].loc[stars_2].values
+        rows_1 = star_table.rows([s1 for s1, _ in lines])
+        rows_2 = star_table.rows([s2 for _, s2 in lines])
+        in_view = in_circle(x[rows_1], y[rows_1], radius=1.1) | in_circle(
+            x[rows_2], y[rows_2], radius=1.1
+        )
+        if in_view.any():
+            stars_1.append(rows_1)
+            stars_2.append(rows_2)
+
+    xy = np.column_stack([x, y])
+    xy1 = xy[np.concatenate(stars_1)] if stars_1 else np.empty((0, 2))
+    xy2 = xy[np.concatenate(stars_2)] if stars_2 else np.empty((0, 2))
 
     return np.rollaxis(np.array([xy1, xy2]), 1)
 
@@ -54,14 +52,20 @@ class ZenithPlot(StarPlot):
         style: Styling for the plot (colors, sizes, fonts, etc)
         resolution: Size (in pixels) of largest dimension of the map
         hide_colliding_labels: If True, then labels will not be plotted if they collide with another existing label
-        adjust_text: If True, then the labels will be adjusted to avoid overlapping
+        adjust_text: If True, then the labels will be adjusted to avoid overlapping (with adjustText). If "greedy", then labels that collide are moved to the first position around their anchor that is clear of other labels and star markers instead, which is much faster on busy plots. Plots with many labels (see `ADJUST_TEXT_MAX_LABELS`) always use the greedy layout when this is True.
         rasterize_stars: If True, then the stars will be rasterized when plotted, which can speed up exporting to SVG and reduce the file size but with a loss of image quality
+        star_sizes: Callable that maps star magnitudes to marker sizes and alphas (see [`MagnitudeScale`][starplot.sizes.MagnitudeScale]). If None, then the style's `star_sizes` is used, or the plot type's default scale if the style doesn't have one.
+        hide_labels_over_stars: If True, then labels will not be plotted if they collide with a star marker (other than the one they're labeling)
+        label_scheduler: Places the labels of all layers in order of priority, with an optional limit on the number of labels (see [`LabelScheduler`][starplot.labels.LabelScheduler]). If None, then all labels are placed in the plot type's default order.
 
     Returns:
         ZenithPlot: A new instance of a ZenithPlot
 
     """
 
+    STAR_SIZES = sizes.ZENITH
+    LABEL_PRIORITIES = ZENITH_PRIORITIES
+
     def __init__(
         self,
         lat: float = None,
@@ -74,8 +78,11 @@ class ZenithPlot(StarPlot):
         style: PlotStyle = ZENITH_BASE,
         resolution: int = 2048,
         hide_colliding_labels: bool = True,
-        adjust_text: bool = False,
+        adjust_text: Union[bool, str] = False,
         rasterize_stars: bool = False,
+        star_sizes: sizes.StarSizer = None,
+        hide_labels_over_stars: bool = False,
+        label_scheduler: LabelScheduler = None,
         *args,
         **kwargs,
     ) -> "ZenithPlot":
@@ -89,6 +96,9 @@ class ZenithPlot(StarPlot):
             hide_colliding_labels,
             adjust_text,
             rasterize_stars,
+            star_sizes,
+            hide_labels_over_stars,
+            label_scheduler,
             *args,
             **kwargs,
         )
@@ -106,6 +116,12 @@ class ZenithPlot(StarPlot):
         result = in_circle(x, y)
         return result
 
+    def in_bounds_many(self, ra, dec) -> np.ndarray:
+        x, y = self._prepare_coords(
+            np.asarray(ra, dtype=float), np.asarray(dec, dtype=float)
+        )
+        return in_circle(x, y)
+
     def _prepare_coords(self, ra, dec) -> (float, float):
         return self.project_fn(position_of_radec(ra, dec))
 
@@ -118,7 +134,7 @@ class ZenithPlot(StarPlot):
             return
 
         constellations = LineCollection(
-            create_projected_constellation_lines(self._stardata),
+            create_projected_constellation_lines(self._stars, *self._stars_xy),
             **self.style.constellation.line.matplot_kwargs(
                 size_multiplier=self._size_multiplier
             ),
@@ -130,12 +146,15 @@ class ZenithPlot(StarPlot):
         if not self.style.constellation.label.visible:
             return
 
-        for con in constellations.iterator():
-            fullname, ra, dec = constellations.get(con)
-            x, y = self.project_fn(position_of_radec(ra, dec))
+        props = [constellations.get(con) for con in constellations.iterator()]
+        ras = np.array([ra for _, ra, _ in props])
+        decs = np.array([dec for _, _, dec in props])
+        xs, ys = self._prepare_coords(ras, decs)
 
-            if in_circle(x, y):
-                label = self.ax.text(
+        for (fullname, _, _), x, y, in_bounds in zip(props, xs, ys, in_circle(xs, ys)):
+            if in_bounds:
+                self._schedule_label(
+                    LabelLayer.CONSTELLATION,
                     x,
                     y,
                     fullname.upper(),
@@ -144,59 +163,44 @@ class ZenithPlot(StarPlot):
                         size_multiplier=self._size_multiplier
                     ),
                 )
-                self._maybe_remove_label(label)
 
     def _plot_stars(self):
-        stardata = stars.load(stars.StarCatalog.HIPPARCOS)
-        self._stardata = stardata
+        star_table = stars.load(stars.StarCatalog.HIPPARCOS, as_table=True)
 
         eph = load(self.ephemeris)
         earth = eph["earth"]
 
         # project stars to stereographic plot
-        star_positions = earth.at(self.timescale).observe(Star.from_dataframe(stardata))
-        stardata["x"], stardata["y"] = self.project_fn(star_positions)
+        star_positions = earth.at(self.timescale).observe(star_table.star())
+        x, y = self.project_fn(star_positions)
 
-        # filter stars by limiting magnitude
-        bright_stars = stardata[(stardata["magnitude"] <= self.limiting_magnitude)]
+        self._stars = star_table
+        self._stars_xy = (x, y)
 
-        starpos_x = []
-        starpos_y = []
-        sizes = []
+        # filter stars by limiting magnitude
+        bright = star_table.magnitude <= self.limiting_magnitude
 
         if self.style.star.marker.visible:
-            for _, star in bright_stars.iterrows():
-                m = star["magnitude"]
-                x = star["x"]
-                y = star["y"]
-
-                if not in_circle(x, y, radius=1):
-                    continue
-
-                if m < 2:
-                    sizes.append((8 - m) ** 2.56 * (self._star_size_multiplier))
-                elif m < 8:
-                    sizes.append((8 - m) ** 1.68 * (self._star_size_multiplier))
-                else:
-                    sizes.append(2 * self._star_size_multiplier)
-
-                starpos_x.append(x)
-                starpos_y.append(y)
+            plotted = bright & in_circle(x, y, radius=1)
+            star_sizes, star_alphas = self.star_sizes(
+                star_table.magnitude[plotted], self._star_size_multiplier
+            )
 
             self._plotted_stars = self.ax.scatter(
-                starpos_x,
-                starpos_y,
-                sizes,
+                x[plotted],
+                y[plotted],
+                star_sizes,
                 marker=self.style.star.marker.symbol,
                 color=self.style.star.marker.color.as_hex(),
                 edgecolors=self.style.star.marker.edge_color.as_hex()
                 if self.style.star.marker.edge_color
                 else "none",
-                alpha=self.style.star.marker.alpha,
+                alpha=star_alphas * self.style.star.marker.alpha,
                 zorder=self.style.star.marker.zorder,
                 rasterized=self.rasterize_stars,
                 clip_path=self.background_circle,
             )
+            self._add_label_obstacles(self._plotted_stars)
 
         self._add_legend_handle_marker("Star", self.style.star.marker)
 
@@ -204,37 +208,40 @@ class ZenithPlot(StarPlot):
         if not self.style.star.label.visible:
             return
 
-        stars_labeled = bright_stars[
-            (bright_stars["magnitude"] <= self.limiting_magnitude_labels)
-        ]
-        stars_labeled.sort_values("magnitude")
-
-        for hip_id, s in stars_labeled.iterrows():
-            if in_circle(s["x"], s["y"]) and hip_id in stars.ZENITH_BASE:
-                label = self.ax.text(
-                    s["x"] + 0.00984,
-                    s["y"] - 0.006,
+        labeled = bright & (star_table.magnitude <= self.limiting_magnitude_labels)
+
+        for hip_id, x_, y_, mag in zip(
+            star_table.hip[labeled].tolist(),
+            x[labeled].tolist(),
+            y[labeled].tolist(),
+            star_table.magnitude[labeled].tolist(),
+        ):
+            if in_circle(x_, y_) and hip_id in stars.ZENITH_BASE:
+                self._schedule_label(
+                    LabelLayer.STAR,
+                    x_ + 0.00984,
+                    y_ - 0.006,
                     stars.hip_names[hip_id],
+                    rank=mag,
                     **self.style.star.label.matplot_kwargs(
                         size_multiplier=self._size_multiplier
                     ),
                     ha="left",
                     va="top",
                     path_effects=[self.text_border],
+                    clip_on=True,
                 )
-                label.set_alpha(self.style.star.label.font_alpha)
-                label.set_clip_on(True)
-                self._maybe_remove_label(label)
 
     def _plot_dso_base(self):
         if not self.style.dso.marker.visible:
             return
 
-        for m in dsos.ZENITH_BASE:
-            ra, dec = dsos.messier.get(m)
-            x, y = self.project_fn(position_of_radec(ra, dec))
+        ras = np.array([dsos.messier.get(m)[0] for m in dsos.ZENITH_BASE])
+        decs = np.array([dsos.messier.get(m)[1] for m in dsos.ZENITH_BASE])
+        xs, ys = self._prepare_coords(ras, decs)
 
-            if in_circle(x, y):
+        for m, x, y, in_bounds in zip(dsos.ZENITH_BASE, xs, ys, in_circle(xs, ys)):
+            if in_bounds:
                 self.ax.plot(
                     x,
                     y,
@@ -242,7 +249,8 @@ class ZenithPlot(StarPlot):
                         size_multiplier=self._size_multiplier
                     ),
                 )
-                label = self.ax.text(
+                self._schedule_label(
+                    LabelLayer.DSO,
                     x + self.style.text_offset_x,
                     y + self.style.text_offset_y,
                     m.upper(),
@@ -253,7 +261,6 @@ class ZenithPlot(StarPlot):
                     ),
                     path_effects=[self.text_border],
                 )
-                self._maybe_remove_label(label)
                 self._add_legend_handle_marker("DSO", self.style.dso.marker)
 
     def _plot_border(self):
@@ -335,6 +342,8 @@ class ZenithPlot(StarPlot):
         self.ax.set_aspect(1.0)
         self.ax.axis("off")
 
+        self._collect_labels()
+
         self._plot_border()
         self._plot_stars()
         self._plot_constellation_lines()
@@ -344,6 +353,8 @@ class ZenithPlot(StarPlot):
         self._plot_planets()
         self._plot_moon()
 
+        self._place_labels()
+
         self.refresh_legend()
 
         if self.include_info_text:
@@ -356,5 +367,4 @@ class ZenithPlot(StarPlot):
                 **self.style.info_text.matplot_kwargs(self._size_multiplier),
             )
 
-        if self.adjust_text:
-            self.adjust_labels()
+        self._adjust_labels()
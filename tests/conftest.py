@@ -0,0 +1,13 @@
+import pytest
+
+from starplot import data
+from starplot.data import dsos, layers, stars
+
+
+@pytest.fixture(autouse=True)
+def cache_path(tmp_path, monkeypatch):
+    """Keeps files that tests cache (e.g. DSO outlines) out of the user's cache directory"""
+    path = tmp_path / "cache"
+    for module in [data, dsos, layers, stars]:
+        monkeypatch.setattr(module, "CACHE_PATH", path)
+    return path
@@ -0,0 +1,92 @@
+import threading
+
+from starplot.data.cache import LRUCache
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(max_bytes=10, sizeof=len)
+    cache.put("a", "aaaa")
+    cache.put("b", "bbbb")
+    cache.get("a")
+    cache.put("c", "cccc")
+
+    assert cache.keys() == ["a", "c"]
+    assert cache.size_bytes == 8
+
+
+def test_lru_cache_skips_items_over_budget():
+    cache = LRUCache(max_bytes=4, sizeof=len)
+    cache.put("a", "aaaaaaaa")
+    assert "a" not in cache
+
+
+def test_lru_cache_get_or_load():
+    cache = LRUCache(max_bytes=100, sizeof=len)
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return "hello"
+
+    assert cache.get_or_load("a", loader) == "hello"
+    assert cache.get_or_load("a", loader) == "hello"
+    assert len(loads) == 1
+
+
+def test_lru_cache_get_or_load_unlocked():
+    cache = LRUCache(max_bytes=100, sizeof=len)
+    started, release = threading.Event(), threading.Event()
+    loads = []
+
+    def loader():
+        loads.append(1)
+        started.set()
+        assert release.wait(5)
+        return "hello"
+
+    threads = [
+        threading.Thread(target=cache.get_or_load, args=("a", loader)) for _ in range(2)
+    ]
+    for thread in threads:
+        thread.start()
+    assert started.wait(5)
+
+    # other items can be used while "a" is loading
+    cache.put("b", "bbbb")
+    assert cache.get("b") == "bbbb"
+    assert "a" not in cache
+
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert cache.get("a") == "hello"
+    assert len(loads) == 1
+
+
+def test_lru_cache_resize():
+    cache = LRUCache(max_bytes=100, sizeof=len)
+    cache.put("a", "aaaa")
+    cache.put("b", "bbbb")
+    cache.resize(4)
+    assert cache.keys() == ["b"]
+
+    cache.resize(0)
+    assert len(cache) == 0
+
+
+def test_lru_cache_size_bytes():
+    cache = LRUCache(max_bytes=10, sizeof=len)
+    cache.put("a", "aaaa")
+    cache.put("a", "aa")
+    cache.put("b", "bbbb")
+    assert cache.size_bytes == 6
+
+    cache.put("c", "cccccc")
+    assert cache.keys() == ["b", "c"]
+    assert cache.size_bytes == 10
+
+    cache.evict("b")
+    assert cache.size_bytes == 6
+    cache.evict()
+    assert cache.size_bytes == 0
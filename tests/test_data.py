@@ -0,0 +1,36 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from starplot.data import load, ra_intervals
+
+
+def test_load_ephemeris_once():
+    ephemerides = list(
+        ThreadPoolExecutor(max_workers=4).map(load, ["de421_2001.bsp"] * 8)
+    )
+    assert all(eph is ephemerides[0] for eph in ephemerides)
+    assert load("de421_2001.bsp") is ephemerides[0]
+
+
+def test_load_timescale_once():
+    assert load.timescale() is load.timescale()
+
+
+def test_load_clear():
+    eph = load("de421_2001.bsp")
+    load.clear()
+    assert load("de421_2001.bsp") is not eph
+
+
+@pytest.mark.parametrize(
+    "ra_min,ra_max,expected",
+    [
+        (3, 5, [(3, 5)]),
+        (22, 26, [(22, 24), (0, 2)]),
+        (-2, 2, [(22, 24), (0, 2)]),
+        (-1, 30, [(0, 24)]),
+    ],
+)
+def test_ra_intervals(ra_min, ra_max, expected):
+    assert ra_intervals(ra_min, ra_max) == expected
@@ -1,3 +1,6 @@
+import pandas as pd
+import pytest
+
 from starplot.data import dsos
 
 
@@ -8,3 +11,113 @@ def test_messier():
 def test_dso_base():
     assert "M42" in dsos.ZENITH_BASE
     assert "M13" in dsos.ZENITH_BASE
+
+
+def test_dsos_load():
+    df = dsos.load()
+    assert df is dsos.load()
+
+    m42 = df[df["name"] == "NGC1976"].iloc[0]
+    assert m42["dso_type"] == dsos.DsoType.STAR_CLUSTER_NEBULA
+    assert m42["ra_hours"] == pytest.approx(5.5881, abs=1e-3)
+    assert m42["dec_degrees"] == pytest.approx(-5.3897, abs=1e-3)
+
+
+def test_dsos_load_without_schema(monkeypatch):
+    """If pyongc's database changes, then objects are read with its public API"""
+    expected = dsos.load()
+
+    schema = dict(dsos.ONGC_SCHEMA, objects={"id", "hello"})
+    monkeypatch.setattr(dsos, "ONGC_SCHEMA", schema)
+
+    assert dsos._query_ongc() is None
+    df = dsos.load.__wrapped__()
+
+    # pyongc resolves a few duplicate records (e.g. M102) to the object they duplicate
+    assert not df["name"].duplicated().any()
+    assert "M102" not in df["name"].values
+    assert len(df) > len(expected) - 5
+
+    # both are ordered by id, so the rows align
+    expected = expected[expected["name"].isin(df["name"])].reset_index(drop=True)
+    pd.testing.assert_frame_equal(df, expected)
+
+
+def test_dsos_load_other_version(monkeypatch):
+    monkeypatch.setattr(dsos.pyongc, "__version__", "2.0.0")
+    assert dsos._query_ongc() is None
+
+
+def test_dsos_query_region():
+    df = dsos.query_region(5, 6, -10, 0, types=[dsos.DsoType.STAR_CLUSTER_NEBULA])
+    assert "NGC1976" in df["name"].values
+    assert (df["dso_type"] == dsos.DsoType.STAR_CLUSTER_NEBULA).all()
+    assert df["ra_hours"].between(5, 6).all()
+    assert df["dec_degrees"].between(-10, 0).all()
+
+
+def test_dsos_query_region_wraps():
+    df = dsos.query_region(23, 25, -10, 10)
+    assert len(df) == len(dsos.query_region(23, 24, -10, 10)) + len(
+        dsos.query_region(0, 1, -10, 10)
+    )
+    assert ((df["ra_hours"] >= 23) | (df["ra_hours"] <= 1)).all()
+
+
+def test_dsos_find():
+    df = dsos.find(["NGC1976", "NGC2516", "hello"])
+    assert df["name"].tolist() == ["NGC1976", "NGC2516"]
+
+
+def test_dsos_load_outlines_cached(tmp_path, monkeypatch):
+    monkeypatch.setattr(dsos, "CACHE_PATH", tmp_path)
+    dsos.load_outlines.cache_clear()
+    try:
+        outlines = dsos.load_outlines()
+        assert (tmp_path / dsos.ONGC_OUTLINES).exists()
+        assert "NGC1976" in outlines["name"].values
+        assert outlines.geom_type.isin(["Polygon", "MultiPolygon"]).all()
+    finally:
+        dsos.load_outlines.cache_clear()
+
+
+def test_dsos_load_outlines_corrupt(cache_path):
+    cache_path.mkdir(parents=True, exist_ok=True)
+    (cache_path / dsos.ONGC_OUTLINES).write_bytes(b"not a parquet file")
+    dsos.load_outlines.cache_clear()
+    try:
+        assert "NGC1976" in dsos.load_outlines()["name"].values
+        dsos.load_outlines.cache_clear()
+        # the corrupt file was replaced by the extracted outlines
+        assert "NGC1976" in dsos.load_outlines()["name"].values
+        assert list(cache_path.iterdir()) == [cache_path / dsos.ONGC_OUTLINES]
+    finally:
+        dsos.load_outlines.cache_clear()
+
+
+def test_dsos_load_outlines_not_writable(cache_path, monkeypatch):
+    def fail(*args):
+        raise OSError("read-only")
+
+    monkeypatch.setattr(dsos.os, "replace", fail)
+    dsos.load_outlines.cache_clear()
+    try:
+        assert "NGC1976" in dsos.load_outlines()["name"].values
+        assert list(cache_path.iterdir()) == []
+    finally:
+        dsos.load_outlines.cache_clear()
+
+
+def test_dsos_query_outlines():
+    outlines = dsos.query_outlines(5, 6, -10, 0)
+    assert "NGC1976" in outlines["name"].values
+
+    outlines = dsos.query_outlines(5, 6, -10, 0, types=[dsos.DsoType.GALAXY])
+    assert outlines.empty
+
+
+def test_dsos_query_outlines_wraps():
+    """NGC7822 crosses 0h, so it should be found on both sides"""
+    assert "NGC7822" in dsos.query_outlines(23.5, 24, 60, 70)["name"].values
+    assert "NGC7822" in dsos.query_outlines(0, 0.5, 60, 70)["name"].values
+    assert "NGC7822" in dsos.query_outlines(23, 25, 60, 70)["name"].values
@@ -0,0 +1,78 @@
+import math
+
+import numpy as np
+import pytest
+
+from starplot import geod
+
+
+def _ellipse_loop(center, height_degrees, width_degrees, angle=0, num_pts=100):
+    # reference: one GEOD.fwd call per point
+    ra, dec = center
+    angle = 180 - angle
+    height = geod.distance_m(height_degrees / 2)
+    width = geod.distance_m(width_degrees / 2)
+
+    points = []
+    for angle_pt in range(0, 360, int(360 / num_pts)):
+        radians = math.radians(angle_pt)
+        radius_a = (height * width) / math.sqrt(
+            height**2 * (math.sin(radians)) ** 2
+            + width**2 * (math.cos(radians)) ** 2
+        )
+        lon, lat, _ = geod.GEOD.fwd([ra * 15], [dec], angle + angle_pt, radius_a)
+        points.append((lon[0], lat[0]))
+    return points
+
+
+def _rectangle_loop(center, height_degrees, width_degrees, angle=0):
+    ra, dec = center
+    angle = 180 - angle
+    height_m = geod.distance_m(height_degrees)
+    width_m = geod.distance_m(width_degrees)
+    c = math.sqrt((height_m / 2) ** 2 + (width_m / 2) ** 2)
+    angle_th = math.degrees(math.atan((height_m / 2) / (width_m / 2)))
+
+    points = []
+    for az in [90 - angle_th, 90 + angle_th, 270 - angle_th, 270 + angle_th]:
+        lon, lat, _ = geod.GEOD.fwd([ra * 15], [dec], angle + az, c)
+        points.append((lon[0], lat[0]))
+    return points
+
+
+@pytest.mark.parametrize(
+    "center,height,width,angle",
+    [
+        ((5.5, -5.4), 1.2, 0.8, 30),
+        ((0.1, 41.2), 3, 1, 0),
+        ((12, 60), 0.2, 0.5, 275),
+    ],
+)
+def test_shapes_match_loops(center, height, width, angle):
+    assert np.allclose(
+        geod.ellipse(center, height, width, angle),
+        _ellipse_loop(center, height, width, angle),
+    )
+    assert np.allclose(
+        geod.rectangle(center, height, width, angle),
+        _rectangle_loop(center, height, width, angle),
+    )
+
+
+def test_many_shapes():
+    rng = np.random.default_rng(11)
+    centers = np.column_stack([rng.uniform(0, 24, 20), rng.uniform(-80, 80, 20)])
+    heights = rng.uniform(0.1, 3, 20)
+    widths = rng.uniform(0.1, 3, 20)
+    angles = rng.uniform(0, 360, 20)
+
+    ellipses = geod.ellipses(centers, heights, widths, angles, num_pts=36)
+    rectangles = geod.rectangles(centers, heights, widths, angles)
+
+    assert ellipses.shape == (20, 36, 2)
+    assert rectangles.shape == (20, 4, 2)
+
+    for i, center in enumerate(centers):
+        args = (tuple(center), heights[i], widths[i], angles[i])
+        assert np.allclose(ellipses[i], geod.ellipse(*args, num_pts=36))
+        assert np.allclose(rectangles[i], geod.rectangle(*args))
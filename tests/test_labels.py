@@ -0,0 +1,146 @@
+import numpy as np
+import pytest
+
+from matplotlib import pyplot as plt
+from matplotlib.transforms import Bbox
+
+from starplot.labels import (
+    LabelCandidate,
+    LabelIndex,
+    LabelLayer,
+    LabelScheduler,
+    label_offsets,
+    text_extent,
+)
+
+
+def _random_boxes(rng, n, max_size=80):
+    x0 = rng.uniform(-100, 1000, n)
+    y0 = rng.uniform(-100, 1000, n)
+    w = rng.uniform(1, max_size, n)
+    h = rng.uniform(1, max_size / 3, n)
+    return [Bbox([[a, b], [a + c, b + d]]) for a, b, c, d in zip(x0, y0, w, h)]
+
+
+@pytest.mark.parametrize("cell_size", [16, 64, 500])
+def test_label_index_matches_brute_force(cell_size):
+    rng = np.random.default_rng(3)
+    index = LabelIndex(cell_size=cell_size)
+    placed = []
+
+    for box in _random_boxes(rng, 300):
+        expected = any(Bbox.intersection(p, box) for p in placed)
+        assert index.intersects(box) == expected
+
+        if not expected:
+            index.insert(box)
+            placed.append(box)
+
+    assert len(index) == len(placed)
+
+
+def test_label_index_markers():
+    index = LabelIndex(cell_size=10)
+    index.add_markers([100, 200], [100, 200], [5, 30])
+
+    assert index.intersects((104, 104, 150, 120))
+    assert not index.intersects((104, 104, 150, 120), markers=False)
+    assert not index.intersects((106, 106, 150, 120))
+    assert index.intersects((0, 0, 1000, 1000))
+
+    # large marker spans many cells
+    assert index.intersects((225, 225, 300, 300))
+    assert not index.intersects((231, 231, 300, 300))
+
+    # markers that contain the label's anchor are ignored
+    assert not index.intersects((104, 104, 150, 120), anchor=(100, 100))
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        dict(fontsize=12),
+        dict(fontsize=20, weight="bold", ha="center", va="center"),
+        dict(fontsize=9, ha="right", va="top", fontstyle="italic"),
+        dict(fontsize=11, family="monospace", va="bottom"),
+    ],
+)
+def test_text_extent_matches_matplotlib(kwargs):
+    fig, ax = plt.subplots(figsize=(4, 4), dpi=150)
+    renderer = fig.canvas.get_renderer()
+
+    for text in ["Sirius", "M42", "ANDROMEDA", "jupiter", "ξ", "Alpha Centauri"]:
+        label = ax.text(0.3, 0.4, text, **kwargs)
+        expected = label.get_window_extent(renderer=renderer)
+        x, y = ax.transData.transform((0.3, 0.4))
+
+        assert np.allclose(
+            text_extent(x, y, text, fig.dpi, **kwargs).bounds, expected.bounds
+        )
+
+    plt.close(fig)
+
+
+def test_text_extent_unsupported():
+    assert text_extent(0, 0, "two\nlines", 100) is None
+    assert text_extent(0, 0, "rotated", 100, rotation=45) is None
+    assert text_extent(0, 0, "$x^2$", 100) is None
+
+
+def _candidate(layer, rank, text):
+    return LabelCandidate(layer, rank, 0, 0, text, {})
+
+
+def test_label_scheduler_order_and_budget():
+    candidates = [
+        _candidate(LabelLayer.DSO, 0, "M42"),
+        _candidate(LabelLayer.STAR, 1.6, "Castor"),
+        _candidate(LabelLayer.STAR, -1.4, "Sirius"),
+        _candidate(LabelLayer.PLANET, 0, "MARS"),
+        _candidate(LabelLayer.OBJECT, 0, "custom"),
+    ]
+    priorities = {LabelLayer.STAR: 0, LabelLayer.DSO: 1, LabelLayer.PLANET: 2}
+    placed = []
+
+    def place(candidate):
+        placed.append(candidate.text)
+        return Bbox.from_bounds(0, 0, 10, 10)
+
+    scheduler = LabelScheduler()
+    scheduler.schedule(candidates, place, area=1000, priorities=priorities)
+    assert placed == ["Sirius", "Castor", "M42", "MARS", "custom"]
+
+    placed.clear()
+    scheduler = LabelScheduler(priorities={LabelLayer.PLANET: -1}, budget=2)
+    result = scheduler.schedule(candidates, place, area=1000, priorities=priorities)
+    assert placed == ["MARS", "Sirius"]
+    assert [c.text for c in result] == placed
+
+
+def test_label_scheduler_coverage():
+    candidates = [_candidate(LabelLayer.STAR, i, str(i)) for i in range(10)]
+
+    def place(candidate):
+        # odd labels collide
+        if int(candidate.text) % 2:
+            return None
+        return Bbox.from_bounds(0, 0, 10, 10)
+
+    scheduler = LabelScheduler(coverage=0.25)
+    result = scheduler.schedule(candidates, place, area=1000)
+    assert [c.text for c in result] == ["0", "2", "4"]
+
+
+def test_label_offsets():
+    extent = Bbox.from_bounds(100, 100, 40, 10)
+    anchor = (100, 100)
+    offsets = list(label_offsets(extent, anchor, padding=2))
+
+    assert len(offsets) == 9
+    assert offsets[0] == (0, 0)
+
+    right, left, above, below = [extent.translated(*o) for o in offsets[1:5]]
+    assert right.x0 == 102 and right.y0 == 95
+    assert left.x1 == 98 and left.y0 == 95
+    assert above.y0 == 102 and above.x0 == 80
+    assert below.y1 == 98 and below.x0 == 80
@@ -0,0 +1,130 @@
+import cartopy.crs as ccrs
+import geopandas as gpd
+import shapely
+from shapely.geometry import LineString
+
+from starplot.data import DataFiles, layers
+
+
+def _layer():
+    return layers.GeoLayer(
+        gpd.GeoDataFrame(
+            {"name": ["a", "b", "c"]},
+            geometry=[
+                LineString([(0, 0), (10, 0)]),
+                LineString([(20, 20), (30, 30)]),
+                LineString([(5, -5), (5, 5)]),
+            ],
+        )
+    )
+
+
+def test_geo_layer_query():
+    features = _layer().query((-1, -1, 6, 1))
+    assert features["name"].tolist() == ["a", "c"]
+    assert features.geometry.iloc[0].equals(LineString([(0, 0), (6, 0)]))
+    assert features.geometry.iloc[1].equals(LineString([(5, -1), (5, 1)]))
+
+
+def test_geo_layer_query_no_clip():
+    features = _layer().query((-1, -1, 6, 1), clip=False)
+    assert features["name"].tolist() == ["a", "c"]
+    assert features.geometry.iloc[0].equals(LineString([(0, 0), (10, 0)]))
+
+
+def test_geo_layer_query_empty():
+    assert _layer().query((100, 100, 110, 110)).empty
+
+
+def test_layers_load_cached():
+    layer = layers.load(str(DataFiles.MILKY_WAY.value))
+    assert layer is layers.load(str(DataFiles.MILKY_WAY.value))
+    assert len(layer) > 0
+
+
+def test_layers_load_simplified():
+    filename = str(DataFiles.MILKY_WAY.value)
+    full = layers.load(filename)
+    simplified = layers.load(filename, 0.5)
+
+    assert simplified is layers.load(filename, 0.5)
+    assert len(simplified) == len(full)
+    assert (
+        shapely.get_num_coordinates(simplified.gdf.geometry.to_numpy()).sum()
+        < shapely.get_num_coordinates(full.gdf.geometry.to_numpy()).sum()
+    )
+
+
+def test_layers_lod_tolerance():
+    assert layers.lod_tolerance(360, 512) == 0.25
+    assert layers.lod_tolerance(360, 2000) == 0.05
+    assert layers.lod_tolerance(60, 4096) == 0
+
+
+def test_layers_bucket():
+    assert layers._bucket((12, -16, 118, 23.6)) == (0, -30, 120, 30)
+    assert layers._bucket((-185, -95, 185, 95)) == (-180, -90, 180, 90)
+
+
+def test_layers_load_projected_cached(tmp_path, monkeypatch):
+    monkeypatch.setattr(layers, "CACHE_PATH", tmp_path)
+    layers._projected.evict()
+
+    filename = str(DataFiles.CONSTELLATION_BORDERS.value)
+    crs = ccrs.Mercator()
+    bbox = (10, -10, 50, 10)
+
+    geometries = layers.load_projected(filename, bbox, crs, ccrs.PlateCarree())
+    assert len(geometries) > 0
+    assert layers.load_projected(filename, bbox, crs, ccrs.PlateCarree()) is geometries
+
+    # geometries are read from disk when they're not in memory
+    assert len(list((tmp_path / "projected").glob("*.parquet"))) == 1
+    layers._projected.evict()
+    cached = layers.load_projected(filename, bbox, crs, ccrs.PlateCarree())
+    assert cached is not geometries
+    assert all(a.equals_exact(b, 1e-6) for a, b in zip(cached, geometries))
+
+    # same extent bucket
+    assert len(
+        layers.load_projected(filename, (12, -5, 40, 5), crs, ccrs.PlateCarree())
+    ) == len(geometries)
+    assert len(list((tmp_path / "projected").glob("*.parquet"))) == 1
+
+    # projections with other centers are cached separately
+    layers.load_projected(
+        filename, bbox, ccrs.Mercator(central_longitude=30), ccrs.PlateCarree()
+    )
+    assert len(list((tmp_path / "projected").glob("*.parquet"))) == 2
+    layers._projected.evict()
+
+
+def test_layers_load_projected_versions(cache_path, monkeypatch):
+    layers._projected.evict()
+
+    filename = str(DataFiles.CONSTELLATION_BORDERS.value)
+    bbox = (10, -10, 50, 10)
+    layers.load_projected(filename, bbox, ccrs.Mercator(), ccrs.PlateCarree())
+
+    # geometries projected by other versions of starplot are not read
+    monkeypatch.setattr(layers, "__version__", "0.0.0")
+    layers._projected.evict()
+    layers.load_projected(filename, bbox, ccrs.Mercator(), ccrs.PlateCarree())
+    assert len(list((cache_path / "projected").glob("*.parquet"))) == 2
+    layers._projected.evict()
+
+
+def test_layers_load_projected_not_writable(cache_path, monkeypatch):
+    def fail(*args):
+        raise OSError("read-only")
+
+    monkeypatch.setattr(layers.os, "replace", fail)
+    layers._projected.evict()
+
+    filename = str(DataFiles.CONSTELLATION_BORDERS.value)
+    geometries = layers.load_projected(
+        filename, (10, -10, 50, 10), ccrs.Mercator(), ccrs.PlateCarree()
+    )
+    assert len(geometries) > 0
+    assert list((cache_path / "projected").iterdir()) == []
+    layers._projected.evict()
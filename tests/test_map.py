@@ -3,9 +3,15 @@ from datetime import datetime
 
 from pytz import timezone
 
+import geopandas as gpd
+import numpy as np
+import pandas as pd
 import pytest
+from matplotlib.transforms import Bbox
 
 from starplot import styles
+from starplot.data import DataFiles
+from starplot.labels import LabelLayer, LabelScheduler
 from starplot.map import MapPlot, Projection
 from starplot.models import SkyObject
 
@@ -279,3 +285,278 @@ def test_map_mollweide():
 
     assert dhash(filename) == "0f2971633b330f06"
     assert colorhash(filename) == "07000000000"
+
+
+@pytest.mark.parametrize(
+    "ra_min,ra_max",
+    [
+        (3.6, 7.8),
+        (22, 26),  # wraps around 0h
+    ],
+)
+def test_map_plot_in_bounds_many(ra_min, ra_max):
+    p = MapPlot(
+        projection=Projection.MERCATOR,
+        ra_min=ra_min,
+        ra_max=ra_max,
+        dec_min=-16,
+        dec_max=23.6,
+        resolution=400,
+    )
+    rng = np.random.default_rng(7)
+    ra = rng.uniform(0, 24, 500)
+    dec = rng.uniform(-90, 90, 500)
+
+    in_bounds = p.in_bounds_many(ra, dec)
+
+    assert 0 < in_bounds.sum() < len(ra)
+    assert in_bounds.tolist() == [p.in_bounds(r, d) for r, d in zip(ra, dec)]
+
+
+def test_map_plot_label_scheduler():
+    kwargs = dict(
+        projection=Projection.MERCATOR,
+        ra_min=3.6,
+        ra_max=7.8,
+        dec_min=-16,
+        dec_max=23.6,
+        resolution=2000,
+    )
+    p = MapPlot(**kwargs)
+    assert len(p.labels) > 3
+
+    p = MapPlot(
+        **kwargs,
+        label_scheduler=LabelScheduler(priorities={LabelLayer.PLANET: -1}, budget=3),
+    )
+    assert len(p.labels) == 3
+    assert p.labels[0].get_text() in ("URANUS", "JUPITER")
+
+
+def test_map_plot_greedy_labels(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("adjustText should not be used")
+
+    monkeypatch.setattr(MapPlot, "adjust_labels", fail)
+
+    p = MapPlot(
+        projection=Projection.MERCATOR,
+        ra_min=3.6,
+        ra_max=7.8,
+        dec_min=-16,
+        dec_max=23.6,
+        resolution=2000,
+        adjust_text="greedy",
+    )
+    renderer = p.fig.canvas.get_renderer()
+    extents = [label.get_window_extent(renderer=renderer) for label in p.labels]
+
+    assert len(extents) > 3
+    for i, a in enumerate(extents):
+        for b in extents[:i]:
+            assert not a.overlaps(b)
+
+
+def test_map_plot_greedy_labels_avoid_markers():
+    p = MapPlot(
+        projection=Projection.MERCATOR,
+        ra_min=3.6,
+        ra_max=7.8,
+        dec_min=-16,
+        dec_max=23.6,
+        resolution=2000,
+        adjust_text="greedy",
+    )
+    assert not p.hide_labels_over_stars
+
+    boxes = p._labels_index._marker_boxes
+    assert len(boxes) > 0
+
+    # a label next to a bright star's marker, covering it (but no other labels)
+    for x0, y0, x1, y1 in boxes[np.argsort(boxes[:, 0] - boxes[:, 2])]:
+        anchor = (x0 - 2, (y0 + y1) / 2)
+        extent = Bbox([[x0 - 1, y0], [x1 + 20, y1]])
+        if p._is_label_inside(extent) and not p._is_label_collision(extent, anchor):
+            break
+
+    assert p._labels_index.intersects(extent, markers=True, anchor=anchor)
+
+    offset = p._find_label_offset(extent, anchor)
+
+    assert offset not in (None, (0, 0))
+    assert not p._labels_index.intersects(
+        extent.translated(*offset), markers=True, anchor=anchor
+    )
+
+
+def test_map_plot_layers_aspect():
+    p = MapPlot(
+        projection=Projection.MERCATOR,
+        ra_min=3.6,
+        ra_max=7.8,
+        dec_min=-16,
+        dec_max=23.6,
+        resolution=1000,
+    )
+    x0, x1, y0, y1 = p.ax.get_extent(crs=p._plate_carree)
+
+    # the aspect is set from the full features of the last layer (the Milky Way), as GeoPandas did
+    milky_way = gpd.read_file(
+        DataFiles.MILKY_WAY.value, engine="pyogrio", bbox=(x0, y0, x1, y1)
+    )
+    lat_min, lat_max = milky_way.total_bounds[[1, 3]]
+    assert p.ax.get_aspect() == pytest.approx(
+        1 / np.cos(np.radians((lat_min + lat_max) / 2))
+    )
+
+
+def test_map_plot_without_layers_size():
+    style = styles.PlotStyle()
+    style.milky_way.visible = False
+    style.constellation_borders.visible = False
+    style.constellation.line.visible = False
+
+    p = MapPlot(
+        projection=Projection.MERCATOR,
+        ra_min=3.6,
+        ra_max=7.8,
+        dec_min=-16,
+        dec_max=23.6,
+        resolution=1000,
+        style=style,
+    )
+
+    # without layers, GeoPandas never laid out the figure, so it's sized from the initial axes
+    assert p.fig.get_size_inches() == pytest.approx(
+        [p.figure_size * (0.9 - 0.125), p.figure_size * (0.88 - 0.11)]
+    )
+
+
+def test_map_plot_polygons():
+    p = MapPlot(
+        projection=Projection.MERCATOR,
+        ra_min=3.6,
+        ra_max=7.8,
+        dec_min=-16,
+        dec_max=23.6,
+        resolution=400,
+    )
+    red = styles.PolygonStyle(fill_color="red", alpha=0.5)
+    blue = styles.PolygonStyle(edge_color="blue")
+    polygons = [
+        [(60 + i, 0), (61 + i, 0), (61 + i, 1), (60 + i, 1)] for i in range(0, 20, 2)
+    ]
+    collections = len(p.ax.collections)
+
+    p.plot_polygons(polygons, [red, blue] * 5)
+
+    added = p.ax.collections[collections:]
+    assert len(added) == 2
+    assert sorted(len(c.get_paths()) for c in added) == [5, 5]
+
+
+def test_map_plot_dso_outlines():
+    kwargs = dict(
+        projection=Projection.MERCATOR,
+        ra_min=3.6,
+        ra_max=7.8,
+        dec_min=-16,
+        dec_max=23.6,
+        resolution=400,
+    )
+    extents = MapPlot(**kwargs).ax.collections[-1].get_paths()
+    outlines = MapPlot(**kwargs, dso_outlines=True).ax.collections[-1].get_paths()
+
+    # M42's outline has two parts, which replace its ellipse
+    assert len(outlines) == len(extents) + 1
+    assert max(len(p.vertices) for p in outlines) > max(
+        len(p.vertices) for p in extents
+    )
+
+
+def test_map_plot_objects():
+    kwargs = dict(
+        projection=Projection.MERCATOR,
+        ra_min=3.6,
+        ra_max=7.8,
+        dec_min=-16,
+        dec_max=23.6,
+        resolution=1000,
+    )
+    rng = np.random.default_rng(5)
+    objects = pd.DataFrame(
+        {
+            "name": [f"T{i}" for i in range(200)],
+            "ra": rng.uniform(2, 9, 200),
+            "dec": rng.uniform(-30, 40, 200),
+            "style": rng.choice(["a", "b"], 200),
+        }
+    )
+    object_styles = {
+        "a": styles.ObjectStyle(marker={"symbol": "o", "fill": "left"}),
+        "b": styles.ObjectStyle(marker={"symbol": "s"}, label={"font_size": 5}),
+    }
+
+    bulk = MapPlot(**kwargs)
+    lines = len(bulk.ax.lines)
+    bulk.plot_objects(objects, object_styles, legend_labels={"a": "Targets"})
+
+    single = MapPlot(**kwargs)
+    for obj in objects.itertuples():
+        single.plot_object(
+            SkyObject(
+                name=obj.name, ra=obj.ra, dec=obj.dec, style=object_styles[obj.style]
+            )
+        )
+
+    assert len(bulk.ax.lines) == lines + 2
+    assert "Targets" in bulk._legend_handles
+    assert [label.get_text() for label in bulk.labels] == [
+        label.get_text() for label in single.labels
+    ]
+
+    bulk_points = np.concatenate([line.get_xydata() for line in bulk.ax.lines[lines:]])
+    single_points = np.concatenate(
+        [line.get_xydata() for line in single.ax.lines[lines:]]
+    )
+    single_points = single.ax.projection.transform_points(
+        single._crs, single_points[:, 0], single_points[:, 1]
+    )[:, :2]
+    assert np.allclose(
+        np.sort(bulk_points, axis=0), np.sort(single_points, axis=0), atol=1e-3
+    )
+
+
+def test_map_plot_objects_hidden_marker():
+    p = MapPlot(
+        projection=Projection.MERCATOR,
+        ra_min=3.6,
+        ra_max=7.8,
+        dec_min=-16,
+        dec_max=23.6,
+        resolution=1000,
+    )
+    style = styles.ObjectStyle(marker={"visible": False})
+    lines = len(p.ax.lines)
+
+    # like plot_object, markers are plotted even if they're not visible
+    p.plot_objects(dict(name=["M42"], ra=[5.58], dec=[-5.39]), style)
+    p.plot_object(SkyObject(name="M42", ra=5.58, dec=-5.39, style=style))
+
+    assert len(p.ax.lines) == lines + 2
+
+
+def test_map_plot_fast_astrometry():
+    kwargs = dict(
+        projection=Projection.MERCATOR,
+        ra_min=3.6,
+        ra_max=7.8,
+        dec_min=-16,
+        dec_max=23.6,
+        resolution=1000,
+    )
+    full = MapPlot(**kwargs)._plotted_stars.get_offsets()
+    fast = MapPlot(**kwargs, astrometry="fast")._plotted_stars.get_offsets()
+
+    assert fast.shape == full.shape
+    np.testing.assert_allclose(fast, full, atol=1e-3)
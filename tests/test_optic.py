@@ -1,6 +1,7 @@
 from pathlib import Path
 from datetime import datetime
 
+import numpy as np
 import pytest
 
 from pytz import timezone
@@ -281,3 +282,91 @@ def test_optic_plot_raises_on_below_horizon():
                 fov=65,
             ),
         )
+
+
+@pytest.mark.parametrize(
+    "optic",
+    [
+        optics.Binoculars(magnification=10, fov=65),
+        optics.Refractor(focal_length=600, eyepiece_focal_length=14, eyepiece_fov=82),
+        optics.Camera(
+            sensor_height=15, sensor_width=22.5, lens_focal_length=400, rotation=30
+        ),
+    ],
+)
+def test_optic_in_bounds_many(optic, dt_dec_16):
+    optic_plot = OpticPlot(
+        ra=3.7836111111,
+        dec=24.1166666667,
+        lat=32.97,
+        lon=-117.038611,
+        optic=optic,
+        dt=dt_dec_16,
+        resolution=400,
+    )
+    rng = np.random.default_rng(7)
+    ra = 3.78 + rng.uniform(-0.5, 0.5, 200)
+    dec = 24.1 + rng.uniform(-5, 5, 200)
+
+    in_bounds = optic_plot.in_bounds_many(ra, dec)
+
+    assert 0 < in_bounds.sum() < len(ra)
+    assert in_bounds.tolist() == [optic_plot.in_bounds(r, d) for r, d in zip(ra, dec)]
+
+
+@pytest.mark.parametrize(
+    "optic",
+    [
+        optics.Binoculars(magnification=10, fov=65),
+        optics.Camera(
+            sensor_height=15, sensor_width=22.5, lens_focal_length=400, rotation=30
+        ),
+    ],
+)
+@pytest.mark.parametrize("scale", [1, 2])
+def test_optic_in_bounds_many_default(optic, scale):
+    # the base class checks points against the optic's patch, without the subclass' override
+    radius = getattr(optic, "radius", None) or max(optic.radius_x, optic.radius_y)
+    rng = np.random.default_rng(7)
+    x = rng.uniform(-1.5 * radius, 1.5 * radius, 500)
+    y = rng.uniform(-1.5 * radius, 1.5 * radius, 500)
+
+    in_bounds = optics.Optic.in_bounds_many(optic, x, y, scale)
+
+    assert in_bounds.tolist() == [
+        optic.in_bounds(x_, y_, scale) for x_, y_ in zip(x, y)
+    ]
+
+
+def test_optic_plot_planets_in_bounds_once(dt_dec_16, monkeypatch):
+    optic_plot = OpticPlot(
+        ra=3.7836111111,
+        dec=24.1166666667,
+        lat=32.97,
+        lon=-117.038611,
+        optic=optics.Binoculars(magnification=10, fov=65),
+        dt=dt_dec_16,
+        resolution=400,
+    )
+
+    def in_bounds(*args, **kwargs):
+        raise AssertionError("planets are checked by in_bounds_many")
+
+    monkeypatch.setattr(optic_plot, "in_bounds", in_bounds)
+    optic_plot._plot_planets()
+
+
+def test_optic_in_bounds_many_empty(dt_dec_16):
+    optic_plot = OpticPlot(
+        ra=3.7836111111,
+        dec=24.1166666667,
+        lat=32.97,
+        lon=-117.038611,
+        optic=optics.Binoculars(magnification=10, fov=65),
+        dt=dt_dec_16,
+        resolution=400,
+    )
+    in_bounds = optic_plot.in_bounds_many([], [])
+
+    assert in_bounds.dtype == bool
+    assert len(in_bounds) == 0
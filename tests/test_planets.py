@@ -0,0 +1,107 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+from pytest import approx
+from pytz import timezone
+
+from starplot import planets
+from starplot.data import load
+
+ts = load.timescale()
+dt = timezone("UTC").localize(datetime(2023, 8, 27, 23, 0, 0, 0))
+
+
+def test_positions():
+    positions = planets.positions(ts.from_datetime(dt))
+
+    assert positions.dtype == planets.POSITION_DTYPE
+    assert positions["name"].tolist() == [p.value for p in planets.Planets] + ["moon"]
+
+    moon = positions[-1]
+    assert moon["ra"] == approx(19.5024, abs=1e-3)
+    assert moon["dec"] == approx(-26.9649, abs=1e-3)
+    assert moon["apparent_size"] == approx(0.547, abs=1e-3)
+
+
+def test_positions_many_times():
+    times = ts.from_datetimes([dt, dt.replace(day=28), dt.replace(day=29)])
+    positions = planets.positions(times)
+
+    assert positions.shape == (8, 3)
+    np.testing.assert_array_equal(
+        positions[:, 1], planets.positions(ts.from_datetime(dt.replace(day=28)))
+    )
+
+
+def test_get_planet_positions():
+    result = planets.get_planet_positions(ts.from_datetime(dt))
+
+    assert list(result) == [p.value for p in planets.Planets]
+    ra, dec, apparent_size = result["jupiter"]
+    assert ra == approx(2.8724, abs=1e-3)
+    assert dec == approx(15.1321, abs=1e-3)
+    assert apparent_size == approx(0.01178, abs=1e-4)
+
+
+def test_positions_over():
+    planets._cache.evict()
+    nights = pd.date_range("2023-08-01 23:00", periods=30, freq="D", tz="UTC")
+
+    result = planets.positions_over(nights)
+
+    assert list(result) == [p.value for p in planets.Planets] + ["moon"]
+    assert result["moon"].shape == (30,)
+    assert len(planets._cache) == 30
+
+    expected = planets.positions(ts.from_datetime(nights[26].to_pydatetime()))
+    assert result["jupiter"]["ra"][26] == approx(expected[3]["ra"], abs=1e-6)
+    assert result["moon"]["dec"][26] == approx(expected[-1]["dec"], abs=1e-6)
+
+    # times that are already cached are not calculated again
+    times = ts.from_datetimes(list(nights[:5]))
+    assert planets.positions_over(times)["mars"].shape == (5,)
+    assert len(planets._cache) == 30
+
+
+def test_cached_positions():
+    planets._cache.evict()
+    t = ts.from_datetime(dt)
+
+    result = planets.cached_positions(t)
+
+    assert result.shape == (8, 1)
+    assert len(planets._cache) == 1
+    expected = planets.positions(t)
+    assert result["ra"][:, 0] == approx(expected["ra"], abs=1e-6)
+    assert planets.cached_positions(t)["dec"][:, 0] == approx(expected["dec"])
+    assert len(planets._cache) == 1
+
+
+def test_position_table(tmp_path):
+    start = ts.from_datetime(dt)
+    end = ts.from_datetime(dt.replace(month=10))
+    filename = tmp_path / "positions.npz"
+
+    table = planets.precompute(filename, start=start, end=end, tolerance=0.5)
+    assert max(table.errors.values()) <= 0.25
+
+    table = planets.PositionTable.load(filename)
+    times = ts.tai_jd(np.linspace(table.start, table.end, 101))
+    expected = planets.positions(times)
+    actual = planets.positions(times, table=table)
+
+    assert actual["name"].tolist() == expected["name"].tolist()
+    np.testing.assert_allclose(actual["dec"], expected["dec"], atol=0.5 / 3600)
+    np.testing.assert_allclose(
+        actual["apparent_size"], expected["apparent_size"], rtol=1e-6
+    )
+
+
+def test_position_table_outside_span():
+    start = ts.from_datetime(dt)
+    table = planets.precompute(start=start, end=start + 10)
+
+    with pytest.raises(ValueError):
+        table.positions(start + 11)
@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+
+from starplot import sizes, MapPlot, Projection
+from starplot.styles import PlotStyle
+
+
+def _map_size(m):
+    if m < 1.6:
+        return (9 - m) ** 2.85, 1
+    elif m < 4.6:
+        return (8 - m) ** 2.92, 1
+    elif m < 5.8:
+        return (9 - m) ** 2.46, 0.9
+    return 2.23, (16 - m) * 0.09
+
+
+def _optic_size(m):
+    if m < 4.6:
+        return (9 - m) ** 3.76, 1
+    elif m < 5.85:
+        return (9 - m) ** 3.72, 0.94
+    elif m < 9:
+        return (13 - m) ** 1.91, 0.88
+    return 4.93, (16 - m) * 0.09
+
+
+def _zenith_size(m):
+    if m < 2:
+        return (8 - m) ** 2.56, 1
+    elif m < 8:
+        return (8 - m) ** 1.68, 1
+    return 2, 1
+
+
+@pytest.mark.parametrize(
+    "scale,reference",
+    [
+        (sizes.MAP, _map_size),
+        (sizes.OPTIC, _optic_size),
+        (sizes.ZENITH, _zenith_size),
+    ],
+)
+def test_magnitude_scale(scale, reference):
+    magnitudes = np.linspace(-1.5, 12, 200)
+    star_sizes, star_alphas = scale(magnitudes, size_multiplier=2)
+
+    expected = [reference(m) for m in magnitudes]
+
+    assert np.allclose(star_sizes, [s * 2 for s, _ in expected])
+    assert np.allclose(star_alphas, [a for _, a in expected])
+
+
+def test_magnitude_scale_custom():
+    scale = sizes.MagnitudeScale(
+        tiers=[sizes.MagnitudeTier(3, base=10, exponent=2, alpha=0.5)],
+        faint_size=1,
+        faint_alpha=0.2,
+    )
+    star_sizes, star_alphas = scale(np.array([0, 3, 5]))
+
+    assert star_sizes.tolist() == [100, 1, 1]
+    assert star_alphas.tolist() == [0.5, 0.2, 0.2]
+
+
+def test_magnitude_scale_style():
+    style = PlotStyle().extend(
+        {
+            "star_sizes": {
+                "tiers": [{"magnitude": 3, "base": 10, "exponent": 2, "alpha": 0.5}],
+                "faint_size": 1,
+                "faint_alpha": 0.2,
+            }
+        }
+    )
+    star_sizes, star_alphas = style.star_sizes.scale()(np.array([0, 3, 5]))
+
+    assert star_sizes.tolist() == [100, 1, 1]
+    assert star_alphas.tolist() == [0.5, 0.2, 0.2]
+
+
+def test_magnitude_scale_style_precedence():
+    style = PlotStyle().extend(
+        {
+            "star_sizes": {
+                "tiers": [{"magnitude": 3, "base": 10, "exponent": 2}],
+                "faint_size": 1,
+                "faint_alpha": 1,
+            }
+        }
+    )
+    kwargs = dict(
+        projection=Projection.MERCATOR, ra_min=3, ra_max=5, dec_min=0, dec_max=20
+    )
+
+    assert MapPlot(**kwargs).star_sizes is sizes.MAP
+    assert MapPlot(**kwargs, style=style).star_sizes(np.array([0]))[0].tolist() == [100]
+    assert (
+        MapPlot(**kwargs, style=style, star_sizes=sizes.OPTIC).star_sizes is sizes.OPTIC
+    )
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from starplot.data.spatial import SkyIndex, unit_vectors
+
+
+@pytest.fixture(scope="module")
+def points():
+    rng = np.random.default_rng(42)
+    ra = rng.uniform(0, 24, 50_000)
+    dec = np.degrees(np.arcsin(rng.uniform(-1, 1, 50_000)))
+    return ra, dec
+
+
+@pytest.mark.parametrize(
+    "ra,dec,radius",
+    [
+        (3, 24, 2),
+        (0.01, 0, 3),  # wraps around 0h
+        (23.99, -10, 5),  # wraps around 24h
+        (5, 89.5, 3),  # contains north pole
+        (12, -88, 4),  # contains south pole
+        (6, 45, 60),
+    ],
+)
+def test_sky_index_cone_search(points, ra, dec, radius):
+    index = SkyIndex(*points)
+    result = index.cone_search(ra, dec, radius)
+
+    # compare to brute force search
+    center = unit_vectors([ra], [dec])[0]
+    expected = np.flatnonzero(
+        unit_vectors(*points) @ center >= np.cos(np.radians(radius))
+    )
+
+    assert len(result) > 0
+    assert np.array_equal(result, expected)
+
+
+def test_sky_index_empty():
+    index = SkyIndex([], [])
+    assert len(index.cone_search(1, 1, 1)) == 0
+
+
+def test_sky_index_save_load(points, tmp_path):
+    index = SkyIndex(*points)
+    index.save(tmp_path / "index.npz")
+    loaded = SkyIndex.load(tmp_path / "index.npz")
+
+    assert len(loaded) == len(index)
+    np.testing.assert_array_equal(
+        loaded.cone_search(3, 40, 5), index.cone_search(3, 40, 5)
+    )
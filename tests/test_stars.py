@@ -1,6 +1,10 @@
+import numpy as np
+import pyarrow as pa
+import pyarrow.feather as feather
 import pytest
 
-from starplot.data import stars
+from starplot.data import load, stars
+from starplot.data.table import StarTable
 
 
 def test_star_hip_names():
@@ -24,3 +28,279 @@ def test_stars_load_tycho_1():
 def test_stars_load_unrecognized_catalog():
     with pytest.raises(ValueError, match=r"Unrecognized star catalog."):
         stars.load("hello")
+
+
+def test_stars_load_cached(monkeypatch):
+    stars.preload(stars.StarCatalog.HIPPARCOS)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("catalog was read from disk")
+
+    monkeypatch.setitem(stars._loaders, stars.StarCatalog.HIPPARCOS, fail)
+    allstars = stars.load(stars.StarCatalog.HIPPARCOS)
+    assert len(allstars) == 118_218
+
+    # adding columns to the returned DataFrame should not change the cached catalog
+    allstars["x"] = 0
+    assert "x" not in stars.load(stars.StarCatalog.HIPPARCOS).columns
+
+
+def test_stars_evict(monkeypatch):
+    stars.preload(stars.StarCatalog.HIPPARCOS)
+    stars.evict(stars.StarCatalog.HIPPARCOS)
+
+    loads = []
+    loader = stars._loaders[stars.StarCatalog.HIPPARCOS]
+
+    def counting_loader(*args, **kwargs):
+        loads.append(1)
+        return loader(*args, **kwargs)
+
+    monkeypatch.setitem(stars._loaders, stars.StarCatalog.HIPPARCOS, counting_loader)
+    stars.load(stars.StarCatalog.HIPPARCOS)
+    stars.load(stars.StarCatalog.HIPPARCOS)
+    assert len(loads) == 1
+
+
+@pytest.mark.parametrize(
+    "catalog", [stars.StarCatalog.HIPPARCOS, stars.StarCatalog.TYCHO_1]
+)
+def test_stars_load_limiting_magnitude(catalog):
+    allstars = stars.load(catalog, cache=False)
+    bright = stars.load(catalog, limiting_magnitude=6, cache=False)
+
+    assert len(bright) == len(allstars[allstars["magnitude"] <= 6])
+    assert bright["magnitude"].max() <= 6
+    assert bright.index.name == "hip"
+
+
+def test_stars_load_columns():
+    bright = stars.load(
+        stars.StarCatalog.TYCHO_1,
+        limiting_magnitude=4,
+        columns=["magnitude", "ra_degrees"],
+        cache=False,
+    )
+    assert list(bright.columns) == ["magnitude", "ra_degrees"]
+    assert bright.index.name == "hip"
+
+
+def test_stars_load_filters_cached_catalog(monkeypatch):
+    stars.preload(stars.StarCatalog.HIPPARCOS)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("catalog was read from disk")
+
+    monkeypatch.setitem(stars._loaders, stars.StarCatalog.HIPPARCOS, fail)
+    bright = stars.load(stars.StarCatalog.HIPPARCOS, limiting_magnitude=3)
+    assert bright["magnitude"].max() <= 3
+
+
+def test_stars_load_filtered_not_cached(monkeypatch):
+    stars.evict(stars.StarCatalog.HIPPARCOS)
+
+    loads = []
+    loader = stars._loaders[stars.StarCatalog.HIPPARCOS]
+
+    def recording_loader(*args, **kwargs):
+        loads.append(args)
+        return loader(*args, **kwargs)
+
+    monkeypatch.setitem(stars._loaders, stars.StarCatalog.HIPPARCOS, recording_loader)
+    bright = stars.load(stars.StarCatalog.HIPPARCOS, limiting_magnitude=3)
+    stars.load(stars.StarCatalog.HIPPARCOS, limiting_magnitude=5, columns=["magnitude"])
+
+    # the filters are pushed down to the reader, and nothing is cached
+    assert loads == [(3, None), (5, ["magnitude"])]
+    assert bright["magnitude"].max() <= 3
+    assert not any(
+        k == stars.StarCatalog.HIPPARCOS
+        or (isinstance(k, tuple) and k[0] == stars.StarCatalog.HIPPARCOS)
+        for k in stars._cache.keys()
+    )
+
+
+@pytest.mark.parametrize(
+    "ra_min,ra_max,dec_min,dec_max,mag",
+    [
+        (5, 6, 20, 22, 9),
+        (-0.5, 0.5, -10, 10, None),  # wraps around 0h
+        (23.5, 24.5, -10, 10, None),  # wraps around 24h
+        (0, 24, 80, 90, 6),
+    ],
+)
+def test_stars_query_region(ra_min, ra_max, dec_min, dec_max, mag):
+    stars.evict(stars.StarCatalog.TYCHO_1)
+    region = stars.query_region(
+        ra_min, ra_max, dec_min, dec_max, mag, catalog=stars.StarCatalog.TYCHO_1
+    )
+
+    allstars = stars.load(stars.StarCatalog.TYCHO_1)
+    cached_region = stars.query_region(
+        ra_min, ra_max, dec_min, dec_max, mag, catalog=stars.StarCatalog.TYCHO_1
+    )
+
+    assert len(region) > 0
+    assert len(region) == len(cached_region)
+    assert region["dec_degrees"].between(dec_min, dec_max).all()
+    assert len(region) < len(allstars)
+    if mag is not None:
+        assert region["magnitude"].max() <= mag
+
+
+def test_stars_load_arrow(monkeypatch, tmp_path):
+    catalog = stars.StarCatalog.HIPPARCOS
+    df = stars.load(catalog, cache=False)
+    df = df.sort_values("magnitude", na_position="last", kind="stable")
+
+    table = pa.Table.from_pandas(df, preserve_index=True)
+    table = table.replace_schema_metadata(
+        {**table.schema.metadata, b"starplot.sorted_by": b"magnitude"}
+    )
+    arrow_file = tmp_path / "stars.arrow"
+    feather.write_feather(table, arrow_file, compression="uncompressed")
+
+    monkeypatch.setitem(
+        stars._files, catalog, stars._files[catalog]._replace(arrow=arrow_file)
+    )
+    bright = stars.load(catalog, limiting_magnitude=6, cache=False)
+
+    assert len(bright) == len(df[df["magnitude"] <= 6])
+    assert bright.index.name == "hip"
+    assert set(bright.columns) == set(df.columns)
+
+
+def test_stars_cone_search():
+    polaris = stars.cone_search(
+        ra=2.53, dec=89.26, radius=1, catalog=stars.StarCatalog.TYCHO_1
+    )
+    assert len(polaris) > 0
+    assert (polaris["dec_degrees"] > 88.2).all()
+
+    bright = stars.cone_search(
+        ra=2.53, dec=89.26, radius=1, max_mag=8, catalog=stars.StarCatalog.TYCHO_1
+    )
+    assert bright["magnitude"].max() <= 8
+
+
+def test_stars_cone_search_index_persisted(tmp_path, monkeypatch):
+    monkeypatch.setattr(stars, "CACHE_PATH", tmp_path)
+    stars.evict(stars.StarCatalog.HIPPARCOS)
+
+    expected = stars.cone_search(ra=5.5, dec=-5, radius=3, as_table=True)
+    assert len(list(tmp_path.glob("stars.hipparcos.table.*.index.npz"))) == 1
+
+    def fail(*args, **kwargs):
+        raise AssertionError("index was built again")
+
+    # a new process loads the saved index instead of building it
+    stars.evict(stars.StarCatalog.HIPPARCOS)
+    monkeypatch.setattr(stars, "_build_index", fail)
+    result = stars.cone_search(ra=5.5, dec=-5, radius=3, as_table=True)
+    np.testing.assert_array_equal(result.hip, expected.hip)
+
+
+def test_stars_cone_search_index_source(tmp_path, monkeypatch):
+    monkeypatch.setattr(stars, "CACHE_PATH", tmp_path)
+    stars.evict(stars.StarCatalog.HIPPARCOS)
+    expected = stars.cone_search(ra=5.5, dec=-5, radius=3)
+
+    # a catalog read from another file (e.g. after its Arrow build is deleted)
+    # can have its stars in another order, so it doesn't use the saved index
+    files = stars._files[stars.StarCatalog.HIPPARCOS]
+    monkeypatch.setitem(
+        stars._files,
+        stars.StarCatalog.HIPPARCOS,
+        files._replace(arrow=tmp_path / "missing.arrow"),
+    )
+    stars.evict(stars.StarCatalog.HIPPARCOS)
+
+    result = stars.cone_search(ra=5.5, dec=-5, radius=3)
+    assert sorted(result.index) == sorted(expected.index)
+    stars.evict(stars.StarCatalog.HIPPARCOS)
+
+
+def test_stars_load_table():
+    df = stars.load(stars.StarCatalog.HIPPARCOS)
+    table = stars.load(stars.StarCatalog.HIPPARCOS, as_table=True)
+
+    assert len(table) == len(df)
+    assert table.ra_hours.dtype == np.float32
+    assert table.hip.dtype == np.int32
+    assert table.nbytes < df.memory_usage(index=True).sum()
+    assert np.isnan(table.bv).all()
+
+    bright = stars.load(
+        stars.StarCatalog.HIPPARCOS, limiting_magnitude=6, as_table=True
+    )
+    assert len(bright) == (df["magnitude"] <= 6).sum()
+
+    polaris = table[table.rows([11767])]
+    assert polaris.hip.tolist() == [11767]
+    assert polaris.ra_hours[0] == pytest.approx(df.loc[11767, "ra_hours"])
+
+    with pytest.raises(KeyError):
+        table.rows([-1])
+
+
+def test_stars_table_queries():
+    stars.preload(stars.StarCatalog.TYCHO_1, as_table=True)
+
+    region = stars.query_region(
+        5, 6, 20, 22, 9, catalog=stars.StarCatalog.TYCHO_1, as_table=True
+    )
+    region_df = stars.query_region(5, 6, 20, 22, 9, catalog=stars.StarCatalog.TYCHO_1)
+    assert isinstance(region, StarTable)
+    assert len(region) == len(region_df)
+
+    cone = stars.cone_search(
+        ra=2.53,
+        dec=89.26,
+        radius=1,
+        max_mag=8,
+        catalog=stars.StarCatalog.TYCHO_1,
+        as_table=True,
+    )
+    cone_df = stars.cone_search(
+        ra=2.53, dec=89.26, radius=1, max_mag=8, catalog=stars.StarCatalog.TYCHO_1
+    )
+    assert len(cone) == len(cone_df)
+    assert (cone.magnitude <= 8).all()
+
+
+def test_stars_propagate():
+    table = stars.load(stars.StarCatalog.HIPPARCOS, as_table=True)[:2000]
+    t = load.timescale().utc(2024, 3, 1)
+
+    ra, dec = stars.propagate(table, t)
+
+    astrometric = load("de421_2001.bsp")["earth"].at(t).observe(table.star())
+    expected_ra, expected_dec, _ = astrometric.radec()
+
+    def unit_vectors(ra_hours, dec_degrees):
+        ra, dec = np.radians(ra_hours * 15), np.radians(dec_degrees)
+        return np.array(
+            [np.cos(dec) * np.cos(ra), np.cos(dec) * np.sin(ra), np.sin(dec)]
+        )
+
+    chord = np.linalg.norm(
+        unit_vectors(ra, dec) - unit_vectors(expected_ra.hours, expected_dec.degrees),
+        axis=0,
+    )
+    separation_arcsec = np.degrees(2 * np.arcsin(chord / 2)) * 3600
+
+    assert (separation_arcsec <= stars.astrometry_error(table) + 1e-3).all()
+
+
+def test_stars_propagate_no_proper_motion():
+    table = StarTable(
+        hip=[1],
+        ra_hours=[5.0],
+        dec_degrees=[89.5],
+        magnitude=[1.0],
+        ra_mas_per_year=[0.0],
+        dec_mas_per_year=[0.0],
+    )
+    ra, dec = stars.propagate(table, load.timescale().utc(2024, 3, 1))
+    assert ra[0] == pytest.approx(5.0, abs=1e-6)
+    assert dec[0] == pytest.approx(89.5, abs=1e-6)
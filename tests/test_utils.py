@@ -1,6 +1,11 @@
 import pytest
 
-from starplot.utils import in_circle, dec_str_to_float
+from starplot.utils import (
+    in_circle,
+    dec_str_to_float,
+    bv_to_hex_color,
+    bv_to_hex_colors,
+)
 
 
 @pytest.mark.parametrize(
@@ -27,3 +32,10 @@ def test_in_circle(x, y, expected):
 )
 def test_dec_str_to_float(dms, expected):
     assert dec_str_to_float(dms) == expected
+
+
+def test_bv_to_hex_colors():
+    bv = [-0.4, 0.0, 0.62, 2.0, 2.5, -1, float("nan")]
+    expected = [bv_to_hex_color(b) if b == b else None for b in bv]
+    expected = [c or "#000" for c in expected]
+    assert bv_to_hex_colors(bv, "#000").tolist() == expected
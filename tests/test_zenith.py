@@ -1,9 +1,11 @@
 from pathlib import Path
 from datetime import datetime, timezone
 
+import numpy as np
 import pytest
 
 from starplot import ZenithPlot
+from starplot.base import StarPlot
 from starplot.models import SkyObject
 
 from .utils import colorhash, dhash
@@ -60,3 +62,32 @@ def test_zenith_plot_with_info_label():
 
     assert dhash(filename) == "0b71ac848894794f"
     assert colorhash(filename) == "07000000000"
+
+
+def test_zenith_plot_in_bounds_many(zenith_plot):
+    rng = np.random.default_rng(7)
+    ra = rng.uniform(0, 24, 500)
+    dec = rng.uniform(-90, 90, 500)
+
+    in_bounds = zenith_plot.in_bounds_many(ra, dec)
+
+    assert 0 < in_bounds.sum() < len(ra)
+    assert in_bounds.tolist() == [zenith_plot.in_bounds(r, d) for r, d in zip(ra, dec)]
+
+
+def test_zenith_plot_in_bounds_many_default(zenith_plot):
+    # the base class checks against the axes' (square) background patch, which contains the horizon's circle
+    rng = np.random.default_rng(7)
+    ra = rng.uniform(0, 24, 500)
+    dec = rng.uniform(-90, 90, 500)
+
+    in_bounds = StarPlot.in_bounds_many(zenith_plot, ra, dec)
+
+    x, y = zenith_plot._prepare_coords(ra, dec)
+    (x_min, x_max), (y_min, y_max) = (
+        zenith_plot.ax.get_xlim(),
+        zenith_plot.ax.get_ylim(),
+    )
+    in_axes = (x > x_min) & (x < x_max) & (y > y_min) & (y < y_max)
+    assert in_bounds.tolist() == in_axes.tolist()
+    assert (zenith_plot.in_bounds_many(ra, dec) <= in_bounds).all()